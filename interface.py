@@ -1,52 +1,143 @@
 import os
+import sys
 import tkinter as tk
+from threading import Thread
 from tkinter import ttk
-from PIL import Image, ImageTk
-import subprocess
+from PIL import ImageTk
+
+# Make the shared synth_core package in the 'interface' folder importable
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), 'interface'))
+from synth_core.class_registry import load_registry
+from synth_core.dataset_stats import load_run_stats, format_stats
+from synth_core.dir_index import DirectoryIndex
+from synth_core.generation import DESKTOP_SIZE
+from synth_core.icon_grid import VirtualIconGrid
+from synth_core.jobs import JobRunner, FINISHED, FAILED, CANCELLED
+from synth_core.previews import PreviewLoader
+from synth_core.thumbnails import THUMB_SIZE, get_thumbnail_cache
 
 # Global variables for cycling through synthetic images
 synth_images = []
 current_image_index = 0
+preview_loader = None
+synth_display_job = None
 
 # Create the main application window first
 root = tk.Tk()
 root.title("Main Interface")
-root.geometry("1200x600")  # Width x Height
+root.geometry("1200x800")  # Width x Height
 
 # Initialize the auto_refresh variable after the root window is created
 auto_refresh = tk.BooleanVar(value=False)
 
+# Index of icon folders and generated runs, kept current from filesystem events
+directory_index = DirectoryIndex('icon_captures')
+directory_index.start()
+index_version = directory_index.version
+
+# Tool scripts run as background jobs so the window stays responsive
+job_runner = JobRunner()
+MAX_LOG_LINES = 5000  # Oldest lines are dropped from the job log past this
+log_redraw_source = None  # (job id, stream) whose last log line is a progress bar that the next update replaces
+
+def run_tool(name, script, refresh=True):
+    command = [sys.executable, os.path.join('interface', script)]
+    job = job_runner.start(name, command, on_success=check_auto_refresh if refresh else None)
+    append_log(f"Started {job.describe()}\n", 'info')
+    update_job_list()
+
 # Function to call extract1.py
 def run_extract_script():
-    subprocess.run(['python', 'interface/extract1.py'])
-    check_auto_refresh()
+    run_tool("Extract Icons", 'extract1.py')
 def run_extract_image_script():
-    subprocess.run(['python', 'interface/extract_image.py'])
-    check_auto_refresh()
+    run_tool("Extract Icons from image", 'extract_image.py')
 def run_testing_script():
-    subprocess.run(['python', 'interface/model-test.py'])
-    check_auto_refresh()
+    run_tool("Test Models", 'model-test.py')
 
 def run_className_script():
-    subprocess.run(['python', 'interface/ClassName1.py'])
+    run_tool("Class Editor", 'ClassName1.py', refresh=False)
 
 
 def run_synthetic_script():
-    subprocess.run(['python', 'interface/synthetic.py'])
-    check_auto_refresh()
+    run_tool("Synthetic Generator", 'synthetic.py')
 
 def run_training_script():
-    subprocess.run(['python', 'interface/train.py'])
-    check_auto_refresh()
-
+    run_tool("Train Model", 'train.py')
+
+# Function to add a line to the job log panel; lines ending in '\r' are progress bar redraws of the same line
+def append_log(text, tag='stdout', source=None):
+    global log_redraw_source
+    log_text.configure(state='normal')
+    if log_redraw_source is not None:
+        if source == log_redraw_source:
+            log_text.delete('redraw', 'end-1c')
+        log_redraw_source = None
+    if text.endswith('\r'):
+        text = text[:-1] + '\n'
+        log_text.mark_set('redraw', 'end-1c')
+        log_text.mark_gravity('redraw', 'left')
+        log_redraw_source = source
+    log_text.insert(tk.END, text, tag)
+    # Keep long training or generation output from growing the widget without bound
+    excess = int(log_text.index('end-1c').split('.')[0]) - MAX_LOG_LINES
+    if excess > 0:
+        log_text.delete('1.0', f'{excess + 1}.0')
+    log_text.see(tk.END)
+    log_text.configure(state='disabled')
+
+# Function to show every job with its state and exit code
+def update_job_list():
+    job_listbox.delete(0, tk.END)
+    for job in job_runner.jobs:
+        job_listbox.insert(tk.END, job.describe())
+        if job.status == FAILED:
+            job_listbox.itemconfig(tk.END, foreground='red')
+        elif job.status == FINISHED:
+            job_listbox.itemconfig(tk.END, foreground='darkgreen')
+        elif job.status == CANCELLED:
+            job_listbox.itemconfig(tk.END, foreground='gray')
+
+# Function to cancel the selected job, or the most recent running one
+def cancel_job():
+    selection = job_listbox.curselection()
+    if selection:
+        job = job_runner.jobs[selection[0]]
+    else:
+        running = job_runner.running_jobs()
+        job = running[-1] if running else None
+    if job:
+        job.cancel()
+        append_log(f"Cancelling {job.describe()}\n", 'info')
+        update_job_list()
+
+# Function to stream job output into the log and react to finished jobs
+def poll_jobs():
+    lines, completed = job_runner.poll()
+    for job, stream_name, line in lines:
+        if line.strip():
+            append_log(f"[{job.name}] {line}", stream_name, (job.job_id, stream_name))
+    for job in completed:
+        append_log(f"{job.describe()}\n", 'info')
+        if job.status == FINISHED and job.on_success:
+            job.on_success()
+    if lines or completed:
+        update_job_list()
+    root.after(100, poll_jobs)
+
+def on_close():
+    job_runner.cancel_all()
+    directory_index.stop()
+    if preview_loader:
+        preview_loader.close()
+    root.destroy()
 
 # Function to refresh directories and update dropdowns
 def refresh_directories():
-    icon_dropdown['values'] = populate_dropdown('icon_captures')
+    icon_dropdown['values'] = populate_dropdown()
     synth_dropdown['values'] = ["None"]  # Reset synth dropdown
     icon_dropdown_var.set("None")
     synth_dropdown_var.set("None")
-    icon_canvas.delete("all")
+    icon_grid.clear()
     synth_canvas.delete("all")
 
 def check_auto_refresh():
@@ -54,84 +145,138 @@ def check_auto_refresh():
         refresh_directories()
 
 # Function to update the canvas with icons from the selected directory
-def update_icon_canvas(canvas, dropdown_var, base_dir, synth_dropdown):
+def update_icon_canvas(grid, dropdown_var, base_dir, synth_dropdown):
     selected_dir = dropdown_var.get()
-    canvas.delete("all")  # Clear the canvas
+    grid.clear()  # Clear the grid
     synth_dropdown['values'] = ["None"]  # Reset synth dropdown
 
     if selected_dir != "None":
         icon_path = os.path.join(base_dir, selected_dir)
-        icons = [f for f in os.listdir(icon_path) if f.endswith('.png')]
+        icons = directory_index.icons(selected_dir)
 
         # Update synth dropdown based on the selected icon directory
-        synth_gens_path = os.path.join(icon_path, 'synth_gens')
-        if os.path.exists(synth_gens_path):
-            synth_dirs = [d for d in os.listdir(synth_gens_path) if os.path.isdir(os.path.join(synth_gens_path, d))]
-            synth_dropdown['values'] = ["None"] + synth_dirs
-        else:
-            synth_dropdown['values'] = ["None"]
-
-        # Display icons in a grid
-        rows, cols = 5, 5
-        icon_size = 50
-        for index, icon in enumerate(icons):
-            try:
-                img_path = os.path.join(icon_path, icon)
-                img = Image.open(img_path)
-                img.thumbnail((icon_size, icon_size))
-                img_tk = ImageTk.PhotoImage(img)
-                row, col = divmod(index, cols)
-                canvas.create_image(col * icon_size, row * icon_size, anchor='nw', image=img_tk)
-                canvas.image = img_tk  # Keep a reference to avoid garbage collection
-            except Exception as e:
-                print(f"Error loading image {img_path}: {e}")
+        synth_dropdown['values'] = ["None"] + directory_index.runs(selected_dir)
+
+        # Display icons once the folder's thumbnail atlas is built (in the background if needed)
+        cache = get_thumbnail_cache(icon_path)
+        cache.when_ready(grid, icons, lambda: draw_icon_grid(grid, dropdown_var, selected_dir, cache, icons))
+
+# Function to show icons from the thumbnail cache; the grid only draws the rows in view
+def draw_icon_grid(grid, dropdown_var, selected_dir, cache, icons):
+    if dropdown_var.get() != selected_dir:
+        return  # Another folder was selected while the thumbnails were being built
+    grid.set_items(icons, cache.thumbnail)
 
 # Function to update synthetic canvas with images from the selected subdirectory
 def update_synth_canvas(canvas, dropdown_var, base_dir, icon_dir):
-    global synth_images, current_image_index
+    global synth_images, current_image_index, preview_loader
     selected_dir = dropdown_var.get()
     canvas.delete("all")  # Clear the canvas
+    if preview_loader:
+        preview_loader.close()
+        preview_loader = None
+    synth_images = []
+    synth_position_var.set("")
 
     if selected_dir != "None":
         synth_path = os.path.join(icon_dir, 'synth_gens', selected_dir)
-        synth_images = [os.path.join(synth_path, f) for f in os.listdir(synth_path) if f.endswith('.png')]
-        synth_images.sort()
+        synth_images = [os.path.join(synth_path, f) for f in directory_index.images(os.path.basename(icon_dir), selected_dir)]
         current_image_index = 0
+        preview_loader = PreviewLoader(synth_images, size=(500, 300))
         display_synth_image(canvas)
+        show_run_stats(synth_path)
+    else:
+        set_stats_text("")
 
+# Function to show the current synthetic image from the preview cache
 def display_synth_image(canvas):
-    global synth_images, current_image_index
-    if synth_images:
+    global synth_display_job
+    if synth_display_job is not None:
+        canvas.after_cancel(synth_display_job)
+        synth_display_job = None
+    if synth_images and preview_loader:
+        synth_position_var.set(f"{current_image_index + 1} / {len(synth_images)}")
+        preview_loader.prefetch_around(current_image_index)
+        if preview_loader.failed(current_image_index):
+            canvas.delete("all")
+            return
+        img = preview_loader.get_cached(current_image_index)
+        if img is None:
+            # Still decoding: keep the previous frame and check again shortly, so scrubbing never blocks
+            synth_display_job = canvas.after(15, lambda: display_synth_image(canvas))
+            return
+        img_tk = ImageTk.PhotoImage(img)
         canvas.delete("all")
+        canvas.create_image(0, 0, anchor='nw', image=img_tk)
+        canvas.image = img_tk  # Keep a reference to avoid garbage collection
+
+# Function to show a run's statistics; stats.json makes this instant, otherwise labels are scanned in the background
+def show_run_stats(run_dir):
+    set_stats_text("Loading statistics...")
+    result = {}
+
+    def load():
         try:
-            img_path = synth_images[current_image_index]
-            img = Image.open(img_path)
-            img.thumbnail((500, 300))
-            img_tk = ImageTk.PhotoImage(img)
-            canvas.create_image(0, 0, anchor='nw', image=img_tk)
-            canvas.image = img_tk  # Keep a reference to avoid garbage collection
+            stats = load_run_stats(run_dir, DESKTOP_SIZE)
+            class_names = load_registry(run_dir).mapping  # Labels carry registry class ids
+            result['text'] = format_stats(stats, class_names)
         except Exception as e:
-            print(f"Error loading image {img_path}: {e}")
+            result['text'] = f"Could not load statistics: {e}"
+
+    def check(thread):
+        if thread.is_alive():
+            root.after(50, check, thread)
+        elif synth_images and os.path.dirname(synth_images[0]) == run_dir:
+            set_stats_text(result['text'])
+
+    thread = Thread(target=load, daemon=True)
+    thread.start()
+    check(thread)
+
+def set_stats_text(text):
+    stats_text.configure(state='normal')
+    stats_text.delete('1.0', tk.END)
+    stats_text.insert(tk.END, text)
+    stats_text.configure(state='disabled')
+
+# Function to move through the synthetic images by a number of steps
+def step_synth_image(canvas, step):
+    global current_image_index
+    if synth_images:
+        new_index = min(max(current_image_index + step, 0), len(synth_images) - 1)
+        if new_index != current_image_index:
+            current_image_index = new_index
+            display_synth_image(canvas)
 
 def show_next_image(canvas):
-    global current_image_index, synth_images
-    if synth_images and current_image_index < len(synth_images) - 1:
-        current_image_index += 1
-        display_synth_image(canvas)
+    step_synth_image(canvas, 1)
 
 def show_previous_image(canvas):
-    global current_image_index
-    if synth_images and current_image_index > 0:
-        current_image_index -= 1
-        display_synth_image(canvas)
-
-# Function to populate dropdown with directories from a base folder
-def populate_dropdown(base_dir):
-    if not os.path.exists(base_dir):
-        return ["None"]
-    dirs = [d for d in os.listdir(base_dir) if os.path.isdir(os.path.join(base_dir, d))]
-    dirs.sort()
-    return ["None"] + dirs
+    step_synth_image(canvas, -1)
+
+# Function to populate dropdown with the indexed icon folders
+def populate_dropdown():
+    return ["None"] + directory_index.folders()
+
+# Function to update dropdowns and counts live when the directory index changes
+def poll_directory_index():
+    global index_version
+    if directory_index.version != index_version:
+        index_version = directory_index.version
+        icon_dropdown['values'] = populate_dropdown()
+        selected_icon_dir = icon_dropdown_var.get()
+        if selected_icon_dir != "None":
+            synth_dropdown['values'] = ["None"] + directory_index.runs(selected_icon_dir)
+
+        folders, runs, images = directory_index.totals()
+        status = f"{folders} icon folders, {runs} generated runs, {images} images"
+        if selected_icon_dir != "None":
+            status += f" | {selected_icon_dir}: {directory_index.icon_count(selected_icon_dir)} icons"
+            selected_run = synth_dropdown_var.get()
+            if selected_run != "None":
+                status += f", {selected_run}: {directory_index.image_count(selected_icon_dir, selected_run)} images"
+        index_status_var.set(status)
+    root.after(500, poll_directory_index)
 
 # Configure the grid layout for the main window
 root.columnconfigure(0, weight=1)
@@ -156,6 +301,10 @@ refresh_button.pack(side='left', padx=5)
 auto_refresh_check = tk.Checkbutton(refresh_frame, text="Auto Refresh", variable=auto_refresh)
 auto_refresh_check.pack(side='left')
 
+index_status_var = tk.StringVar(value="")
+index_status_label = tk.Label(refresh_frame, textvariable=index_status_var, bg="lightgray")
+index_status_label.pack(side='left', padx=10)
+
 # Adding navigation buttons
 nav_button1 = tk.Button(nav_frame, text="Extract Icons", relief="flat", command=run_extract_script)
 nav_button1.grid(row=0, column=0, padx=10, pady=10)
@@ -176,12 +325,12 @@ nav_button3.grid(row=0, column=4, padx=10, pady=10)
 icon_canvas_frame = tk.Frame(content_frame)
 icon_canvas_frame.pack(side='left', padx=10, pady=10)
 
-icon_canvas = tk.Canvas(icon_canvas_frame, width=500, height=300, bg="white")
-icon_canvas.pack()
+icon_grid = VirtualIconGrid(icon_canvas_frame, columns=9, thumb_size=THUMB_SIZE, height=300, bg="white")
+icon_grid.pack()
 
 icon_dropdown_var = tk.StringVar(value="None")
 icon_dropdown = ttk.Combobox(icon_canvas_frame, textvariable=icon_dropdown_var, state="readonly")
-icon_dropdown['values'] = populate_dropdown('icon_captures')
+icon_dropdown['values'] = populate_dropdown()
 icon_dropdown.pack()
 
 # Canvas and dropdown for synth_gens
@@ -204,14 +353,57 @@ synth_dropdown.grid(row=0, column=1)
 next_button = tk.Button(synth_controls_frame, text=">>", command=lambda: show_next_image(synth_canvas))
 next_button.grid(row=0, column=2)
 
+synth_position_var = tk.StringVar(value="")
+synth_position_label = tk.Label(synth_controls_frame, textvariable=synth_position_var)
+synth_position_label.grid(row=1, column=0, columnspan=3)
+
+# Statistics for the selected run
+stats_text = tk.Text(synth_canvas_frame, width=70, height=6, state='disabled', wrap='word')
+stats_text.pack(fill='x')
+
+# Keyboard scrubbing: arrows step one image, Shift+arrows ten, Home/End jump to the ends
+root.bind('<Left>', lambda e: step_synth_image(synth_canvas, -1))
+root.bind('<Right>', lambda e: step_synth_image(synth_canvas, 1))
+root.bind('<Shift-Left>', lambda e: step_synth_image(synth_canvas, -10))
+root.bind('<Shift-Right>', lambda e: step_synth_image(synth_canvas, 10))
+root.bind('<Home>', lambda e: step_synth_image(synth_canvas, -len(synth_images)))
+root.bind('<End>', lambda e: step_synth_image(synth_canvas, len(synth_images)))
+
 # Update dropdowns and canvases based on selections
-icon_dropdown.bind("<<ComboboxSelected>>", lambda e: update_icon_canvas(icon_canvas, icon_dropdown_var, 'icon_captures', synth_dropdown))
+icon_dropdown.bind("<<ComboboxSelected>>", lambda e: update_icon_canvas(icon_grid, icon_dropdown_var, 'icon_captures', synth_dropdown))
 synth_dropdown.bind("<<ComboboxSelected>>", lambda e: update_synth_canvas(synth_canvas, synth_dropdown_var, 'synth_gens', os.path.join('icon_captures', icon_dropdown_var.get())))
 
+# Job list and log panel
+log_frame = tk.Frame(root)
+log_frame.grid(row=3, column=0, sticky="nsew", padx=10, pady=5)
+log_frame.columnconfigure(1, weight=1)
+log_frame.rowconfigure(0, weight=1)
+
+job_listbox = tk.Listbox(log_frame, width=45, height=8)
+job_listbox.grid(row=0, column=0, sticky="ns")
+
+cancel_button = tk.Button(log_frame, text="Cancel Job", command=cancel_job)
+cancel_button.grid(row=1, column=0, sticky="ew")
+
+log_text = tk.Text(log_frame, height=8, state='disabled', wrap='none')
+log_text.grid(row=0, column=1, rowspan=2, sticky="nsew")
+log_text.tag_configure('stderr', foreground='red')
+log_text.tag_configure('info', foreground='blue')
+
+log_scrollbar = ttk.Scrollbar(log_frame, orient="vertical", command=log_text.yview)
+log_scrollbar.grid(row=0, column=2, rowspan=2, sticky="ns")
+log_text.configure(yscrollcommand=log_scrollbar.set)
+
 # Positioning the main content area
 root.grid_rowconfigure(0, weight=1)
 root.grid_rowconfigure(1, weight=3)
 root.grid_rowconfigure(2, weight=1)
+root.grid_rowconfigure(3, weight=2)
+
+# Start polling job output and the directory index, and stop running jobs when the window closes
+root.after(100, poll_jobs)
+root.after(500, poll_directory_index)
+root.protocol("WM_DELETE_WINDOW", on_close)
 
 # Start the Tkinter main loop
 root.mainloop()
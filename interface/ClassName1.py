@@ -1,121 +1,28 @@
 import os
 import tkinter as tk
 from tkinter import ttk, filedialog
-from PIL import Image, ImageTk
-import json
-import pyautogui
-import cv2
-import numpy as np
-
-# Define root and icon capture directory paths
-ROOT_DIR = os.path.dirname(os.path.abspath(__file__))
-ICON_BASE_DIR = os.path.normpath(os.path.join(ROOT_DIR, '..', 'icon_captures'))
-
-# Load JSON data from selected directory
-def load_json_data(label_json):
-    if os.path.exists(label_json):
-        with open(label_json, 'r') as f:
-            try:
-                return json.load(f) if os.stat(label_json).st_size > 0 else {}
-            except json.JSONDecodeError:
-                print("Error: JSON file is corrupt or empty. Initializing as an empty dictionary.")
-                return {}
-    else:
-        return {}
-
-# Load finalized class file
-def load_finalized_class_file(class_file_path):
-    class_mapping = {}
-    if os.path.exists(class_file_path):
-        with open(class_file_path, 'r') as f:
-            for line in f:
-                parts = line.strip().split()
-                if len(parts) == 2:
-                    class_mapping[int(parts[0])] = parts[1]
-    return class_mapping
-
-# Save finalized class file
-def save_finalized_class_file(class_file_path, class_mapping):
-    with open(class_file_path, 'w') as f:
-        for class_id, class_label in sorted(class_mapping.items()):
-            f.write(f"{class_id}    {class_label}\n")
-
-def capture_screenshot():
-    # Capture a screenshot of the main monitor
-    screenshot = pyautogui.screenshot()
-    screenshot = np.array(screenshot)
-    screenshot = cv2.cvtColor(screenshot, cv2.COLOR_RGB2BGR)
-    return screenshot
-
-def draw_bounding_box(event, x, y, flags, param):
-    global ix, iy, drawing, screenshot, screenshot_copy
-
-    if event == cv2.EVENT_LBUTTONDOWN:
-        drawing = True
-        ix, iy = x, y
-
-    elif event == cv2.EVENT_MOUSEMOVE:
-        if drawing:
-            screenshot = screenshot_copy.copy()
-            cv2.rectangle(screenshot, (ix, iy), (x, y), (0, 255, 0), 2)
-
-    elif event == cv2.EVENT_LBUTTONUP:
-        drawing = False
-        cv2.rectangle(screenshot, (ix, iy), (x, y), (0, 255, 0), 2)
-        save_cropped_area(ix, iy, x, y)
-
-def save_cropped_area(x1, y1, x2, y2):
-    global screenshot_copy, selected_folder_path
-
-    # Create the output directory if not exists
-    output_dir = get_next_output_directory(selected_folder_path)
-
-    # Save the cropped area as a new icon
-    crop_img = screenshot_copy[min(y1, y2):max(y1, y2), min(x1, x2):max(x1, x2)]
-    icon_filename = os.path.join(output_dir, f"icon_{len(os.listdir(output_dir))}.png")
-    cv2.imwrite(icon_filename, crop_img)
-    print(f"Saved cropped icon to {icon_filename}")
-
-    # Clear the current bounding box
-    clear_bounding_box()
-
-def clear_bounding_box():
-    global screenshot, screenshot_copy
-    screenshot = screenshot_copy.copy()
-
+from synth_core.class_registry import load_registry
+from synth_core.embeddings import EmbeddingIndex
+from synth_core.extraction import capture_frame
+from synth_core.icon_grid import VirtualIconGrid
+from synth_core.label_store import LabelStore
+from synth_core.lazy import lazy_import
+from synth_core.paths import ICON_BASE_DIR
+from synth_core.region_capture import RegionCaptureSession
+from synth_core.thumbnails import get_thumbnail_cache
+
+# Heavy modules are only imported once they are needed
+Image = lazy_import('PIL.Image')
+ImageTk = lazy_import('PIL.ImageTk')
+
+# Function to crop icons by hand from a screenshot; crops are saved together when the session ends
 def take_screenshot():
-    global screenshot, screenshot_copy
-
-    # Capture the screenshot
-    screenshot = capture_screenshot()
-    screenshot_copy = screenshot.copy()
-
-    # Open the screenshot window with OpenCV
-    cv2.namedWindow("Screenshot")
-    cv2.setMouseCallback("Screenshot", draw_bounding_box)
-
-    while True:
-        cv2.imshow("Screenshot", screenshot)
-
-        key = cv2.waitKey(1) & 0xFF
-        if key == ord("c"):
-            clear_bounding_box()
-        elif key == ord("s"):
-            break
-
-    cv2.destroyAllWindows()
-
-def get_next_output_directory(base_dir):
-    existing_dirs = [d for d in os.listdir(base_dir) if os.path.isdir(os.path.join(base_dir, d)) and d.startswith('icons_')]
-    if existing_dirs:
-        existing_numbers = [int(d.split('_')[1]) for d in existing_dirs if d.split('_')[1].isdigit()]
-        next_number = max(existing_numbers) + 1 if existing_numbers else 1
-    else:
-        next_number = 1
-
-    new_output_dir = os.path.join(base_dir, f'icons_{next_number}')
-    os.makedirs(new_output_dir, exist_ok=True)
-    return new_output_dir
+    frame = capture_frame()
+    if frame is None:
+        return
+    output_dir = RegionCaptureSession(frame, ICON_BASE_DIR).run()
+    if output_dir:
+        folder_dropdown.configure(values=sorted_icon_folders())
 
 # Initialize Tkinter window
 root = tk.Tk()
@@ -144,8 +51,56 @@ def update_display():
         class_entry.delete(0, tk.END)
         if current_image in icon_classes:
             class_entry.insert(0, icon_classes[current_image])
+        show_suggestion()
 
         update_class_listbox()
+        icon_grid.select(current_index)
+
+# Function to pre-fill the class entry for an unlabeled icon from its nearest labeled neighbours
+def show_suggestion():
+    suggestion_label.configure(text="")
+    if embedding_index is None or not embedding_index.ready or not icon_files:
+        return
+    current_image = icon_files[current_index]
+    if current_image in icon_classes:
+        return
+    label, confidence = embedding_index.suggest(current_image, icon_classes)
+    if label is not None and not class_entry.get():
+        class_entry.insert(0, label)
+        class_entry.select_range(0, tk.END)  # Typing replaces the suggestion
+        suggestion_label.configure(text=f"Suggested: {label} ({confidence:.0%} of neighbours)")
+
+# Function to show suggestions once the embedding index for the folder has been built
+def wait_for_embeddings(index):
+    if index is not embedding_index:
+        return
+    if index.ready:
+        show_suggestion()
+    else:
+        root.after(200, wait_for_embeddings, index)
+
+# Function to give the current class to the K nearest unlabeled icons
+def apply_to_neighbours():
+    if embedding_index is None or not embedding_index.ready or not icon_files:
+        print("Embeddings are still being computed.")
+        return
+    class_label = class_entry.get()
+    if not class_label:
+        return
+    try:
+        k = int(neighbour_count.get())
+    except ValueError:
+        print(f"Invalid neighbour count: {neighbour_count.get()}")
+        return
+
+    save_class()
+    current_image = icon_files[current_index]
+    unlabeled = set(icon_files) - icon_classes.keys()
+    neighbours = embedding_index.nearest(current_image, candidates=unlabeled, k=k)
+    for name, similarity in neighbours:
+        label_store.set_label(name, class_label)
+    print(f"Applied class '{class_label}' to {len(neighbours)} nearest unlabeled icons")
+    save_progress()
 
 # Function to navigate to the next image
 def next_image():
@@ -163,12 +118,15 @@ def prev_image():
         update_display()
     save_progress()
 
-# Function to update the class listbox
+# Function to update the class listbox, only touching it when the set of classes changed
 def update_class_listbox():
-    class_listbox.delete(0, tk.END)
-    unique_classes = set(icon_classes.values())
-    for cls in sorted(unique_classes):
-        class_listbox.insert(tk.END, cls)
+    global listed_classes
+    classes = label_store.classes()
+    if classes != listed_classes:
+        listed_classes = classes
+        class_listbox.delete(0, tk.END)
+        for cls in classes:
+            class_listbox.insert(tk.END, cls)
 
 # Function to handle double-click on a class in the listbox
 def on_class_select(event):
@@ -176,26 +134,16 @@ def on_class_select(event):
     class_entry.delete(0, tk.END)
     class_entry.insert(0, selected_class)
 
-# Function to save the current state of classes to JSON and TXT files
+# Function to record the current image's class; one journal line per change
 def save_class():
-    global finalized_classes
     current_image = icon_files[current_index]
     class_label = class_entry.get()
 
     # Check for duplicates before saving
-    if current_image not in icon_classes or icon_classes[current_image] != class_label:
-        icon_classes[current_image] = class_label
-
-        with open(LABEL_JSON, 'w') as f:
-            json.dump(icon_classes, f, indent=4)
-
-        # Update the finalized_classes with new labels
-        icon_id = int(current_image.split('_')[1].split('.')[0])  # Assuming image format icon_0.png
-        finalized_classes[icon_id] = class_label
-        save_finalized_class_file(FINALIZED_CLASS_FILE, finalized_classes)
-
+    if label_store.set_label(current_image, class_label):
         print(f"Saved class for {current_image}: {class_label}")
         update_class_listbox()
+        save_progress()
     else:
         print(f"Class '{class_label}' already exists. Skipping save.")
 
@@ -209,96 +157,120 @@ def delete_image():
     global current_index
     if 0 <= current_index < len(icon_files):
         current_image = icon_files[current_index]
-        icon_id = int(current_image.split('_')[1].split('.')[0])  # Assuming image format icon_0.png
 
         # Delete the image file
         os.remove(os.path.join(selected_folder_path, current_image))
         print(f"Deleted {current_image}")
 
-        # Remove the class entry from icon_classes and finalized_classes
-        if current_image in icon_classes:
-            del icon_classes[current_image]
-            with open(LABEL_JSON, 'w') as f:
-                json.dump(icon_classes, f, indent=4)
-
-        if icon_id in finalized_classes:
-            del finalized_classes[icon_id]
-            save_finalized_class_file(FINALIZED_CLASS_FILE, finalized_classes)
+        # Remove the class entry from the label store and the neighbour index
+        label_store.delete(current_image)
+        embedding_index.remove(current_image)
+        update_class_listbox()
 
         # Update the icon files list and adjust the index
+        thumbnail_cache.remove(current_image)
+        deleted_index = current_index
         icon_files.pop(current_index)
         if current_index >= len(icon_files):
             current_index = max(0, len(icon_files) - 1)
 
-        # Update the display and icon grid
+        # Update the display and drop the deleted cell from the icon grid
+        icon_grid.remove(deleted_index)
         update_display()
-        update_icon_grid()
         save_progress()
 
-# Function to save the current progress
+# Function to save the current progress, debounced so fast navigation writes it once
 def save_progress():
-    with open(PROGRESS_FILE, 'w') as f:
-        json.dump({'current_index': current_index}, f)
+    global progress_job
+    if progress_job is not None:
+        root.after_cancel(progress_job)
+    progress_job = root.after(PROGRESS_DELAY_MS, flush_progress)
+
+def flush_progress():
+    global progress_job
+    if progress_job is not None:
+        root.after_cancel(progress_job)
+        progress_job = None
+    if label_store is not None:
+        label_store.save_progress(current_index)
+        # Tools launched while the editor is open read the snapshot files, not the journal
+        label_store.flush_snapshots()
+
+# Function to write finalized_class.txt from the current labels and compile its class registry
+def export_classes():
+    if label_store is not None:
+        label_store.export_class_file()
+        registry = load_registry(os.path.dirname(label_store.class_file))
+        print(f"Exported {len(registry)} classes (version {registry.version}) to {label_store.class_file}")
+
+# Function to flush pending progress and compact the label journal
+def close_label_store():
+    global label_store
+    if label_store is not None:
+        flush_progress()
+        label_store.close()
+        label_store = None
+
+def on_close():
+    close_label_store()
+    root.destroy()
 
 # Function to handle icon clicks
-def on_icon_click(event, index):
+def on_icon_click(index):
     global current_index
     current_index = index
     update_display()
 
 # Function to update the grid display of icons
 def update_icon_grid():
-    for widget in icon_frame.winfo_children():
-        widget.destroy()
-
-    for index, icon_file in enumerate(icon_files):
-        icon_path = os.path.join(selected_folder_path, icon_file)
-        icon_image = Image.open(icon_path)
-        icon_image.thumbnail((50, 50))
-        icon_thumb = ImageTk.PhotoImage(icon_image)
+    icon_grid.set_items(icon_files, thumbnail_cache.thumbnail)
+    icon_grid.select(current_index)
 
-        icon_label = tk.Label(icon_frame, image=icon_thumb, borderwidth=2, relief="solid")
-        icon_label.image = icon_thumb  # Keep a reference to avoid garbage collection
-        icon_label.grid(row=index // 6, column=index % 6, padx=2, pady=2)
-        icon_label.bind("<Button-1>", lambda e, idx=index: on_icon_click(e, idx))
+# Function to list the icon folders for the dropdown
+def sorted_icon_folders():
+    return sorted(f for f in os.listdir(ICON_BASE_DIR) if os.path.isdir(os.path.join(ICON_BASE_DIR, f)))
 
 # Dropdown to select a folder
 def select_folder(event=None):
-    global selected_folder_path, icon_files, LABEL_JSON, LABEL_TXT, PROGRESS_FILE, FINALIZED_CLASS_FILE, icon_classes, finalized_classes, current_index
+    global selected_folder_path, thumbnail_cache, embedding_index, icon_files, label_store, icon_classes, current_index
     selected = selected_folder.get()
     if selected:
+        close_label_store()
         selected_folder_path = os.path.join(ICON_BASE_DIR, selected)
+        thumbnail_cache = get_thumbnail_cache(selected_folder_path)
 
-        LABEL_JSON = os.path.join(selected_folder_path, 'icon_classes.json')
-        LABEL_TXT = os.path.join(selected_folder_path, 'icon_classes.txt')
-        PROGRESS_FILE = os.path.join(selected_folder_path, 'progress.json')
-        FINALIZED_CLASS_FILE = os.path.join(selected_folder_path, 'finalized_class.txt')
-
-        icon_classes = load_json_data(LABEL_JSON)
-        finalized_classes = load_finalized_class_file(FINALIZED_CLASS_FILE)
+        label_store = LabelStore(selected_folder_path)
+        icon_classes = label_store.labels
 
         icon_files = [f for f in os.listdir(selected_folder_path) if f.endswith('.png')]
         icon_files.sort()
 
-        if os.path.exists(PROGRESS_FILE):
-            with open(PROGRESS_FILE, 'r') as f:
-                progress = json.load(f)
-                current_index = progress.get('current_index', 0)
-        else:
-            current_index = 0
+        current_index = label_store.load_progress()
+
+        # Embeddings are reused from the folder cache and only computed for new icons
+        embedding_index = EmbeddingIndex(selected_folder_path)
+        embedding_index.build_in_background(icon_files)
 
         update_display()
-        update_icon_grid()
+        thumbnail_cache.when_ready(root, icon_files, update_icon_grid)
+        wait_for_embeddings(embedding_index)
 
 # Initialize the Tkinter window
 root = tk.Tk()
 root.title("Icon Classifier")
+root.protocol("WM_DELETE_WINDOW", on_close)
+
+# Label state for the selected folder
+label_store = None
+embedding_index = None
+listed_classes = None
+progress_job = None
+PROGRESS_DELAY_MS = 1000  # Progress and label snapshots are written once navigation and edits pause this long
 
 # Get available folders and set up dropdown
-icon_folders = [f for f in os.listdir(ICON_BASE_DIR) if os.path.isdir(os.path.join(ICON_BASE_DIR, f))]
 selected_folder = tk.StringVar()
 ttk.Label(root, text="Select an Icon Folder:").pack(pady=10)
-folder_dropdown = ttk.Combobox(root, textvariable=selected_folder, values=icon_folders, state='readonly')
+folder_dropdown = ttk.Combobox(root, textvariable=selected_folder, values=sorted_icon_folders(), state='readonly')
 folder_dropdown.pack(pady=10)
 folder_dropdown.bind("<<ComboboxSelected>>", select_folder)
 
@@ -311,10 +283,22 @@ class_entry = tk.Entry(root, width=50)
 class_entry.pack()
 class_entry.bind('<Return>', save_and_next)
 
+# Suggested class from the nearest labeled icons
+suggestion_label = tk.Label(root, text="")
+suggestion_label.pack()
+
 # Save class button
 save_button = tk.Button(root, text="Save Class", command=save_class)
 save_button.pack()
 
+# Label the K nearest unlabeled icons with the current class
+neighbour_frame = tk.Frame(root)
+neighbour_frame.pack()
+neighbour_count = tk.StringVar(value="10")
+tk.Spinbox(neighbour_frame, from_=1, to=500, width=5, textvariable=neighbour_count).pack(side=tk.LEFT)
+apply_button = tk.Button(neighbour_frame, text="Apply to K Nearest Unlabeled", command=apply_to_neighbours)
+apply_button.pack(side=tk.LEFT)
+
 # Navigation buttons
 prev_button = tk.Button(root, text="Back", command=prev_image)
 prev_button.pack(side=tk.LEFT)
@@ -326,24 +310,18 @@ next_button.pack(side=tk.RIGHT)
 delete_button = tk.Button(root, text="Delete Image", command=delete_image)
 delete_button.pack()
 
+# Export button for finalized_class.txt
+export_button = tk.Button(root, text="Export Classes", command=export_classes)
+export_button.pack()
+
 # Listbox for existing classes
 class_listbox = tk.Listbox(root, width=50, height=10)
 class_listbox.pack()
 class_listbox.bind('<Double-1>', on_class_select)
 
-# Scrollable frame for icon grid
-canvas = tk.Canvas(root)
-icon_frame = tk.Frame(canvas)
-scrollbar = ttk.Scrollbar(root, orient="vertical", command=canvas.yview)
-canvas.configure(yscrollcommand=scrollbar.set)
-scroll_frame = canvas.create_window((0, 0), window=icon_frame, anchor="nw")
-
-def on_configure(event):
-    canvas.configure(scrollregion=canvas.bbox("all"))
-
-icon_frame.bind("<Configure>", on_configure)
-canvas.pack(side=tk.LEFT, fill="both", expand=True)
-scrollbar.pack(side=tk.RIGHT, fill="y")
+# Scrollable icon grid; only the rows in view are drawn
+icon_grid = VirtualIconGrid(root, columns=6, on_click=on_icon_click)
+icon_grid.pack(side=tk.LEFT, fill="both", expand=True)
 
 # Add manual screenshot button
 screenshot_button = tk.Button(root, text="Capture Screenshot", command=take_screenshot)
@@ -1,24 +1,15 @@
 import os
 import tkinter as tk
 from tkinter import ttk
-from PIL import Image, ImageTk
 import json
+from synth_core.class_files import load_json_data
+from synth_core.icon_grid import VirtualIconGrid
+from synth_core.lazy import lazy_import
+from synth_core.paths import ICON_BASE_DIR
+from synth_core.thumbnails import get_thumbnail_cache
 
-# Define root and icon capture directory paths
-ROOT_DIR = os.path.dirname(os.path.abspath(__file__))
-ICON_BASE_DIR = os.path.normpath(os.path.join(ROOT_DIR, '..', 'icon_captures'))
-
-# Load JSON data from selected directory
-def load_json_data(label_json):
-    if os.path.exists(label_json):
-        with open(label_json, 'r') as f:
-            try:
-                return json.load(f) if os.stat(label_json).st_size > 0 else {}
-            except json.JSONDecodeError:
-                print("Error: JSON file is corrupt or empty. Initializing as an empty dictionary.")
-                return {}
-    else:
-        return {}
+Image = lazy_import('PIL.Image')
+ImageTk = lazy_import('PIL.ImageTk')
 
 # Function to save the current state of classes to JSON and TXT files
 def save_class():
@@ -61,6 +52,7 @@ def update_display():
             class_entry.insert(0, icon_classes[current_image])
 
         update_class_listbox()
+        icon_grid.select(current_index)
 
 # Function to navigate to the next image
 def next_image():
@@ -113,11 +105,13 @@ def delete_image():
                 for image, class_label in icon_classes.items():
                     f.write(f"{image} {class_label}\n")
 
+        thumbnail_cache.remove(current_image)
+        deleted_index = current_index
         icon_files.pop(current_index)
         if current_index >= len(icon_files):
             current_index = max(0, len(icon_files) - 1)
+        icon_grid.remove(deleted_index)
         update_display()
-        update_icon_grid()
         save_progress()
 
 # Function to save the current progress
@@ -126,26 +120,15 @@ def save_progress():
         json.dump({'current_index': current_index}, f)
 
 # Function to handle icon clicks
-def on_icon_click(event, index):
+def on_icon_click(index):
     global current_index
     current_index = index
     update_display()
 
 # Function to update the grid display of icons
 def update_icon_grid():
-    for widget in icon_frame.winfo_children():
-        widget.destroy()
-
-    for index, icon_file in enumerate(icon_files):
-        icon_path = os.path.join(selected_folder_path, icon_file)
-        icon_image = Image.open(icon_path)
-        icon_image.thumbnail((50, 50))
-        icon_thumb = ImageTk.PhotoImage(icon_image)
-
-        icon_label = tk.Label(icon_frame, image=icon_thumb, borderwidth=2, relief="solid")
-        icon_label.image = icon_thumb  # Keep a reference to avoid garbage collection
-        icon_label.grid(row=index // 6, column=index % 6, padx=2, pady=2)
-        icon_label.bind("<Button-1>", lambda e, idx=index: on_icon_click(e, idx))
+    icon_grid.set_items(icon_files, thumbnail_cache.thumbnail)
+    icon_grid.select(current_index)
 
 # Initialize Tkinter window
 root = tk.Tk()
@@ -153,10 +136,11 @@ root.title("Icon Classifier")
 
 # Dropdown to select a folder
 def select_folder(event=None):
-    global selected_folder_path, icon_files, LABEL_JSON, LABEL_TXT, PROGRESS_FILE, icon_classes, current_index
+    global selected_folder_path, thumbnail_cache, icon_files, LABEL_JSON, LABEL_TXT, PROGRESS_FILE, icon_classes, current_index
     selected = selected_folder.get()
     if selected:
         selected_folder_path = os.path.join(ICON_BASE_DIR, selected)
+        thumbnail_cache = get_thumbnail_cache(selected_folder_path)
 
         # Set paths for JSON, TXT, and progress files
         LABEL_JSON = os.path.join(selected_folder_path, 'icon_classes.json')
@@ -178,9 +162,9 @@ def select_folder(event=None):
         else:
             current_index = 0
 
-        # Update the display and grid
+        # Update the display, and the grid once thumbnails are cached
         update_display()
-        update_icon_grid()
+        thumbnail_cache.when_ready(root, icon_files, update_icon_grid)
 
 # Get available folders and set up dropdown
 icon_folders = [f for f in os.listdir(ICON_BASE_DIR) if os.path.isdir(os.path.join(ICON_BASE_DIR, f))]
@@ -219,19 +203,9 @@ class_listbox = tk.Listbox(root, width=50, height=10)
 class_listbox.pack()
 class_listbox.bind('<Double-1>', on_class_select)
 
-# Scrollable frame for icon grid
-canvas = tk.Canvas(root)
-icon_frame = tk.Frame(canvas)
-scrollbar = ttk.Scrollbar(root, orient="vertical", command=canvas.yview)
-canvas.configure(yscrollcommand=scrollbar.set)
-scroll_frame = canvas.create_window((0, 0), window=icon_frame, anchor="nw")
-
-def on_configure(event):
-    canvas.configure(scrollregion=canvas.bbox("all"))
-
-icon_frame.bind("<Configure>", on_configure)
-canvas.pack(side=tk.LEFT, fill="both", expand=True)
-scrollbar.pack(side=tk.RIGHT, fill="y")
+# Scrollable icon grid; only the rows in view are drawn
+icon_grid = VirtualIconGrid(root, columns=6, on_click=on_icon_click)
+icon_grid.pack(side=tk.LEFT, fill="both", expand=True)
 
 # Run the Tkinter event loop
 root.mainloop()
@@ -0,0 +1,42 @@
+import argparse
+import os
+from synth_core.class_registry import find_registry
+from synth_core.models import BACKENDS, load_detector
+from synth_core.serving import BATCH_WINDOW_MS, MAX_BATCH, make_server
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Serve icon detections over HTTP from one loaded model.")
+    parser.add_argument('weights', help="best.pt, .torchscript, .onnx or OpenVINO .xml")
+    parser.add_argument('--backend', choices=BACKENDS, default='auto')
+    parser.add_argument('--host', default='127.0.0.1')
+    parser.add_argument('--port', type=int, default=8765)
+    parser.add_argument('--max-batch', type=int, default=MAX_BATCH)
+    parser.add_argument('--window-ms', type=float, default=BATCH_WINDOW_MS,
+                        help="How long to wait for more requests to batch with the first one")
+    args = parser.parse_args()
+
+    detector, load_seconds, _ = load_detector(args.weights, backend=args.backend)
+    print(f"Loaded {args.weights} ({type(detector).__name__}) in {load_seconds:.2f}s")
+
+    # Class names come from the class registry next to the weights, like in model-test.py
+    registry = find_registry(os.path.dirname(os.path.abspath(args.weights)), levels=2)  # Also above *_openvino_model/
+    if registry:
+        print(f"Serving {len(registry)} classes (version {registry.version})")
+        class_names = registry.mapping
+    else:
+        print("No class registry next to the weights; using the model's class names.")
+        class_names = detector.names
+
+    server, _ = make_server(detector, class_names, args.host, args.port, args.max_batch, args.window_ms)
+    print(f"Serving detections on http://{args.host}:{args.port}/detect (metrics at /metrics)")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+
+
+if __name__ == '__main__':
+    main()
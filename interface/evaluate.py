@@ -0,0 +1,41 @@
+import argparse
+import json
+from synth_core.class_registry import find_registry
+from synth_core.evaluation import EVAL_BATCH, EVAL_CONFIDENCE, LOADER_WORKERS, evaluate, format_evaluation
+from synth_core.models import BACKENDS, load_detector
+
+
+# Function to find class names: the class registry of the dataset or one of its parents, else the model's own
+def find_class_names(dataset_dir, detector):
+    registry = find_registry(dataset_dir)
+    return registry.mapping if registry else detector.names
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Score a trained model on a synth_gen_images_N folder or images/val split.")
+    parser.add_argument('weights', help="best.pt, .torchscript, .onnx or OpenVINO .xml")
+    parser.add_argument('dataset', help="Folder with images and YOLO .txt labels, or a dataset with val.txt or images/val")
+    parser.add_argument('--backend', choices=BACKENDS, default='auto')
+    parser.add_argument('--batch', type=int, default=EVAL_BATCH)
+    parser.add_argument('--workers', type=int, default=LOADER_WORKERS, help="Image decoding threads")
+    parser.add_argument('--conf', type=float, default=EVAL_CONFIDENCE)
+    parser.add_argument('--json', help="Also write the results to this JSON file")
+    args = parser.parse_args()
+
+    detector, load_seconds, _ = load_detector(args.weights, backend=args.backend)
+    print(f"Loaded {args.weights} ({type(detector).__name__}) in {load_seconds:.2f}s")
+
+    try:
+        result = evaluate(detector, args.dataset, args.batch, args.workers, args.conf)
+    except ValueError as e:
+        parser.exit(1, f"{e}\n")
+    print(format_evaluation(result, find_class_names(args.dataset, detector)))
+
+    if args.json:
+        with open(args.json, 'w') as f:
+            json.dump(result, f, indent=2)
+        print(f"Results saved to {args.json}")
+
+
+if __name__ == '__main__':
+    main()
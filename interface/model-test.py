@@ -1,64 +1,67 @@
 import os
+import time
 import tkinter as tk
-from tkinter import filedialog, messagebox
-from PIL import Image, ImageTk
-import cv2
-import numpy as np
-import torch
-import pyautogui
+from threading import Thread
+from tkinter import ttk, filedialog, messagebox
 import yaml
+from synth_core.capture import default_capture
+from synth_core.change_detection import CachedDetector
+from synth_core.class_registry import find_registry
+from synth_core.lazy import lazy_import
+from synth_core.export import export_onnx, quantize_onnx
+from synth_core.models import BACKENDS, check_backend, load_detector
+from synth_core.pipeline import FramePipeline
+from synth_core.profiling import span, timings
+from synth_core.tiling import TILE_BATCH, TILE_OVERLAP, TILE_SIZE, TiledDetector, benchmark_tiling
+
+# Heavy modules are only imported once a model is loaded
+Image = lazy_import('PIL.Image')
+ImageTk = lazy_import('PIL.ImageTk')
+cv2 = lazy_import('cv2')
+
+
+# Function to capture a screenshot of the desktop as a BGR array; SYNTH_CAPTURE picks the backend
+def capture_screenshot():
+    with span('capture'):
+        return default_capture().grab()
 
 
-# Function to capture a screenshot of the desktop
-def capture_screenshot():
-    screenshot = pyautogui.screenshot()
-    screenshot = screenshot.convert("RGB")
-    return screenshot
-
-
-# Function to load class names from finalized_class.txt
-def load_finalized_classes(filepath):
-    class_mapping = {}
-    finalized_class_file_path = os.path.join(os.path.dirname(filepath), 'finalized_class.txt')
-
-    if os.path.exists(finalized_class_file_path):
-        with open(finalized_class_file_path, 'r') as f:
-            for line in f:
-                parts = line.strip().split(maxsplit=1)
-                if len(parts) == 2:
-                    class_id = int(parts[0])
-                    class_name = parts[1]
-                    class_mapping[class_id] = class_name
-        print(f"Loaded classes from finalized_class.txt: {class_mapping}")
-    else:
-        print("finalized_class.txt not found in the model directory.")
+# Function to load the {class_id: name} table from the class registry next to the model
+def load_finalized_classes(filepath, model=None):
+    # Exported OpenVINO models sit in a *_openvino_model/ folder below the weights, so check the parent too
+    registry = find_registry(os.path.dirname(os.path.abspath(filepath)), levels=2)
 
-    return class_mapping
+    if registry:
+        print(f"Loaded {len(registry)} classes (version {registry.version}): {list(registry.names)}")
+        return registry.mapping
+    names = getattr(model, 'names', None) or {}
+    print(f"classes.json or finalized_class.txt not found next to the model; using its own {len(names)} class names.")
+    return names
 
 
 # Function to process the screenshot with YOLO model and filter results by confidence
 def process_screenshot_with_yolo(screenshot, model, class_mapping, confidence_threshold=0.5):
-    # Convert screenshot to numpy array and prepare it for YOLO model
-    frame = cv2.cvtColor(np.array(screenshot), cv2.COLOR_RGB2BGR)
-    results = model(frame)  # YOLO model prediction
+    # Capture backends already return BGR arrays, so the frame needs no conversion
+    frame = screenshot
 
-    # Filter out detections below the confidence threshold
-    detections = results.xyxy[0]  # Get the detections
-    filtered_detections = [d for d in detections if d[4] >= confidence_threshold]  # Confidence is at index 4
+    # YOLO model prediction, already filtered by the confidence threshold; only changed parts of the
+    # screen are run through the model, and an unchanged screen needs no new frame at all
+    filtered_detections, changed = detection_cache.detect(model, frame, confidence_threshold)
+    if not changed:
+        return None
 
     # Draw bounding boxes on the frame
-    for det in filtered_detections:
-        x1, y1, x2, y2, conf, cls = det[:6]
-        cls = int(cls)  # Ensure cls is an integer
-        print(f"Detected class index: {cls}")  # Debugging
+    with span('draw'):
+        for det in filtered_detections:
+            x1, y1, x2, y2, conf, cls = det[:6]
+            cls = int(cls)  # Ensure cls is an integer
 
-        # Get the class name from the finalized class mapping
-        class_name = class_mapping.get(cls, "Unknown")  # Use the mapping to get the class name
+            # Get the class name from the finalized class mapping
+            class_name = class_mapping.get(cls, "Unknown")  # Use the mapping to get the class name
 
-        label = f"{class_name} {conf:.2f}"
-        cv2.rectangle(frame, (int(x1), int(y1)), (int(x2), int(y2)), (0, 255, 0), 2)
-        cv2.putText(frame, label, (int(x1), int(y1) - 10), cv2.FONT_HERSHEY_SIMPLEX, 0.5, (0, 255, 0), 2)
-        print(f"Detection: {label} at [{x1}, {y1}, {x2}, {y2}]")  # Debugging output
+            label = f"{class_name} {conf:.2f}"
+            cv2.rectangle(frame, (int(x1), int(y1)), (int(x2), int(y2)), (0, 255, 0), 2)
+            cv2.putText(frame, label, (int(x1), int(y1) - 10), cv2.FONT_HERSHEY_SIMPLEX, 0.5, (0, 255, 0), 2)
 
     return frame
 
@@ -82,63 +85,313 @@ def load_yolo_model(filepath):
     # Print classes from the data.yaml
     print_yaml_classes(filepath)
 
-    # Load the YOLO model
-    model = torch.hub.load('ultralytics/yolov5', 'custom', path=filepath, force_reload=True)
+    # Load the YOLO model from the local yolov5 checkout or an exported file, never the network
+    try:
+        model, load_seconds, cached = load_detector(filepath, backend=backend_var.get())
+    except Exception as e:
+        messagebox.showerror("Error", f"Could not load model: {e}")
+        return None
+    source = "cache" if cached else "disk"
+    status_label.config(text=f"Loaded {os.path.basename(filepath)} ({type(model).__name__}) from {source} "
+                             f"in {load_seconds:.2f}s")
+    print(f"Model loaded from {source} in {load_seconds:.2f}s")
 
     # Verify that the model class names match the expected classes
     print("Model classes loaded in the model:", model.names)  # Check loaded class names
-    if len(model.names) != len(set(model.names)):
+    if len(model.names) != len(set(model.names.values())):
         print("Warning: Duplicate class names detected in model!")
     return model
 
 
-# Function to update display with processed image, resized to fit window
-def update_display(frame):
-    frame = cv2.cvtColor(frame, cv2.COLOR_BGR2RGB)  # Convert to RGB
-    img = Image.fromarray(frame)
+# Function to run detection on a screenshot and prepare the annotated image; runs on the inference thread
+def process_frame(screenshot):
+    current_model, current_mapping = detector, class_mapping  # Read once so a model switch mid-frame is harmless
+    if not current_model:
+        return None
+    processed_frame = process_screenshot_with_yolo(screenshot, current_model, current_mapping or {})
+    if processed_frame is None:
+        return None
+    with span('color conversion'):
+        img = Image.fromarray(cv2.cvtColor(processed_frame, cv2.COLOR_BGR2RGB))
 
     # Resize the image to fit inside the Tkinter window
-    window_width, window_height = root.winfo_width(), root.winfo_height()
-    img.thumbnail((window_width - 20, window_height - 80))  # Leave space for borders and controls
-
-    img_tk = ImageTk.PhotoImage(image=img)
-    img_label.config(image=img_tk)
-    img_label.image = img_tk
-
-
-# Function to continuously capture, process, and update the display
+    with span('resize'):
+        img.thumbnail(display_size)
+    return img
+
+
+# Function to update display with a processed image; Tk widgets are only touched from the Tk thread
+def update_display(img):
+    with span('display'):
+        img_tk = ImageTk.PhotoImage(image=img)
+        img_label.config(image=img_tk)
+        img_label.image = img_tk
+
+
+# Function to track the window size for the inference thread
+def on_resize(event):
+    global display_size
+    if event.widget is root:
+        display_size = (max(event.width - 20, 1), max(event.height - 180, 1))  # Leave space for borders and controls
+
+
+# Function to show the newest processed frame and the pipeline's speed
+def render_loop():
+    img = pipeline.poll()
+    if img is not None:
+        update_display(img)
+        stats_label.config(text=f"{pipeline.fps:.1f} FPS | latency {pipeline.latency * 1000:.0f} ms | "
+                                f"dropped {pipeline.dropped} | inference skipped {detection_cache.skipped}, "
+                                f"partial {detection_cache.partial}, full {detection_cache.full}")
+    update_timings_overlay()
+    root.after(RENDER_INTERVAL_MS, render_loop)
+
+
+# Function to refresh the per-stage latency overlay, at most every TIMINGS_INTERVAL_MS
+def update_timings_overlay():
+    global timings_updated
+    if not show_timings_var.get():
+        timings_label.place_forget()
+        return
+    now = time.perf_counter()
+    if now - timings_updated >= TIMINGS_INTERVAL_MS / 1000:
+        timings_updated = now
+        timings_label.config(text=timings.format_summary())
+        timings_label.place(in_=img_label, x=4, y=4)
+
+
+# Function to save the per-stage latency percentiles as JSON or CSV
+def on_export_timings_click():
+    path = filedialog.asksaveasfilename(title="Save Stage Timings", defaultextension=".json",
+                                        filetypes=[("JSON", "*.json"), ("CSV", "*.csv")])
+    if path:
+        timings.export(path)
+        status_label.config(text=f"Stage timings saved to {path}")
+
+
+# Function to start capture and inference on worker threads
 def continuous_capture():
-    if model and class_mapping:
-        screenshot = capture_screenshot()
-        processed_frame = process_screenshot_with_yolo(screenshot, model, class_mapping)
-        update_display(processed_frame)
-    # Schedule the next screenshot capture after 100 milliseconds (adjustable)
-    root.after(100, continuous_capture)
+    global capture_running
+    capture_running = True
+    pipeline.start()
+    render_loop()
+
+
+# Function to pick the detector the inference thread uses, tiled or whole-frame, from the settings
+def apply_tiling_settings():
+    global detector
+    if model is None or not tiled_var.get():
+        detector = model
+        return
+    try:
+        tile_size, overlap, batch_size = int(tile_size_var.get()), float(overlap_var.get()), int(batch_var.get())
+    except ValueError:
+        messagebox.showerror("Error", "Tile size and batch size must be integers and overlap a number.")
+        return
+    detector = TiledDetector(model, tile_size, overlap, batch_size)
+
+
+# Function to time several tiling configurations on the current screen without blocking the window
+def on_benchmark_click():
+    if model is None:
+        messagebox.showerror("Error", "Load a model first.")
+        return
+    try:
+        configs = [(int(tile_size_var.get()), float(overlap_var.get()), int(batch_var.get()))]
+    except ValueError:
+        configs = []
+    configs += [(size, TILE_OVERLAP, batch) for size in (512, 640, 960) for batch in (1, 4, TILE_BATCH)]
+    frame = capture_screenshot()
+    status_label.config(text="Benchmarking tiled inference...")
+    run_in_background(lambda: benchmark_tiling(model, frame, configs), show_benchmark, benchmark_button)
+
+
+def show_benchmark(results, error):
+    if error:
+        status_label.config(text=f"Benchmark failed: {error}")
+        return
+    print("tile  overlap  batch  tiles  ms/frame  tiles/s  detections")
+    for r in results:
+        print(f"{r['tile_size']:>4}  {r['overlap']:>7.2f}  {r['batch_size']:>5}  {r['tiles']:>5}  "
+              f"{r['frame_ms']:>8.1f}  {r['tiles_per_second']:>7.1f}  {r['detections']:>10}")
+    if results:
+        best = min(results, key=lambda r: r['frame_ms'])
+        status_label.config(text=f"Fastest tiling: {best['tile_size']} px, overlap {best['overlap']:.2f}, "
+                                 f"batch {best['batch_size']} at {best['frame_ms']:.0f} ms/frame "
+                                 f"({best['tiles_per_second']:.1f} tiles/s)")
+
+
+# Function to run slow work on a thread and hand its result to on_done on the Tk thread
+def run_in_background(work, on_done, button):
+    outcome = {}
+
+    def target():
+        try:
+            outcome['result'] = work()
+        except Exception as e:
+            outcome['error'] = e
+
+    def wait(thread):
+        if thread.is_alive():
+            root.after(200, wait, thread)
+            return
+        button.config(state=tk.NORMAL)
+        if 'error' in outcome:
+            print(f"Error: {outcome['error']}")
+        on_done(outcome.get('result'), outcome.get('error'))
+
+    thread = Thread(target=target, daemon=True)
+    thread.start()
+    button.config(state=tk.DISABLED)
+    wait(thread)
+
+
+# Function to export PyTorch weights to ONNX, optionally quantized to int8 on validation images
+def on_export_click():
+    weights_path = filedialog.askopenfilename(title="Select Weights to Export", filetypes=[("YOLO Model", "*.pt")])
+    if not weights_path:
+        return
+    calibration_dir = None
+    if int8_var.get():
+        calibration_dir = filedialog.askdirectory(title="Select Validation Images for int8 Calibration")
+        if not calibration_dir:
+            return
+
+    def work():
+        onnx_path = export_onnx(weights_path)
+        return quantize_onnx(onnx_path, calibration_dir) if calibration_dir else onnx_path
+
+    def done(output_path, error):
+        if error:
+            messagebox.showerror("Error", f"Export failed: {error}")
+        else:
+            status_label.config(text=f"Exported {output_path}")
+
+    status_label.config(text="Exporting...")
+    run_in_background(work, done, export_button)
+
+
+# Function to check the loaded backend against the PyTorch weights it was exported from, on the current screen
+def on_check_click():
+    if model is None or model_path is None:
+        messagebox.showerror("Error", "Load an exported model first.")
+        return
+    stem = os.path.splitext(model_path)[0]
+    if stem.endswith('.int8'):
+        stem = stem[:-len('.int8')]
+    reference_path = stem + '.pt'
+    if not os.path.exists(reference_path):
+        reference_path = filedialog.askopenfilename(title="Select Reference PyTorch Weights",
+                                                    filetypes=[("YOLO Model", "*.pt")])
+        if not reference_path:
+            return
+    candidate = model
+    frame = capture_screenshot()
+
+    def work():
+        reference, _, _ = load_detector(reference_path, backend='pytorch')
+        return check_backend(candidate, reference, [frame])
+
+    def done(report, error):
+        if error:
+            messagebox.showerror("Error", f"Check failed: {error}")
+            return
+        print(f"Backend check against {reference_path}: {report}")
+        status_label.config(text=f"Check: {report['matched']}/{report['reference_boxes']} reference boxes matched "
+                                 f"(mean IoU {report['mean_iou']:.3f}), {report['missed']} missed, "
+                                 f"{report['extra']} extra")
+
+    status_label.config(text="Checking against PyTorch...")
+    run_in_background(work, done, check_button)
+
+
+# Function to stop the worker threads before closing the window
+def on_close():
+    pipeline.stop()
+    root.destroy()
 
 
 # Function triggered when the load button is clicked
 def on_load_button_click():
-    global model, class_mapping
-    model_path = filedialog.askopenfilename(title="Select YOLO Model File", filetypes=[("YOLO Model", "*.pt")])
-    if model_path:
+    global model, model_path, class_mapping
+    selected_path = filedialog.askopenfilename(title="Select YOLO Model File",
+                                               filetypes=[("YOLO Model", "*.pt *.torchscript *.onnx *.xml")])
+    if selected_path:
+        model_path = selected_path
         model = load_yolo_model(model_path)
-        class_mapping = load_finalized_classes(model_path)
-        continuous_capture()  # Start the continuous capture loop
+        class_mapping = load_finalized_classes(model_path, model)
+        apply_tiling_settings()
+        timings.reset()  # Percentiles should describe the new model only
+        if not capture_running:
+            continuous_capture()  # Start the continuous capture loop
 
 
 # Setup Tkinter window
 root = tk.Tk()
 root.title("YOLO Model Tester")
 root.geometry("1200x800")  # Set the initial size of the window
+root.protocol("WM_DELETE_WINDOW", on_close)
+root.bind("<Configure>", on_resize)
 
 # Setup UI Elements
-load_button = tk.Button(root, text="Load Model and Start", command=on_load_button_click)
-load_button.pack(pady=10)
+# Model loading, export and backend selection
+model_frame = tk.Frame(root)
+model_frame.pack(pady=10)
+load_button = tk.Button(model_frame, text="Load Model and Start", command=on_load_button_click)
+load_button.pack(side=tk.LEFT)
+tk.Label(model_frame, text="Backend:").pack(side=tk.LEFT, padx=(10, 0))
+backend_var = tk.StringVar(value='auto')
+ttk.Combobox(model_frame, textvariable=backend_var, values=BACKENDS, state='readonly', width=12).pack(side=tk.LEFT)
+check_button = tk.Button(model_frame, text="Check vs PyTorch", command=on_check_click)
+check_button.pack(side=tk.LEFT, padx=5)
+export_button = tk.Button(model_frame, text="Export ONNX", command=on_export_click)
+export_button.pack(side=tk.LEFT, padx=(10, 0))
+int8_var = tk.BooleanVar(value=False)
+tk.Checkbutton(model_frame, text="int8", variable=int8_var).pack(side=tk.LEFT)
+
+status_label = tk.Label(root, text="No model loaded")
+status_label.pack()
+
+stats_label = tk.Label(root, text="")
+stats_label.pack()
+
+# Tiled inference keeps small icons at full resolution instead of shrinking the whole screen to the model size
+tiling_frame = tk.Frame(root)
+tiling_frame.pack()
+tiled_var = tk.BooleanVar(value=False)
+tile_size_var = tk.StringVar(value=str(TILE_SIZE))
+overlap_var = tk.StringVar(value=str(TILE_OVERLAP))
+batch_var = tk.StringVar(value=str(TILE_BATCH))
+tk.Checkbutton(tiling_frame, text="Tiled inference", variable=tiled_var, command=apply_tiling_settings).pack(side=tk.LEFT)
+for text, variable in (("Tile size:", tile_size_var), ("Overlap:", overlap_var), ("Batch:", batch_var)):
+    tk.Label(tiling_frame, text=text).pack(side=tk.LEFT)
+    tk.Entry(tiling_frame, textvariable=variable, width=5).pack(side=tk.LEFT)
+tk.Button(tiling_frame, text="Apply", command=apply_tiling_settings).pack(side=tk.LEFT, padx=5)
+benchmark_button = tk.Button(tiling_frame, text="Benchmark Tiling", command=on_benchmark_click)
+benchmark_button.pack(side=tk.LEFT)
+
+# Per-stage latency percentiles, shown over the image
+timings_frame = tk.Frame(root)
+timings_frame.pack()
+show_timings_var = tk.BooleanVar(value=True)
+tk.Checkbutton(timings_frame, text="Show stage timings", variable=show_timings_var).pack(side=tk.LEFT)
+tk.Button(timings_frame, text="Export Timings", command=on_export_timings_click).pack(side=tk.LEFT, padx=5)
 
 img_label = tk.Label(root)
 img_label.pack(padx=10, pady=10)
 
+timings_label = tk.Label(root, font=("Courier", 9), justify=tk.LEFT, bg="black", fg="#00ff00")
+
 model = None  # Initialize model variable
+model_path = None  # File the current model was loaded from
+detector = None  # The model, or the model wrapped for tiled inference
 class_mapping = None  # Initialize class mapping variable
+capture_running = False  # Loading another model reuses the running capture loop
+display_size = (1180, 720)  # Updated from the window size as it changes
+RENDER_INTERVAL_MS = 15  # How often the Tk thread checks for a new processed frame
+TIMINGS_INTERVAL_MS = 500  # How often the stage timing overlay is refreshed
+timings_updated = 0.0
+detection_cache = CachedDetector()  # Reuses detections between frames; resets itself when the model changes
+pipeline = FramePipeline(capture_screenshot, process_frame)
 
 root.mainloop()
@@ -0,0 +1,5 @@
+"""Shared code for the icon extraction, labeling, generation and training tools.
+
+Submodules import their heavy dependencies (cv2, numpy, PIL, torch, ...) lazily,
+so importing anything from here is cheap and tools open their windows right away.
+"""
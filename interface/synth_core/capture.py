@@ -0,0 +1,149 @@
+"""Screen capture backends returning BGR NumPy arrays.
+
+    mss        Fast native grab (XGetImage/XShm on X11, BitBlt on Windows); no PIL round trip
+    pyautogui  The original path, kept as a fallback
+    replay     Frames from an image folder or video file at a fixed rate, for headless tests and benchmarks
+
+Every backend takes an optional region (left, top, width, height) to grab
+only part of the screen. The SYNTH_CAPTURE environment variable picks the
+backend for all tools, e.g. SYNTH_CAPTURE=replay:recordings/session1@10.
+"""
+import importlib.util
+import os
+import threading
+import time
+
+from .lazy import lazy_import
+
+cv2 = lazy_import('cv2')
+np = lazy_import('numpy')
+mss = lazy_import('mss')
+pyautogui = lazy_import('pyautogui')
+
+# Adjustable variables
+CAPTURE_ENV_VAR = 'SYNTH_CAPTURE'
+IMAGE_EXTENSIONS = ('.png', '.jpg', '.jpeg', '.bmp')
+
+
+class MssCapture:
+
+    def __init__(self, region=None):
+        self.region = region
+        self._local = threading.local()  # mss handles must not be shared between threads
+
+    def grab(self):
+        sct = getattr(self._local, 'sct', None)
+        if sct is None:
+            sct = self._local.sct = mss.mss()
+        if self.region:
+            left, top, width, height = self.region
+            monitor = {'left': left, 'top': top, 'width': width, 'height': height}
+        else:
+            monitor = sct.monitors[1]  # Main monitor; monitors[0] spans all of them
+        shot = np.frombuffer(sct.grab(monitor).raw, dtype=np.uint8).reshape(monitor['height'], monitor['width'], 4)
+        return shot[..., :3].copy()  # Drop alpha; BGRA is already in BGR order
+
+    def close(self):
+        sct = getattr(self._local, 'sct', None)
+        if sct is not None:
+            sct.close()
+            self._local.sct = None
+
+
+class PyAutoGuiCapture:
+
+    def __init__(self, region=None):
+        self.region = region
+
+    def grab(self):
+        screenshot = pyautogui.screenshot(region=self.region)
+        return cv2.cvtColor(np.asarray(screenshot), cv2.COLOR_RGB2BGR)
+
+    def close(self):
+        pass
+
+
+class ReplayCapture:
+    # Plays back an image folder (sorted by name) or a video file, looping, at fps frames per second
+
+    def __init__(self, source, fps=None, region=None, loop=True):
+        self.source = source
+        self.region = region
+        self.loop = loop
+        self.interval = 1.0 / fps if fps else 0.0
+        self._next_time = None
+        self._lock = threading.Lock()
+        self._video = None
+        self._index = 0
+        if os.path.isdir(source):
+            self._files = [os.path.join(source, f) for f in sorted(os.listdir(source))
+                           if f.lower().endswith(IMAGE_EXTENSIONS)]
+            if not self._files:
+                raise FileNotFoundError(f"No images found in {source}")
+        else:
+            self._files = None
+            self._video = cv2.VideoCapture(source)
+            if not self._video.isOpened():
+                raise FileNotFoundError(f"Could not open video {source}")
+
+    def _read(self):
+        if self._files is not None:
+            if self._index >= len(self._files):
+                if not self.loop:
+                    return None
+                self._index = 0
+            frame = cv2.imread(self._files[self._index])
+            self._index += 1
+            return frame
+        ok, frame = self._video.read()
+        if not ok and self.loop:
+            self._video.set(cv2.CAP_PROP_POS_FRAMES, 0)
+            ok, frame = self._video.read()
+        return frame if ok else None
+
+    def grab(self):
+        with self._lock:
+            # Hold each frame to the requested rate so timings resemble a live screen
+            now = time.perf_counter()
+            if self._next_time is not None and now < self._next_time:
+                time.sleep(self._next_time - now)
+            self._next_time = max(now, self._next_time or now) + self.interval
+            frame = self._read()
+        if frame is None or not self.region:
+            return frame
+        left, top, width, height = self.region
+        return frame[top:top + height, left:left + width].copy()
+
+    def close(self):
+        if self._video is not None:
+            self._video.release()
+
+
+def open_capture(spec=None, region=None):
+    # Backend from spec or SYNTH_CAPTURE: 'auto' (default), 'mss', 'pyautogui' or 'replay:<path>[@fps]'
+    spec = spec or os.environ.get(CAPTURE_ENV_VAR, 'auto')
+    if spec.startswith('replay:'):
+        source, _, fps = spec[len('replay:'):].rpartition('@')
+        if not source or not fps.replace('.', '', 1).isdigit():
+            source, fps = spec[len('replay:'):], None
+        return ReplayCapture(source, float(fps) if fps else None, region)
+    if spec == 'auto':
+        spec = 'mss' if importlib.util.find_spec('mss') is not None else 'pyautogui'
+    if spec == 'mss':
+        return MssCapture(region)
+    if spec == 'pyautogui':
+        return PyAutoGuiCapture(region)
+    raise ValueError(f"Unknown capture backend '{spec}'")
+
+
+_default_capture = None
+_default_lock = threading.Lock()
+
+
+def default_capture():
+    # Process-wide backend chosen from SYNTH_CAPTURE on first use
+    global _default_capture
+    with _default_lock:
+        if _default_capture is None:
+            _default_capture = open_capture()
+        return _default_capture
@@ -0,0 +1,97 @@
+"""Skip detection on frames that did not change and re-run it only where they did.
+
+Frames are compared tile by tile against the previous frame. Unchanged frames
+reuse the cached detections; otherwise each group of changed tiles is cropped
+with a margin and run through the detector at the full frame's scale, and the
+new boxes replace the cached ones in that area.
+"""
+from .lazy import lazy_import
+from .models import fit_scale, nms
+from .profiling import span
+
+cv2 = lazy_import('cv2')
+np = lazy_import('numpy')
+
+# Adjustable variables
+TILE_SIZE = 64  # Side of the tiles frames are compared in (pixels)
+REGION_MARGIN = 64  # Context added around changed tiles so icons crossing a tile edge are seen whole
+FULL_REDETECT_FRACTION = 0.3  # Run the whole frame once this share of tiles changed
+MAX_REGIONS = 4  # More separate changed areas than this also run the whole frame
+
+
+def changed_tiles(frame, previous, tile_size=TILE_SIZE):
+    # Boolean (rows, columns) mask of tiles where any pixel differs between the two frames
+    height, width = frame.shape[:2]
+    rows, columns = -(-height // tile_size), -(-width // tile_size)
+    changed = np.zeros((rows * tile_size, columns * tile_size), dtype=bool)
+    changed[:height, :width] = (frame != previous).reshape(height, width, -1).any(axis=2)
+    return changed.reshape(rows, tile_size, columns, tile_size).any(axis=(1, 3))
+
+
+class CachedDetector:
+
+    def __init__(self, tile_size=TILE_SIZE, margin=REGION_MARGIN):
+        self.tile_size = tile_size
+        self.margin = margin
+        self.reset()
+
+    def reset(self):
+        self._frame = None
+        self._detections = None
+        self._key = None
+        self.skipped = self.partial = self.full = 0
+
+    def detect(self, detector, frame, confidence_threshold):
+        # Return (detections, changed) where changed is False when the cached result was reused
+        key = (id(detector), confidence_threshold)
+        if key != self._key or self._frame is None or self._frame.shape != frame.shape:
+            return self._run_full(detector, frame, confidence_threshold, key), True
+
+        with span('change check'):
+            tiles = changed_tiles(frame, self._frame, self.tile_size)
+        if not tiles.any():
+            self.skipped += 1
+            return self._detections, False
+
+        count, _, stats, _ = cv2.connectedComponentsWithStats(tiles.astype(np.uint8), connectivity=8)
+        if tiles.mean() > FULL_REDETECT_FRACTION or count - 1 > MAX_REGIONS:
+            return self._run_full(detector, frame, confidence_threshold, key), True
+
+        self.partial += 1
+        height, width = frame.shape[:2]
+        scale = fit_scale(frame.shape, detector.size)
+        detections = self._detections
+        found = []
+        for tx, ty, tw, th, _ in stats[1:]:
+            # Changed area in pixels, then the crop around it
+            x1, y1 = tx * self.tile_size, ty * self.tile_size
+            x2, y2 = min((tx + tw) * self.tile_size, width), min((ty + th) * self.tile_size, height)
+            cx1, cy1 = max(x1 - self.margin, 0), max(y1 - self.margin, 0)
+            cx2, cy2 = min(x2 + self.margin, width), min(y2 + self.margin, height)
+
+            # Cached boxes touching the changed area are stale
+            stale = ((detections[:, 0] < x2) & (detections[:, 2] > x1) &
+                     (detections[:, 1] < y2) & (detections[:, 3] > y1))
+            detections = detections[~stale]
+
+            region = detector.detect(frame[cy1:cy2, cx1:cx2], confidence_threshold, scale=scale)
+            region[:, [0, 2]] += cx1
+            region[:, [1, 3]] += cy1
+            found.append(region)
+
+        # Boxes found again in the margins duplicate cached ones, so merge with NMS
+        merged = np.concatenate([detections] + found)
+        merged = merged[nms(merged[:, :4], merged[:, 4], merged[:, 5])]
+        self._store(frame, merged, key)
+        return merged, True
+
+    def _run_full(self, detector, frame, confidence_threshold, key):
+        self.full += 1
+        detections = detector.detect(frame, confidence_threshold)
+        self._store(frame, detections, key)
+        return detections
+
+    def _store(self, frame, detections, key):
+        self._frame = frame.copy()  # Callers draw on their frame afterwards
+        self._detections = detections.reshape(-1, 6)
+        self._key = key
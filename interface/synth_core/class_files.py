@@ -0,0 +1,41 @@
+"""Readers and writers for the per-folder label files."""
+import json
+import os
+
+CLASS_FILE_NAME = 'finalized_class.txt'
+# .txt files in a dataset folder that are not YOLO label files, e.g. split lists written by splits.py
+NON_LABEL_FILES = {CLASS_FILE_NAME, 'train.txt', 'val.txt', 'test.txt', 'classes.txt'}
+
+
+# Load JSON data, treating a missing, empty or corrupt file as no data
+def load_json_data(label_json):
+    if os.path.exists(label_json):
+        with open(label_json, 'r') as f:
+            try:
+                return json.load(f) if os.stat(label_json).st_size > 0 else {}
+            except json.JSONDecodeError:
+                print("Error: JSON file is corrupt or empty. Initializing as an empty dictionary.")
+                return {}
+    else:
+        return {}
+
+
+# Load finalized_class.txt as {class_id: class_name}, in file order
+def load_finalized_class_file(class_file_path):
+    class_mapping = {}
+    if os.path.exists(class_file_path):
+        with open(class_file_path, 'r') as f:
+            for line in f:
+                parts = line.strip().split(maxsplit=1)
+                if len(parts) == 2 and parts[0].isdigit():
+                    class_mapping[int(parts[0])] = parts[1]
+                elif line.strip():
+                    print(f"Skipping malformed line in class file: {line.strip()}")
+    return class_mapping
+
+
+# Save finalized_class.txt sorted by class id
+def save_finalized_class_file(class_file_path, class_mapping):
+    with open(class_file_path, 'w') as f:
+        for class_id, class_label in sorted(class_mapping.items()):
+            f.write(f"{class_id}    {class_label}\n")
@@ -0,0 +1,159 @@
+"""Compiled, versioned class table shared by generation, training and inference.
+
+finalized_class.txt maps icon ids to labels and is what ClassName1 edits. It is
+compiled once into a ClassRegistry: the unique labels numbered 0..N-1 in icon id
+order, plus the icon id -> class id table the generator labels with. The compiled
+table is saved as classes.json beside its source and copied into every synthetic
+run and trained model folder, so all tools read the same ids without reparsing
+or rewriting finalized_class.txt. The version is a hash of the table itself.
+"""
+import hashlib
+import json
+import os
+import shutil
+from threading import Lock
+from types import MappingProxyType
+
+from .class_files import CLASS_FILE_NAME, load_finalized_class_file
+
+REGISTRY_FILE_NAME = 'classes.json'
+
+_cache = {}  # Class file path -> (mtime_ns, size, registry)
+_cache_lock = Lock()
+
+
+class ClassRegistry:
+    # Immutable id <-> name table; class ids are positions in names
+
+    def __init__(self, names, icon_classes, source_hash=None):
+        self._names = tuple(names)
+        self._ids = MappingProxyType({name: class_id for class_id, name in enumerate(self._names)})
+        self._icon_classes = MappingProxyType({int(icon_id): int(class_id) for icon_id, class_id in icon_classes.items()})
+        self._mapping = MappingProxyType(dict(enumerate(self._names)))
+        self._source_hash = source_hash
+        content = json.dumps([self._names, sorted(self._icon_classes.items())])
+        self._version = hashlib.sha1(content.encode('utf-8')).hexdigest()[:12]
+
+    names = property(lambda self: self._names)
+    icon_classes = property(lambda self: self._icon_classes)
+    mapping = property(lambda self: self._mapping)  # {class_id: name}, for code that looks names up by id
+    source_hash = property(lambda self: self._source_hash)
+    version = property(lambda self: self._version)
+
+    def __len__(self):
+        return len(self._names)
+
+    def __eq__(self, other):
+        return isinstance(other, ClassRegistry) and self._version == other._version
+
+    def __hash__(self):
+        return hash(self._version)
+
+    def __repr__(self):
+        return f"ClassRegistry({len(self)} classes, version {self._version})"
+
+    def class_id(self, name):
+        return self._ids.get(name)
+
+    def class_for_icon(self, icon_id):
+        return self._icon_classes.get(icon_id)
+
+    def name(self, class_id, default="Unknown"):
+        return self._mapping.get(class_id, default)
+
+    def to_json(self):
+        return {'version': self._version, 'source_hash': self._source_hash, 'names': list(self._names),
+                'icon_classes': {str(icon_id): class_id for icon_id, class_id in sorted(self._icon_classes.items())}}
+
+    @classmethod
+    def from_json(cls, data):
+        return cls(data.get('names', []), {int(k): v for k, v in data.get('icon_classes', {}).items()},
+                   data.get('source_hash'))
+
+    def save(self, folder):
+        # Write to a temp file first so readers never see a half-written registry
+        path = os.path.join(folder, REGISTRY_FILE_NAME)
+        tmp_path = path + '.tmp'
+        with open(tmp_path, 'w') as f:
+            json.dump(self.to_json(), f, indent=2)
+        os.replace(tmp_path, path)
+        return path
+
+
+def compile_registry(class_mapping, source_hash=None):
+    # {icon_id: label} -> registry with the unique labels numbered in icon id order
+    names = list(dict.fromkeys(label for _, label in sorted(class_mapping.items())))
+    class_ids = {name: class_id for class_id, name in enumerate(names)}
+    icon_classes = {icon_id: class_ids[label] for icon_id, label in class_mapping.items()}
+    return ClassRegistry(names, icon_classes, source_hash)
+
+
+def _file_hash(path):
+    with open(path, 'rb') as f:
+        return hashlib.sha1(f.read()).hexdigest()
+
+
+def _read_saved(folder):
+    path = os.path.join(folder, REGISTRY_FILE_NAME)
+    if not os.path.exists(path):
+        return None
+    try:
+        with open(path, 'r') as f:
+            return ClassRegistry.from_json(json.load(f))
+    except (OSError, ValueError, TypeError, AttributeError) as e:
+        print(f"Ignoring unreadable {path}: {e}")
+        return None
+
+
+def load_registry(folder):
+    # Registry for an icon folder, synthetic run or weights folder; empty when it has no class files
+    folder = os.path.abspath(folder)
+    class_file = os.path.join(folder, CLASS_FILE_NAME)
+    try:
+        stat = os.stat(class_file)
+    except OSError:
+        # Runs and weights folders may only carry the compiled table
+        registry = _read_saved(folder)
+        return registry if registry is not None else ClassRegistry([], {})
+
+    with _cache_lock:
+        cached = _cache.get(class_file)
+        if cached is not None and cached[:2] == (stat.st_mtime_ns, stat.st_size):
+            return cached[2]
+
+    source_hash = _file_hash(class_file)
+    registry = _read_saved(folder)
+    if registry is None or registry.source_hash != source_hash:
+        registry = compile_registry(load_finalized_class_file(class_file), source_hash)
+        try:
+            registry.save(folder)
+        except OSError as e:
+            print(f"Could not save {REGISTRY_FILE_NAME} in {folder}: {e}")
+        print(f"Compiled {len(registry)} classes from {class_file} (version {registry.version})")
+
+    with _cache_lock:
+        _cache[class_file] = (stat.st_mtime_ns, stat.st_size, registry)
+    return registry
+
+
+def find_registry(directory, levels=3):
+    # First non-empty registry in a folder or one of its parents, e.g. a dataset's images/val
+    directory = os.path.abspath(directory)
+    for _ in range(levels):
+        registry = load_registry(directory)
+        if registry:
+            return registry
+        directory = os.path.dirname(directory)
+    return None
+
+
+def copy_registry(source_dir, target_dir):
+    # Carry the compiled table (and its source) along with generated images or trained weights
+    registry = load_registry(source_dir)
+    if not registry:
+        return registry
+    for file_name in (CLASS_FILE_NAME, REGISTRY_FILE_NAME):
+        source = os.path.join(source_dir, file_name)
+        if os.path.exists(source) and os.path.abspath(source_dir) != os.path.abspath(target_dir):
+            shutil.copy2(source, target_dir)
+    return registry
@@ -0,0 +1,173 @@
+"""Per-run dataset statistics kept in a stats.json next to the generated images.
+
+The generator updates the file as it writes images; runs without one (or with
+an unfinished one) are scanned once with a parallel label reader.
+"""
+import json
+import os
+from collections import Counter
+from concurrent.futures import ThreadPoolExecutor
+from threading import Lock
+
+from .class_files import NON_LABEL_FILES
+from .lazy import lazy_import
+
+np = lazy_import('numpy')
+
+STATS_FILE_NAME = 'stats.json'
+SIZE_BINS = [0, 16, 32, 64, 128, 256, 512]  # Lower edges of box size bins, sqrt(w * h) in pixels
+FLUSH_EVERY = 100  # Images between stats.json updates while generating
+SCAN_WORKERS = 8
+
+
+def read_label_file(path):
+    # YOLO label file as an (N, 5) array of class_id, x_center, y_center, width, height
+    with open(path, 'r') as f:
+        values = f.read().split()
+    if not values:
+        return np.empty((0, 5))
+    labels = np.array(values, dtype=np.float64)
+    return labels[:labels.size // 5 * 5].reshape(-1, 5)
+
+
+def label_files(run_dir):
+    return [os.path.join(run_dir, f) for f in os.listdir(run_dir) if f.endswith('.txt') and f not in NON_LABEL_FILES]
+
+
+class RunStats:
+
+    def __init__(self, image_size):
+        self.image_size = tuple(image_size)
+        self.images = 0
+        self.class_counts = Counter()
+        self.icons_per_image = Counter()
+        self.size_counts = [0] * len(SIZE_BINS)
+        self.complete = False
+        self._lock = Lock()
+
+    def add_images(self, label_arrays):
+        # Fold a batch of per-image label arrays into the totals in one vectorized pass
+        if not label_arrays:
+            return
+        per_image = np.array([len(labels) for labels in label_arrays])
+        labels = np.concatenate(label_arrays) if per_image.sum() else np.empty((0, 5))
+        class_ids = labels[:, 0].astype(np.int64)
+        box_sizes = np.sqrt(labels[:, 3] * self.image_size[0] * labels[:, 4] * self.image_size[1])
+        size_bins = np.searchsorted(SIZE_BINS, box_sizes, side='right') - 1
+
+        class_totals = np.bincount(class_ids) if len(class_ids) else np.empty(0, dtype=np.int64)
+        size_totals = np.bincount(np.clip(size_bins, 0, None), minlength=len(SIZE_BINS))
+        count_totals = np.bincount(per_image)
+        with self._lock:
+            self.images += len(label_arrays)
+            for class_id in np.flatnonzero(class_totals):
+                self.class_counts[int(class_id)] += int(class_totals[class_id])
+            for count in np.flatnonzero(count_totals):
+                self.icons_per_image[int(count)] += int(count_totals[count])
+            for size_bin, total in enumerate(size_totals):
+                self.size_counts[size_bin] += int(total)
+
+    def instances(self):
+        return sum(self.class_counts.values())
+
+    def to_dict(self):
+        with self._lock:
+            return {
+                'image_size': list(self.image_size),
+                'images': self.images,
+                'complete': self.complete,
+                'class_counts': {str(k): v for k, v in sorted(self.class_counts.items())},
+                'icons_per_image': {str(k): v for k, v in sorted(self.icons_per_image.items())},
+                'size_bins': SIZE_BINS,
+                'size_counts': list(self.size_counts),
+            }
+
+    @classmethod
+    def from_dict(cls, data):
+        stats = cls(data['image_size'])
+        stats.images = data['images']
+        stats.complete = data.get('complete', False)
+        stats.class_counts = Counter({int(k): v for k, v in data['class_counts'].items()})
+        stats.icons_per_image = Counter({int(k): v for k, v in data['icons_per_image'].items()})
+        stats.size_counts = list(data['size_counts'])
+        return stats
+
+    def save(self, run_dir):
+        tmp_path = os.path.join(run_dir, STATS_FILE_NAME + '.tmp')
+        with open(tmp_path, 'w') as f:
+            json.dump(self.to_dict(), f)
+        os.replace(tmp_path, os.path.join(run_dir, STATS_FILE_NAME))
+
+
+class RunStatsWriter:
+    # Used by the generator: collects labels per image and flushes stats.json every FLUSH_EVERY images
+
+    def __init__(self, run_dir, image_size):
+        self.run_dir = run_dir
+        self.stats = RunStats(image_size)
+        self._pending = []
+        self._lock = Lock()
+
+    def add_image(self, rows):
+        labels = np.array(rows, dtype=np.float64).reshape(-1, 5)
+        with self._lock:
+            self._pending.append(labels)
+            if len(self._pending) >= FLUSH_EVERY:
+                self._flush()
+
+    def close(self):
+        with self._lock:
+            self.stats.complete = True
+            self._flush()
+
+    def _flush(self):
+        self.stats.add_images(self._pending)
+        self._pending = []
+        self.stats.save(self.run_dir)
+
+
+def scan_run(run_dir, image_size, workers=SCAN_WORKERS):
+    # Build stats for a run from its label files using a pool of readers
+    stats = RunStats(image_size)
+    with ThreadPoolExecutor(max_workers=workers) as executor:
+        stats.add_images(list(executor.map(read_label_file, label_files(run_dir))))
+    stats.complete = True
+    return stats
+
+
+def load_run_stats(run_dir, image_size):
+    # Use stats.json when it is finished and matches the number of label files, otherwise rescan
+    stats_path = os.path.join(run_dir, STATS_FILE_NAME)
+    if os.path.exists(stats_path):
+        try:
+            with open(stats_path, 'r') as f:
+                stats = RunStats.from_dict(json.load(f))
+            if stats.complete and stats.images == len(label_files(run_dir)):
+                return stats
+        except (OSError, ValueError, KeyError):
+            pass
+    stats = scan_run(run_dir, image_size)
+    try:
+        stats.save(run_dir)
+    except OSError as e:
+        print(f"Could not save {stats_path}: {e}")
+    return stats
+
+
+def format_stats(stats, class_names):
+    # Short text summary for display
+    lines = [f"{stats.images} images, {stats.instances()} icons"]
+    if stats.images:
+        lines[0] += f" ({stats.instances() / stats.images:.1f} per image)"
+        per_image = ', '.join(f"{k}: {v}" for k, v in sorted(stats.icons_per_image.items()))
+        lines.append(f"Icons per image: {per_image}")
+
+    size_labels = [f"{low}-{high}px" for low, high in zip(SIZE_BINS, SIZE_BINS[1:])] + [f"{SIZE_BINS[-1]}px+"]
+    lines.append("Box sizes: " + ', '.join(f"{label}: {count}" for label, count in zip(size_labels, stats.size_counts) if count))
+
+    lines.append("Instances per class:")
+    total = stats.instances() or 1
+    for class_id, count in sorted(stats.class_counts.items(), key=lambda item: -item[1]):
+        name = class_names.get(class_id, f"class {class_id}")
+        lines.append(f"  {class_id:>3} {name}: {count} ({100 * count / total:.1f}%)")
+    return '\n'.join(lines)
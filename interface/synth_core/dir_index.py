@@ -0,0 +1,321 @@
+"""Live index of icon folders, generated runs and their images.
+
+The tree under 'icon_captures' looks like
+
+    icon_captures/<folder>/*.png
+    icon_captures/<folder>/synth_gens/<run>/*.png
+
+DirectoryIndex scans it once and then keeps it current from filesystem events:
+inotify on Linux, or polling of directory mtimes elsewhere and on network
+mounts, where only directories whose mtime changed are listed again.
+"""
+import ctypes
+import ctypes.util
+import os
+import select
+import struct
+import sys
+from threading import Lock, Thread, Event
+
+SYNTH_DIR_NAME = 'synth_gens'
+NETWORK_FILESYSTEMS = {'nfs', 'nfs4', 'cifs', 'smb3', 'smbfs', '9p', 'fuse.sshfs', 'afs', 'davfs', 'fuse.rclone'}
+
+# inotify constants from <sys/inotify.h>
+IN_MOVED_FROM = 0x00000040
+IN_MOVED_TO = 0x00000080
+IN_CREATE = 0x00000100
+IN_DELETE = 0x00000200
+IN_Q_OVERFLOW = 0x00004000
+IN_IGNORED = 0x00008000
+IN_ONLYDIR = 0x01000000
+IN_ISDIR = 0x40000000
+IN_CLOEXEC = 0o2000000
+WATCH_MASK = IN_CREATE | IN_DELETE | IN_MOVED_FROM | IN_MOVED_TO | IN_ONLYDIR
+EVENT_HEADER = struct.Struct('iIII')
+
+
+def _is_network_mount(path):
+    # Find the filesystem type of the longest mount point containing path
+    try:
+        with open('/proc/mounts', 'r') as f:
+            mounts = [line.split()[1:3] for line in f]
+    except OSError:
+        return False
+    path = os.path.realpath(path)
+    best, best_type = '', ''
+    for mount_point, fs_type in mounts:
+        mount_point = mount_point.replace('\\040', ' ')
+        if (path == mount_point or path.startswith(mount_point.rstrip('/') + '/')) and len(mount_point) > len(best):
+            best, best_type = mount_point, fs_type
+    return best_type in NETWORK_FILESYSTEMS
+
+
+def _load_inotify():
+    if not sys.platform.startswith('linux'):
+        return None
+    try:
+        libc = ctypes.CDLL(ctypes.util.find_library('c') or 'libc.so.6', use_errno=True)
+        libc.inotify_init1.argtypes = [ctypes.c_int]
+        libc.inotify_add_watch.argtypes = [ctypes.c_int, ctypes.c_char_p, ctypes.c_uint32]
+        libc.inotify_rm_watch.argtypes = [ctypes.c_int, ctypes.c_int]
+        return libc
+    except (OSError, AttributeError):
+        return None
+
+
+class DirectoryIndex:
+
+    def __init__(self, base_dir, backend='auto', poll_interval=2.0):
+        self.base_dir = base_dir
+        self.poll_interval = poll_interval
+        self.version = 0  # Bumped on every change so the UI can cheaply tell when to update
+        self._icons = {}  # folder -> set of icon file names
+        self._runs = {}  # folder -> {run: set of image file names}
+        self._lock = Lock()
+        self._stop = Event()
+        self._thread = None
+        self._mtimes = {}  # polling: directory parts -> mtime_ns
+        self._watches = {}  # inotify: watch descriptor -> directory parts
+        self._watch_ids = {}  # inotify: directory parts -> watch descriptor
+        self._inotify_fd = None
+        self._libc = None
+
+        if backend == 'auto':
+            backend = 'inotify' if _load_inotify() and not _is_network_mount(base_dir) else 'poll'
+        self.backend = backend
+
+    # Queries
+
+    def folders(self):
+        with self._lock:
+            return sorted(self._icons)
+
+    def icons(self, folder):
+        with self._lock:
+            return sorted(self._icons.get(folder, ()))
+
+    def icon_count(self, folder):
+        with self._lock:
+            return len(self._icons.get(folder, ()))
+
+    def runs(self, folder):
+        with self._lock:
+            return sorted(self._runs.get(folder, {}))
+
+    def images(self, folder, run):
+        with self._lock:
+            return sorted(self._runs.get(folder, {}).get(run, ()))
+
+    def image_count(self, folder, run):
+        with self._lock:
+            return len(self._runs.get(folder, {}).get(run, ()))
+
+    def totals(self):
+        # (icon folders, generated runs, generated images)
+        with self._lock:
+            runs = [images for folder_runs in self._runs.values() for images in folder_runs.values()]
+            return len(self._icons), len(runs), sum(len(images) for images in runs)
+
+    # Lifecycle
+
+    def start(self):
+        os.makedirs(self.base_dir, exist_ok=True)
+        if self.backend == 'inotify':
+            self._libc = _load_inotify()
+            fd = self._libc.inotify_init1(IN_CLOEXEC)
+            if fd < 0:
+                print(f"inotify unavailable ({os.strerror(ctypes.get_errno())}), falling back to polling")
+                self.backend = 'poll'
+            else:
+                self._inotify_fd = fd
+        self._rescan(())
+        target = self._run_inotify if self.backend == 'inotify' else self._run_polling
+        self._thread = Thread(target=target, daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        self._stop.set()
+        if self._thread:
+            self._thread.join(timeout=self.poll_interval + 1)
+        if self._inotify_fd is not None:
+            os.close(self._inotify_fd)
+            self._inotify_fd = None
+
+    # Scanning
+
+    def _path(self, parts):
+        return os.path.join(self.base_dir, *parts)
+
+    def _list(self, parts):
+        # (png file names, subdirectory names) of a directory, or None if it is gone
+        files, dirs = set(), set()
+        try:
+            with os.scandir(self._path(parts)) as entries:
+                for entry in entries:
+                    if entry.is_dir():
+                        dirs.add(entry.name)
+                    elif entry.name.endswith('.png'):
+                        files.add(entry.name)
+        except OSError:
+            return None
+        return files, dirs
+
+    def _rescan(self, parts):
+        # Re-list one directory, then scan any subdirectories that appeared
+        self._watch(parts)
+        listing = self._list(parts)
+        if listing is None:
+            self._forget(parts)
+            return
+        files, dirs = listing
+        new_dirs = []
+        with self._lock:
+            if len(parts) == 0:
+                for folder in set(self._icons) - dirs:
+                    self._drop(folder)
+                new_dirs = [(folder,) for folder in dirs - set(self._icons)]
+                for folder in dirs:
+                    self._icons.setdefault(folder, set())
+            elif len(parts) == 1:
+                folder = parts[0]
+                self._icons[folder] = files
+                if SYNTH_DIR_NAME in dirs and folder not in self._runs:
+                    self._runs[folder] = {}
+                    new_dirs = [(folder, SYNTH_DIR_NAME)]
+                elif SYNTH_DIR_NAME not in dirs:
+                    self._runs.pop(folder, None)
+            elif len(parts) == 2:
+                runs = self._runs.setdefault(parts[0], {})
+                for run in set(runs) - dirs:
+                    del runs[run]
+                new_dirs = [parts + (run,) for run in dirs - set(runs)]
+                for run in dirs:
+                    runs.setdefault(run, set())
+            elif len(parts) == 3:
+                self._runs.setdefault(parts[0], {})[parts[2]] = files
+            self.version += 1
+        for child in new_dirs:
+            self._rescan(child)
+
+    def _full_rescan(self):
+        # Forget everything and list every directory again, then drop watches on directories that are gone
+        with self._lock:
+            self._icons.clear()
+            self._runs.clear()
+            self.version += 1
+        self._rescan(())
+        with self._lock:
+            live = {()} | {(folder,) for folder in self._icons}
+            for folder, runs in self._runs.items():
+                live.add((folder, SYNTH_DIR_NAME))
+                live.update((folder, SYNTH_DIR_NAME, run) for run in runs)
+        for parts in [p for p in list(self._mtimes) + list(self._watch_ids) if p not in live]:
+            self._unwatch(parts)
+
+    def _drop(self, folder):
+        self._icons.pop(folder, None)
+        self._runs.pop(folder, None)
+
+    def _forget(self, parts):
+        # A directory disappeared: remove it and everything below it from the index
+        with self._lock:
+            if len(parts) == 1:
+                self._drop(parts[0])
+            elif len(parts) == 2:
+                self._runs.pop(parts[0], None)
+            elif len(parts) == 3:
+                self._runs.get(parts[0], {}).pop(parts[2], None)
+            self.version += 1
+        for known in [p for p in list(self._mtimes) + list(self._watch_ids) if p[:len(parts)] == parts]:
+            self._unwatch(known)
+
+    # Backends
+
+    def _watch(self, parts):
+        if self.backend == 'inotify':
+            if parts not in self._watch_ids:
+                wd = self._libc.inotify_add_watch(self._inotify_fd, os.fsencode(self._path(parts)), WATCH_MASK)
+                if wd >= 0:
+                    self._watches[wd] = parts
+                    self._watch_ids[parts] = wd
+        else:
+            try:
+                self._mtimes[parts] = os.stat(self._path(parts)).st_mtime_ns
+            except OSError:
+                self._mtimes.pop(parts, None)
+
+    def _unwatch(self, parts):
+        self._mtimes.pop(parts, None)
+        wd = self._watch_ids.pop(parts, None)
+        if wd is not None:
+            self._watches.pop(wd, None)
+            self._libc.inotify_rm_watch(self._inotify_fd, wd)
+
+    def _run_polling(self):
+        # Only directories whose mtime changed are listed again
+        while not self._stop.wait(self.poll_interval):
+            for parts, mtime in sorted(self._mtimes.items(), key=lambda item: len(item[0])):
+                if parts not in self._mtimes:
+                    continue  # Dropped while handling a parent directory
+                try:
+                    changed = os.stat(self._path(parts)).st_mtime_ns != mtime
+                except OSError:
+                    changed = True
+                if changed:
+                    self._rescan(parts)
+
+    def _run_inotify(self):
+        while not self._stop.is_set():
+            ready, _, _ = select.select([self._inotify_fd], [], [], 0.5)
+            if not ready:
+                continue
+            try:
+                data = os.read(self._inotify_fd, 64 * 1024)
+            except OSError:
+                break
+            offset = 0
+            while offset < len(data):
+                wd, mask, _, name_length = EVENT_HEADER.unpack_from(data, offset)
+                name = data[offset + EVENT_HEADER.size:offset + EVENT_HEADER.size + name_length].rstrip(b'\0')
+                offset += EVENT_HEADER.size + name_length
+                self._handle_event(wd, mask, os.fsdecode(name))
+
+    def _handle_event(self, wd, mask, name):
+        if mask & IN_Q_OVERFLOW:
+            self._full_rescan()  # Events were lost, so any known directory may be stale
+            return
+        if mask & IN_IGNORED:
+            parts = self._watches.pop(wd, None)
+            if parts is not None:
+                self._watch_ids.pop(parts, None)
+            return
+        parts = self._watches.get(wd)
+        if parts is None:
+            return
+        added = bool(mask & (IN_CREATE | IN_MOVED_TO))
+        child = parts + (name,)
+
+        if mask & IN_ISDIR:
+            is_tracked = (len(parts) == 0 or (len(parts) == 1 and name == SYNTH_DIR_NAME) or
+                          (len(parts) == 2 and parts[1] == SYNTH_DIR_NAME))
+            if not is_tracked:
+                return
+            if added:
+                self._rescan(child)
+            else:
+                self._forget(child)
+            return
+
+        if not name.endswith('.png') or len(parts) not in (1, 3):
+            return
+        # Single file created or removed: update the set without listing the directory
+        with self._lock:
+            if len(parts) == 1:
+                files = self._icons.setdefault(parts[0], set())
+            else:
+                files = self._runs.setdefault(parts[0], {}).setdefault(parts[2], set())
+            if added:
+                files.add(name)
+            else:
+                files.discard(name)
+            self.version += 1
@@ -0,0 +1,143 @@
+"""Compact icon descriptors and a per-folder nearest-neighbour index for label suggestions.
+
+The descriptor is a colour histogram plus a small grayscale layout image, each
+L2-normalized, which is cheap to compute on CPU and good enough to tell icons
+apart. Vectors are stored in '.thumbs/embeddings.npz' and only recomputed for
+files whose mtime or size changed.
+"""
+import os
+from collections import Counter
+from threading import Lock, Thread
+
+from .lazy import lazy_import
+from .thumbnails import CACHE_DIR_NAME
+
+np = lazy_import('numpy')
+Image = lazy_import('PIL.Image')
+
+EMBEDDINGS_FILE_NAME = 'embeddings.npz'
+COLOR_BINS = 4  # Per channel, so 4 * 4 * 4 colour histogram bins
+LAYOUT_SIZE = 16  # Side of the grayscale layout image
+SUGGEST_NEIGHBOURS = 5  # Labeled neighbours that vote on a suggestion
+
+
+def embed_icon(path):
+    # Colour histogram weighted by alpha, followed by a grayscale layout image
+    image = Image.open(path).convert('RGBA')
+    small = np.asarray(image.resize((LAYOUT_SIZE * 2, LAYOUT_SIZE * 2)), dtype=np.float32)
+    rgb, alpha = small[..., :3], small[..., 3] / 255.0
+
+    bins = (rgb * COLOR_BINS / 256).astype(np.int64)
+    flat = (bins[..., 0] * COLOR_BINS + bins[..., 1]) * COLOR_BINS + bins[..., 2]
+    color = np.bincount(flat.ravel(), weights=alpha.ravel(), minlength=COLOR_BINS ** 3)
+
+    # Composite over mid gray so transparent areas look the same for every icon
+    gray = (rgb @ np.array([0.299, 0.587, 0.114], dtype=np.float32)) * alpha + 128 * (1 - alpha)
+    layout = gray.reshape(LAYOUT_SIZE, 2, LAYOUT_SIZE, 2).mean(axis=(1, 3)).ravel()
+    layout = layout - layout.mean()
+
+    parts = [color, layout]
+    return np.concatenate([part / (np.linalg.norm(part) or 1.0) for part in parts]).astype(np.float32) / np.sqrt(2)
+
+
+class EmbeddingIndex:
+
+    def __init__(self, folder):
+        self.folder = folder
+        self.path = os.path.join(folder, CACHE_DIR_NAME, EMBEDDINGS_FILE_NAME)
+        self.names = []
+        self.vectors = None
+        self._positions = {}
+        self._lock = Lock()
+        self.ready = False
+
+    def build(self, filenames):
+        # Load stored vectors, embed new or changed files, and save the result
+        stored = {}
+        try:
+            with np.load(self.path) as data:
+                for name, key, vector in zip(data['names'], data['keys'], data['vectors']):
+                    stored[str(name)] = (tuple(key), vector)
+        except (OSError, KeyError, ValueError):
+            pass
+
+        names, keys, vectors = [], [], []
+        changed = set(stored) != set(filenames)
+        for filename in filenames:
+            path = os.path.join(self.folder, filename)
+            try:
+                stat = os.stat(path)
+            except OSError:
+                continue
+            key = (stat.st_mtime_ns, stat.st_size)
+            if filename in stored and stored[filename][0] == key:
+                vector = stored[filename][1]
+            else:
+                changed = True
+                try:
+                    vector = embed_icon(path)
+                except Exception as e:
+                    print(f"Error embedding {path}: {e}")
+                    continue
+            names.append(filename)
+            keys.append(key)
+            vectors.append(vector)
+
+        matrix = np.stack(vectors) if vectors else np.empty((0, COLOR_BINS ** 3 + LAYOUT_SIZE ** 2), dtype=np.float32)
+        with self._lock:
+            self.names = names
+            self.vectors = matrix
+            self._positions = {name: i for i, name in enumerate(names)}
+            self.ready = True
+
+        if changed:
+            try:
+                os.makedirs(os.path.dirname(self.path), exist_ok=True)
+                tmp_path = self.path + '.tmp.npz'
+                np.savez(tmp_path, names=np.array(names), keys=np.array(keys, dtype=np.int64).reshape(-1, 2),
+                         vectors=matrix)
+                os.replace(tmp_path, self.path)
+            except OSError as e:
+                print(f"Error saving embeddings to {self.path}: {e}")
+
+    def build_in_background(self, filenames):
+        thread = Thread(target=self.build, args=(list(filenames),), daemon=True)
+        thread.start()
+        return thread
+
+    def remove(self, filename):
+        with self._lock:
+            position = self._positions.pop(filename, None)
+            if position is not None:
+                # Keep the row but make it unreachable; the next build drops it
+                self.names[position] = None
+
+    def nearest(self, filename, candidates=None, k=10):
+        # Up to k (name, similarity) pairs closest to filename, optionally restricted to a set of names
+        with self._lock:
+            position = self._positions.get(filename)
+            if position is None or not self.ready:
+                return []
+            names, vectors = self.names, self.vectors
+        similarities = vectors @ vectors[position]
+        similarities[position] = -np.inf
+        mask = np.array([name is not None and (candidates is None or name in candidates) for name in names])
+        similarities[~mask] = -np.inf
+
+        k = min(k, int(mask.sum()))
+        if k <= 0:
+            return []
+        top = np.argpartition(-similarities, k - 1)[:k]
+        top = top[np.argsort(-similarities[top])]
+        return [(names[i], float(similarities[i])) for i in top]
+
+    def suggest(self, filename, labels, k=SUGGEST_NEIGHBOURS):
+        # Most likely label from the k nearest labeled icons, weighted by similarity
+        neighbours = self.nearest(filename, candidates=labels.keys(), k=k)
+        votes = Counter()
+        for name, similarity in neighbours:
+            votes[labels[name]] += max(similarity, 0.0)
+        if not votes:
+            return None, 0.0
+        label, weight = votes.most_common(1)[0]
+        return label, weight / (sum(votes.values()) or 1.0)
@@ -0,0 +1,221 @@
+"""Headless evaluation of a detector on a labeled image folder.
+
+Images are decoded by a thread pool a few batches ahead of inference, run
+through the detector in batches, and matched against their YOLO labels to
+give yolov5-style mAP@0.5 and mAP@0.5:0.95 plus per-class precision and recall.
+"""
+import os
+import time
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+from itertools import islice
+
+from .dataset_stats import read_label_file
+from .lazy import lazy_import
+from .models import fit_scale
+from .validation import label_path_for
+
+cv2 = lazy_import('cv2')
+np = lazy_import('numpy')
+
+# Adjustable variables
+EVAL_CONFIDENCE = 0.001  # Keep low-confidence boxes so the precision/recall curve is complete
+REPORT_CONFIDENCE = 0.25  # Per-class precision and recall are reported for boxes above this confidence
+EVAL_BATCH = 8
+LOADER_WORKERS = 4
+PREFETCH_BATCHES = 2  # Batches decoded ahead of the one being run through the model
+IOU_THRESHOLDS = tuple(0.5 + 0.05 * i for i in range(10))  # 0.5:0.95 in steps of 0.05
+IMAGE_EXTENSIONS = ('.png', '.jpg', '.jpeg')
+
+
+def split_list_pairs(list_path):
+    # (image, label) paths from a YOLOv5 split list such as the val.txt written by splits.py
+    base_dir = os.path.dirname(os.path.abspath(list_path))
+    pairs = []
+    with open(list_path, 'r') as f:
+        for line in f:
+            if line.strip():
+                image_path = os.path.normpath(os.path.join(base_dir, line.strip()))
+                pairs.append((image_path, label_path_for(image_path)))
+    return pairs
+
+
+def dataset_pairs(dataset_dir):
+    # (image, label) paths for a dataset's val.txt, an images/val folder, a dataset root holding one, or a flat folder
+    val_list = os.path.join(dataset_dir, 'val.txt')
+    if os.path.isfile(val_list):
+        return split_list_pairs(val_list)
+    if os.path.isdir(os.path.join(dataset_dir, 'images', 'val')):
+        dataset_dir = os.path.join(dataset_dir, 'images', 'val')
+    parent = os.path.dirname(os.path.abspath(dataset_dir))
+    if os.path.basename(parent) == 'images':
+        label_dir = os.path.join(os.path.dirname(parent), 'labels', os.path.basename(dataset_dir))
+    else:
+        label_dir = dataset_dir
+
+    pairs = []
+    for f in sorted(os.listdir(dataset_dir)):
+        if f.lower().endswith(IMAGE_EXTENSIONS):
+            pairs.append((os.path.join(dataset_dir, f), os.path.join(label_dir, os.path.splitext(f)[0] + '.txt')))
+    return pairs
+
+
+def load_sample(image_path, label_path):
+    image = cv2.imread(image_path)
+    labels = read_label_file(label_path) if os.path.exists(label_path) else np.empty((0, 5))
+    return image_path, image, labels
+
+
+def prefetch_batches(pairs, batch_size=EVAL_BATCH, workers=LOADER_WORKERS):
+    # Yield batches of (path, image, labels) while the next PREFETCH_BATCHES batches are being decoded
+    remaining = iter(pairs)
+    with ThreadPoolExecutor(max_workers=workers) as executor:
+        pending = deque()
+
+        def submit_batch():
+            chunk = list(islice(remaining, batch_size))
+            if chunk:
+                pending.append([executor.submit(load_sample, *pair) for pair in chunk])
+
+        for _ in range(PREFETCH_BATCHES + 1):
+            submit_batch()
+        while pending:
+            futures = pending.popleft()
+            submit_batch()
+            yield [future.result() for future in futures]
+
+
+def labels_to_boxes(labels, width, height):
+    # YOLO rows (class, cx, cy, w, h normalized) to class ids and pixel xyxy boxes
+    classes = labels[:, 0].astype(np.int64)
+    cx, cy = labels[:, 1] * width, labels[:, 2] * height
+    w, h = labels[:, 3] * width, labels[:, 4] * height
+    return classes, np.stack((cx - w / 2, cy - h / 2, cx + w / 2, cy + h / 2), axis=1)
+
+
+def box_iou(a, b):
+    # Pairwise IoU of two sets of xyxy boxes
+    x1 = np.maximum(a[:, None, 0], b[None, :, 0])
+    y1 = np.maximum(a[:, None, 1], b[None, :, 1])
+    x2 = np.minimum(a[:, None, 2], b[None, :, 2])
+    y2 = np.minimum(a[:, None, 3], b[None, :, 3])
+    inter = np.clip(x2 - x1, 0, None) * np.clip(y2 - y1, 0, None)
+    area_a = (a[:, 2] - a[:, 0]) * (a[:, 3] - a[:, 1])
+    area_b = (b[:, 2] - b[:, 0]) * (b[:, 3] - b[:, 1])
+    return inter / np.maximum(area_a[:, None] + area_b[None, :] - inter, 1e-9)
+
+
+def match_detections(detections, classes, boxes, iou_thresholds=IOU_THRESHOLDS):
+    # (detections, thresholds) bool array: whether each detection is a true positive at each IoU threshold
+    correct = np.zeros((len(detections), len(iou_thresholds)), dtype=bool)
+    if not len(detections) or not len(boxes):
+        return correct
+    iou = box_iou(boxes, detections[:, :4])
+    iou[classes[:, None] != detections[None, :, 5].astype(np.int64)] = 0
+    for t, threshold in enumerate(iou_thresholds):
+        label_index, detection_index = np.nonzero(iou >= threshold)
+        if not len(label_index):
+            continue
+        # Best IoU first, then each detection and each label used at most once
+        order = np.argsort(-iou[label_index, detection_index], kind='stable')
+        label_index, detection_index = label_index[order], detection_index[order]
+        _, first = np.unique(detection_index, return_index=True)
+        label_index, detection_index = label_index[first], detection_index[first]
+        _, first = np.unique(label_index, return_index=True)
+        correct[detection_index[first], t] = True
+    return correct
+
+
+def average_precision(recall, precision):
+    # Area under the monotone precision envelope sampled at 101 recall points, as yolov5's val.py computes it
+    recall = np.concatenate(([0.0], recall, [1.0]))
+    precision = np.concatenate(([1.0], precision, [0.0]))
+    precision = np.flip(np.maximum.accumulate(np.flip(precision)))
+    x = np.linspace(0, 1, 101)
+    integrate = getattr(np, 'trapezoid', None) or np.trapz  # trapz was renamed in NumPy 2
+    return float(integrate(np.interp(x, recall, precision), x))
+
+
+def ap_per_class(correct, confidences, predicted_classes, target_classes, report_confidence=REPORT_CONFIDENCE):
+    # Per-class AP at every IoU threshold plus precision/recall at report_confidence (IoU 0.5)
+    order = np.argsort(-confidences, kind='stable')
+    correct, confidences, predicted_classes = correct[order], confidences[order], predicted_classes[order]
+    results = {}
+    for class_id in np.unique(target_classes):
+        instances = int((target_classes == class_id).sum())
+        mask = predicted_classes == class_id
+        hits = correct[mask]
+        ap = np.zeros(correct.shape[1])
+        precision = recall = 0.0
+        if len(hits):
+            true_positives = np.cumsum(hits, axis=0)
+            false_positives = np.cumsum(~hits, axis=0)
+            recall_curve = true_positives / instances
+            precision_curve = true_positives / (true_positives + false_positives)
+            ap = np.array([average_precision(recall_curve[:, t], precision_curve[:, t]) for t in range(correct.shape[1])])
+            reported = int((confidences[mask] >= report_confidence).sum())
+            if reported:
+                precision = float(precision_curve[reported - 1, 0])
+                recall = float(recall_curve[reported - 1, 0])
+        results[int(class_id)] = {'instances': instances, 'precision': precision, 'recall': recall,
+                                  'ap50': float(ap[0]), 'ap': float(ap.mean())}
+    return results
+
+
+def evaluate(detector, dataset_dir, batch_size=EVAL_BATCH, workers=LOADER_WORKERS,
+             confidence_threshold=EVAL_CONFIDENCE, report_confidence=REPORT_CONFIDENCE):
+    pairs = dataset_pairs(dataset_dir)
+    if not pairs:
+        raise ValueError(f"No images found in {dataset_dir}")
+
+    correct, confidences, predicted, targets = [], [], [], []
+    images = 0
+    start = time.perf_counter()
+    for batch in prefetch_batches(pairs, batch_size, workers):
+        samples = []
+        for path, image, labels in batch:
+            if image is None:
+                print(f"Skipping unreadable image {path}")
+            else:
+                samples.append((image, labels))
+
+        # detect_batch needs equally sized images; generated desktops all share one size
+        by_shape = {}
+        for image, labels in samples:
+            by_shape.setdefault(image.shape, []).append((image, labels))
+        for shape, group in by_shape.items():
+            scale = fit_scale(shape, detector.size)
+            all_detections = detector.detect_batch([image for image, _ in group], confidence_threshold, scale=scale)
+            for (image, labels), detections in zip(group, all_detections):
+                classes, boxes = labels_to_boxes(labels, shape[1], shape[0])
+                correct.append(match_detections(detections, classes, boxes))
+                confidences.append(detections[:, 4])
+                predicted.append(detections[:, 5].astype(np.int64))
+                targets.append(classes)
+                images += 1
+    seconds = time.perf_counter() - start
+    if images == 0:
+        raise ValueError(f"None of the {len(pairs)} images listed for {dataset_dir} could be read")
+
+    per_class = ap_per_class(np.concatenate(correct), np.concatenate(confidences), np.concatenate(predicted),
+                             np.concatenate(targets), report_confidence)
+    return {
+        'images': images,
+        'seconds': seconds,
+        'images_per_second': images / seconds if seconds else 0.0,
+        'map50': float(np.mean([c['ap50'] for c in per_class.values()])) if per_class else 0.0,
+        'map': float(np.mean([c['ap'] for c in per_class.values()])) if per_class else 0.0,
+        'classes': per_class,
+    }
+
+
+def format_evaluation(result, class_names):
+    # Text table in the same spirit as yolov5's val.py output
+    lines = [f"{result['images']} images in {result['seconds']:.1f}s ({result['images_per_second']:.1f} images/s)",
+             f"mAP@0.5: {result['map50']:.3f}  mAP@0.5:0.95: {result['map']:.3f}",
+             f"{'class':>24} {'instances':>9} {'P':>6} {'R':>6} {'AP50':>6} {'AP':>6}"]
+    for class_id, c in sorted(result['classes'].items()):
+        name = class_names.get(class_id, f"class {class_id}")
+        lines.append(f"{name[:24]:>24} {c['instances']:>9} {c['precision']:>6.3f} {c['recall']:>6.3f} "
+                     f"{c['ap50']:>6.3f} {c['ap']:>6.3f}")
+    return '\n'.join(lines)
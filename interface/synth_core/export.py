@@ -0,0 +1,72 @@
+"""Exporting trained weights to ONNX for CPU inference, with optional int8 quantization.
+
+The ONNX file is written next to the weights (normally in best_weights), so
+model-test finds finalized_class.txt beside it like it does for best.pt.
+"""
+import os
+import subprocess
+import sys
+
+from .lazy import lazy_import
+from .models import MODEL_SIZE, images_to_batch, letterbox
+from .paths import YOLO_DIR
+
+cv2 = lazy_import('cv2')
+onnxruntime = lazy_import('onnxruntime')
+quantization = lazy_import('onnxruntime.quantization')
+
+# Adjustable variables
+CALIBRATION_IMAGES = 100  # Validation images used to calibrate int8 activation ranges
+
+
+def export_onnx(weights_path, image_size=MODEL_SIZE, yolo_dir=YOLO_DIR, dynamic=True):
+    # Run yolov5's own export.py; a dynamic batch axis lets tiled inference batch tiles
+    export_script = os.path.join(yolo_dir, 'export.py')
+    if not os.path.isfile(export_script):
+        raise FileNotFoundError(f"No yolov5 checkout found at {yolo_dir}; clone it there or set YOLOV5_DIR")
+    command = [sys.executable, export_script, '--weights', os.path.abspath(weights_path), '--include', 'onnx',
+               '--imgsz', str(image_size), '--device', 'cpu']
+    if dynamic:
+        command.append('--dynamic')
+    print(f"Running export command: {' '.join(command)}")
+    subprocess.run(command, cwd=yolo_dir, check=True)
+
+    onnx_path = os.path.splitext(weights_path)[0] + '.onnx'
+    if not os.path.exists(onnx_path):
+        raise FileNotFoundError(f"Export finished but {onnx_path} was not written")
+    return onnx_path
+
+
+def calibration_images(folder, count=CALIBRATION_IMAGES):
+    # A fixed slice of the folder's images, so repeated exports calibrate on the same data
+    names = sorted(f for f in os.listdir(folder) if f.lower().endswith(('.png', '.jpg', '.jpeg')))
+    return [os.path.join(folder, f) for f in names[:count]]
+
+
+def quantize_onnx(onnx_path, calibration_dir, count=CALIBRATION_IMAGES, image_size=MODEL_SIZE):
+    # Static int8 quantization calibrated on synthetic validation images; writes <name>.int8.onnx
+    paths = calibration_images(calibration_dir, count)
+    if not paths:
+        raise ValueError(f"No calibration images found in {calibration_dir}")
+    input_name = onnxruntime.InferenceSession(onnx_path, providers=['CPUExecutionProvider']).get_inputs()[0].name
+
+    class FolderReader(quantization.CalibrationDataReader):
+        def __init__(self):
+            self._paths = iter(paths)
+
+        def get_next(self):
+            for path in self._paths:
+                image = cv2.imread(path)
+                if image is None:
+                    print(f"Skipping unreadable calibration image {path}")
+                    continue
+                boxed, _, _ = letterbox(image, (image_size, image_size))
+                return {input_name: images_to_batch([boxed])}
+            return None
+
+    output_path = os.path.splitext(onnx_path)[0] + '.int8.onnx'
+    quantization.quantize_static(onnx_path, output_path, FolderReader(), quant_format=quantization.QuantFormat.QDQ,
+                                 activation_type=quantization.QuantType.QUInt8,
+                                 weight_type=quantization.QuantType.QInt8)
+    print(f"Quantized model saved to {output_path} (calibrated on {len(paths)} images)")
+    return output_path
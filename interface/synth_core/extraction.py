@@ -0,0 +1,170 @@
+"""Finding icons in a screenshot and saving them as individual PNGs."""
+import os
+from concurrent.futures import ThreadPoolExecutor
+
+from .capture import default_capture
+from .lazy import lazy_import
+
+cv2 = lazy_import('cv2')
+np = lazy_import('numpy')
+
+# Adjustable variables
+MIN_ICON_SIZE = 20  # Boxes must be wider and taller than this (pixels)
+MAX_ASPECT_RATIO = 4.0  # Drop long thin boxes such as separators and text lines
+MERGE_OVERLAP = 0.3  # Merge boxes whose overlap covers this fraction of the smaller box
+PNG_COMPRESSION = 1  # 0-9, lower writes faster but produces bigger files
+WRITER_THREADS = 4  # Background threads used to save icons
+
+
+def capture_frame():
+    # Capture the main monitor straight into a BGR array with the backend chosen by SYNTH_CAPTURE
+    try:
+        return default_capture().grab()
+    except Exception as e:
+        print(f"Error capturing screenshot: {e}")
+        return None
+
+
+def contour_bounding_boxes(contours):
+    # Compute (x, y, w, h) for every contour at once instead of calling cv2.boundingRect per contour
+    if len(contours) == 0:
+        return np.empty((0, 4), dtype=np.int64)
+    points = np.concatenate(contours).reshape(-1, 2).astype(np.int64)
+    lengths = np.fromiter((len(c) for c in contours), dtype=np.int64, count=len(contours))
+    starts = np.concatenate(([0], np.cumsum(lengths)[:-1]))
+    mins = np.minimum.reduceat(points, starts, axis=0)
+    maxs = np.maximum.reduceat(points, starts, axis=0)
+    return np.hstack((mins, maxs - mins + 1))
+
+
+def filter_boxes(boxes, min_size=MIN_ICON_SIZE, max_aspect=MAX_ASPECT_RATIO):
+    # Filter out boxes that are too small or too elongated to be icons
+    w, h = boxes[:, 2], boxes[:, 3]
+    keep = (w > min_size) & (h > min_size) & (np.maximum(w, h) <= max_aspect * np.minimum(w, h))
+    return boxes[keep]
+
+
+def overlapping_pairs(x1, y1, x2, y2, overlap=MERGE_OVERLAP):
+    # (i, j) index arrays of box pairs that overlap enough to merge, via a sweep over boxes sorted by x1
+    order = np.argsort(x1, kind='stable')
+    sx1 = x1[order]
+    # Boxes starting before box k ends are its only candidates, so memory grows with pairs rather than n * n
+    ends = np.searchsorted(sx1, x2[order], side='left')
+    counts = np.maximum(ends - np.arange(len(order)) - 1, 0)
+    first = np.repeat(np.arange(len(order)), counts)
+    offsets = np.arange(counts.sum()) - np.repeat(np.cumsum(counts) - counts, counts)
+    i, j = order[first], order[first + 1 + offsets]
+
+    inter_w = np.minimum(x2[i], x2[j]) - np.maximum(x1[i], x1[j])
+    inter_h = np.minimum(y2[i], y2[j]) - np.maximum(y1[i], y1[j])
+    inter = np.clip(inter_w, 0, None) * np.clip(inter_h, 0, None)
+    area = (x2 - x1) * (y2 - y1)
+    linked = (inter > 0) & (inter >= overlap * np.minimum(area[i], area[j]))
+    return i[linked], j[linked]
+
+
+def connected_groups(count, i, j):
+    # Union-find over the pair list: each box gets the smallest index in its group, then groups are numbered 0..k-1
+    labels = np.arange(count)
+    while True:
+        low = np.minimum(labels[i], labels[j])
+        new_labels = labels.copy()
+        np.minimum.at(new_labels, i, low)
+        np.minimum.at(new_labels, j, low)
+        new_labels = new_labels[new_labels]  # Path halving
+        if np.array_equal(new_labels, labels):
+            break
+        labels = new_labels
+    return np.unique(labels, return_inverse=True)[1]
+
+
+def merge_boxes(boxes, overlap=MERGE_OVERLAP):
+    # Merge overlapping and nested boxes into their union until no pair overlaps enough
+    x1, y1 = boxes[:, 0], boxes[:, 1]
+    x2, y2 = x1 + boxes[:, 2], y1 + boxes[:, 3]
+    while len(x1) > 1:
+        count = len(x1)
+        i, j = overlapping_pairs(x1, y1, x2, y2, overlap)
+        if len(i) == 0:
+            break
+        groups = connected_groups(count, i, j)
+        merged = groups.max() + 1
+        if merged == count:
+            break
+
+        # Replace each group with the union of its boxes
+        nx1, ny1 = np.full(merged, np.iinfo(np.int64).max), np.full(merged, np.iinfo(np.int64).max)
+        nx2, ny2 = np.zeros(merged, dtype=np.int64), np.zeros(merged, dtype=np.int64)
+        np.minimum.at(nx1, groups, x1)
+        np.minimum.at(ny1, groups, y1)
+        np.maximum.at(nx2, groups, x2)
+        np.maximum.at(ny2, groups, y2)
+        x1, y1, x2, y2 = nx1, ny1, nx2, ny2
+
+    merged_boxes = np.stack((x1, y1, x2 - x1, y2 - y1), axis=1)
+    # Sort top-to-bottom, then left-to-right so icon numbering follows the screen layout
+    return merged_boxes[np.lexsort((merged_boxes[:, 0], merged_boxes[:, 1]))]
+
+
+def write_icon(icon, icon_filename, compression):
+    # Add an opaque alpha channel and save the icon as PNG
+    if not cv2.imwrite(icon_filename, cv2.cvtColor(icon, cv2.COLOR_BGR2BGRA), [cv2.IMWRITE_PNG_COMPRESSION, compression]):
+        raise IOError(f"Could not write {icon_filename}")
+
+
+def extract_icons(image, output_dir, compression=PNG_COMPRESSION, writer_threads=WRITER_THREADS):
+    try:
+        # Accept either a BGR array from capture_frame() or a path to an image on disk
+        if isinstance(image, np.ndarray):
+            img = image
+        else:
+            img = cv2.imread(image)
+
+        if img is None:
+            print(f"Error: Could not load image from {image}")
+            return
+
+        # Convert to grayscale
+        gray = cv2.cvtColor(img, cv2.COLOR_BGR2GRAY)
+
+        # Use edge detection to find icons
+        edges = cv2.Canny(gray, threshold1=30, threshold2=100)
+
+        # Find contours (this will identify potential icon boundaries)
+        contours, _ = cv2.findContours(edges, cv2.RETR_EXTERNAL, cv2.CHAIN_APPROX_SIMPLE)
+
+        # Turn contours into boxes, drop small ones and merge fragments of the same icon
+        boxes = merge_boxes(filter_boxes(contour_bounding_boxes(contours)))
+        # Merged boxes can come out elongated, so check the aspect ratio again
+        boxes = filter_boxes(boxes)
+
+        # Create output directory if it doesn't exist
+        os.makedirs(output_dir, exist_ok=True)
+
+        # Path for the finalized_class.txt file
+        class_file_path = os.path.join(output_dir, 'finalized_class.txt')
+        with open(class_file_path, 'w') as class_file, ThreadPoolExecutor(max_workers=writer_threads) as executor:
+            icon_count = 0
+            writes = []
+            for x, y, w, h in boxes:
+                # Extract the icon using the bounding box (a view, nothing is copied until it is written)
+                icon = img[y:y + h, x:x + w]
+
+                # Save the icon as PNG on a background thread
+                icon_filename = os.path.join(output_dir, f"icon_{icon_count}.png")
+                writes.append(executor.submit(write_icon, icon, icon_filename, compression))
+
+                # Write the icon's index and "un-labeled" to the finalized_class.txt file
+                class_file.write(f"{icon_count}    un-labeled\n")
+
+                icon_count += 1
+
+            # Surface any write errors before reporting success
+            for write in writes:
+                write.result()
+
+        print(f"Extracted {icon_count} icons and saved to {output_dir}")
+        print(f"Class file saved to: {class_file_path}")
+
+    except Exception as e:
+        print(f"Error extracting icons: {e}")
@@ -0,0 +1,164 @@
+"""Composing synthetic desktops with YOLO annotations from labeled icons."""
+import os
+import random
+from concurrent.futures import ThreadPoolExecutor
+from threading import Lock
+
+from .class_registry import copy_registry
+from .dataset_stats import RunStatsWriter
+from .lazy import lazy_import
+from .paths import get_next_synth_directory
+
+cv2 = lazy_import('cv2')
+np = lazy_import('numpy')
+Image = lazy_import('PIL.Image')
+
+# Adjustable variables
+DESKTOP_SIZE = (1920, 1080)  # Size of the synthetic desktop
+progress_lock = Lock()  # Lock for thread-safe progress updates
+
+
+def remove_background(icon_path):
+    # Load the icon using OpenCV
+    icon = cv2.imread(icon_path, cv2.IMREAD_UNCHANGED)
+
+    # Convert to RGBA if not already
+    if icon.shape[2] == 3:
+        icon = cv2.cvtColor(icon, cv2.COLOR_BGR2BGRA)
+
+    # Convert icon to grayscale
+    gray = cv2.cvtColor(icon, cv2.COLOR_BGR2GRAY)
+
+    # Use thresholding to create a mask for the background
+    _, mask = cv2.threshold(gray, 250, 255, cv2.THRESH_BINARY_INV)
+
+    # Find contours to detect the icon shape
+    contours, _ = cv2.findContours(mask, cv2.RETR_EXTERNAL, cv2.CHAIN_APPROX_SIMPLE)
+    if contours:
+        # Create a new mask with the largest contour (assumed to be the icon)
+        mask = np.zeros_like(gray)
+        cv2.drawContours(mask, contours, -1, (255), thickness=cv2.FILLED)
+
+        # Apply the mask to the icon
+        icon[:, :, 3] = mask  # Set the alpha channel based on the mask
+
+    # Convert the icon back to PIL for easier handling later
+    icon_pil = Image.fromarray(cv2.cvtColor(icon, cv2.COLOR_BGRA2RGBA))
+    return icon_pil
+
+
+def generate_single_desktop(index, output_dir, icon_paths, registry, background_paths, desktop_size,
+                            use_background, progress_var, total_images, stats_writer=None):
+    # Select a background or use a white background
+    if use_background and background_paths:
+        background_path = random.choice(background_paths)
+        background = Image.open(background_path).convert('RGBA')
+    else:
+        background = Image.new('RGBA', desktop_size, (255, 255, 255, 255))  # White background
+
+    background = background.resize(desktop_size)
+    annotations = []
+    label_rows = []
+
+    # Determine the number of icons to place
+    num_icons = random.randint(5, 15)  # Adjust range as needed
+
+    for j in range(num_icons):
+        # Select a random icon and remove its background
+        icon_path = random.choice(icon_paths)
+        icon_name = os.path.basename(icon_path).replace('.png', '')
+
+        # Extract the numeric part from the icon name (e.g., 'icon_5' -> 5)
+        try:
+            icon_id = int(icon_name.split('_')[1])
+        except (IndexError, ValueError):
+            print(f"Error parsing icon ID from {icon_name}. Skipping this icon.")
+            continue
+
+        # Look up the icon's class in the compiled registry
+        class_id = registry.class_for_icon(icon_id)
+        if class_id is None:
+            print(f"Warning: Icon ID '{icon_id}' not found in finalized_class.txt. Skipping.")
+            continue
+
+        icon = remove_background(icon_path)
+
+        # Randomly resize the icon
+        resize_factor = random.uniform(0.5, 1.5)
+        icon = icon.resize((int(icon.width * resize_factor), int(icon.height * resize_factor)))
+
+        # Check if the icon fits within the desktop size
+        if icon.width > desktop_size[0] or icon.height > desktop_size[1]:
+            continue  # Skip icons that are too large
+
+        # Randomly place the icon on the desktop
+        max_x = desktop_size[0] - icon.width
+        max_y = desktop_size[1] - icon.height
+
+        if max_x <= 0 or max_y <= 0:
+            continue  # Skip this icon placement if it can't fit
+
+        x = random.randint(0, max_x)
+        y = random.randint(0, max_y)
+
+        # Paste the icon onto the desktop
+        background.paste(icon, (x, y), icon)
+
+        # Calculate bounding box in YOLO format
+        x_center = (x + icon.width / 2) / desktop_size[0]
+        y_center = (y + icon.height / 2) / desktop_size[1]
+        width = icon.width / desktop_size[0]
+        height = icon.height / desktop_size[1]
+
+        # Use the assigned class ID
+        annotations.append(f"{class_id} {x_center} {y_center} {width} {height}")
+        label_rows.append((class_id, x_center, y_center, width, height))
+
+    # Save the synthetic desktop image
+    desktop_filename = os.path.join(output_dir, f"synthetic_desktop_{index}.png")
+    background.convert('RGB').save(desktop_filename)
+
+    # Save the annotation file
+    annotation_filename = os.path.join(output_dir, f"synthetic_desktop_{index}.txt")
+    with open(annotation_filename, 'w') as f:
+        f.write('\n'.join(annotations))
+
+    # Keep the run's stats.json up to date
+    if stats_writer is not None:
+        stats_writer.add_image(label_rows)
+
+    print(f"Generated synthetic desktop {index}")
+
+    # Update progress bar
+    with progress_lock:
+        progress_var.set(progress_var.get() + (100 / total_images))
+
+
+def copy_class_files(icon_dir, output_dir):
+    # Copy finalized_class.txt and the compiled classes.json, so training uses the ids the labels were written with
+    registry = copy_registry(icon_dir, output_dir)
+    if registry:
+        print(f"Copied {len(registry)} classes (version {registry.version}) to: {output_dir}")
+    else:
+        print("Finalized class file not found. Make sure 'finalized_class.txt' exists in the icon directory.")
+    return registry
+
+
+def generate_synthetic_desktops(icon_dir, background_dir, num_images, num_threads, desktop_size, use_background,
+                                progress_var):
+    output_dir = get_next_synth_directory(icon_dir)
+
+    # Copy the class files to the output directory
+    registry = copy_class_files(icon_dir, output_dir)
+
+    icon_paths = [os.path.join(icon_dir, icon) for icon in os.listdir(icon_dir) if icon.endswith('.png')]
+
+    background_paths = [os.path.join(background_dir, bg) for bg in os.listdir(background_dir) if
+                        bg.endswith(('.png', '.jpg', '.jpeg'))]
+
+    stats_writer = RunStatsWriter(output_dir, desktop_size)
+    with ThreadPoolExecutor(max_workers=num_threads) as executor:
+        for i in range(num_images):
+            executor.submit(generate_single_desktop, i, output_dir, icon_paths, registry, background_paths,
+                            desktop_size, use_background, progress_var, num_images, stats_writer)
+    stats_writer.close()
@@ -0,0 +1,174 @@
+"""Scrollable icon grid that only materializes the rows currently in view."""
+import tkinter as tk
+from tkinter import ttk
+
+from .lazy import lazy_import
+
+Image = lazy_import('PIL.Image')
+ImageTk = lazy_import('PIL.ImageTk')
+
+
+class _Cell:
+    # One recycled grid cell: a border rectangle and an image item backed by a fixed-size PhotoImage
+
+    def __init__(self, canvas, thumb_size):
+        self.photo = ImageTk.PhotoImage('RGBA', (thumb_size, thumb_size))
+        self.border = canvas.create_rectangle(0, 0, 0, 0, outline='black', width=2, state='hidden')
+        self.image = canvas.create_image(0, 0, anchor='nw', image=self.photo, state='hidden')
+
+
+class VirtualIconGrid(tk.Frame):
+    # Canvas based grid; cells outside the visible rows plus a small overscan are recycled
+
+    def __init__(self, master, columns=6, thumb_size=50, padding=4, overscan=2, on_click=None, **canvas_options):
+        super().__init__(master)
+        self.columns = columns
+        self.thumb_size = thumb_size
+        self.cell_size = thumb_size + padding
+        self.padding = padding
+        self.overscan = overscan
+        self.on_click = on_click
+        self.items = []
+        self.thumbnail = None
+        self.selected = None
+        self._visible = {}  # item index -> _Cell
+        self._free = []
+        self._render_pending = False
+
+        self.canvas = tk.Canvas(self, width=columns * self.cell_size, highlightthickness=0, **canvas_options)
+        self.scrollbar = ttk.Scrollbar(self, orient='vertical', command=self.canvas.yview)
+        self.canvas.configure(yscrollcommand=self._on_scroll)
+        self.canvas.pack(side=tk.LEFT, fill='both', expand=True)
+        self.scrollbar.pack(side=tk.RIGHT, fill='y')
+
+        self.canvas.bind('<Configure>', lambda e: self._schedule_render())
+        self.canvas.bind('<Button-1>', self._on_click)
+        self.canvas.bind('<MouseWheel>', lambda e: self._scroll_units(-1 if e.delta > 0 else 1))
+        self.canvas.bind('<Button-4>', lambda e: self._scroll_units(-1))
+        self.canvas.bind('<Button-5>', lambda e: self._scroll_units(1))
+
+    def set_items(self, items, thumbnail):
+        # Show a new list of items; thumbnail(item) returns a PIL image or None
+        self.items = list(items)
+        self.thumbnail = thumbnail
+        self.selected = None
+        self._release_all()
+        self._update_scrollregion()
+        self.canvas.yview_moveto(0)
+        self._schedule_render()
+
+    def clear(self):
+        self.set_items([], None)
+
+    def remove(self, index):
+        # Drop one item; only the visible cells at or after it are redrawn
+        if not 0 <= index < len(self.items):
+            return
+        del self.items[index]
+        for shifted in [i for i in self._visible if i >= index]:
+            self._release(shifted)
+        self._update_scrollregion()
+        self._schedule_render()
+
+    def refresh_item(self, index):
+        # Redraw a single cell, e.g. after its image changed on disk
+        if index in self._visible:
+            self._fill(self._visible[index], index)
+
+    def select(self, index):
+        previous, self.selected = self.selected, index
+        for i in (previous, index):
+            if i in self._visible:
+                self._style(self._visible[i], i)
+        self.see(index)
+
+    def see(self, index):
+        # Scroll just enough to bring an item's row into view
+        total_height = self._total_rows() * self.cell_size
+        if index is None or not 0 <= index < len(self.items) or total_height == 0:
+            return
+        row_top = (index // self.columns) * self.cell_size
+        view_top = self.canvas.canvasy(0)
+        view_height = self.canvas.winfo_height()
+        if row_top < view_top:
+            self.canvas.yview_moveto(row_top / total_height)
+        elif row_top + self.cell_size > view_top + view_height:
+            self.canvas.yview_moveto(max(0, row_top + self.cell_size - view_height) / total_height)
+
+    def _total_rows(self):
+        return -(-len(self.items) // self.columns)
+
+    def _update_scrollregion(self):
+        self.canvas.configure(scrollregion=(0, 0, self.columns * self.cell_size, self._total_rows() * self.cell_size))
+
+    def _on_scroll(self, first, last):
+        self.scrollbar.set(first, last)
+        self._schedule_render()
+
+    def _scroll_units(self, units):
+        self.canvas.yview_scroll(units, 'units')
+
+    def _schedule_render(self):
+        # Coalesce bursts of scroll and resize events into one render
+        if not self._render_pending:
+            self._render_pending = True
+            self.after_idle(self._render)
+
+    def _render(self):
+        self._render_pending = False
+        if not self.items:
+            self._release_all()
+            return
+        top = self.canvas.canvasy(0)
+        height = max(self.canvas.winfo_height(), self.cell_size)
+        first_row = max(0, int(top // self.cell_size) - self.overscan)
+        last_row = min(self._total_rows() - 1, int((top + height) // self.cell_size) + self.overscan)
+        wanted = range(first_row * self.columns, min(len(self.items), (last_row + 1) * self.columns))
+
+        for index in [i for i in self._visible if i not in wanted]:
+            self._release(index)
+        for index in wanted:
+            if index not in self._visible:
+                cell = self._free.pop() if self._free else _Cell(self.canvas, self.thumb_size)
+                self._visible[index] = cell
+                self._fill(cell, index)
+
+    def _fill(self, cell, index):
+        # Center the thumbnail in a transparent square so the pooled PhotoImage keeps its size
+        square = Image.new('RGBA', (self.thumb_size, self.thumb_size), (0, 0, 0, 0))
+        image = self.thumbnail(self.items[index]) if self.thumbnail else None
+        if image is not None:
+            image = image.convert('RGBA')
+            square.paste(image, ((self.thumb_size - image.width) // 2, (self.thumb_size - image.height) // 2))
+        cell.photo.paste(square)
+
+        row, col = divmod(index, self.columns)
+        x, y = col * self.cell_size, row * self.cell_size
+        half = self.padding // 2
+        self.canvas.coords(cell.border, x + 1, y + 1, x + self.cell_size - 1, y + self.cell_size - 1)
+        self.canvas.coords(cell.image, x + half, y + half)
+        self.canvas.itemconfigure(cell.border, state='normal')
+        self.canvas.itemconfigure(cell.image, state='normal')
+        self._style(cell, index)
+
+    def _style(self, cell, index):
+        self.canvas.itemconfigure(cell.border, outline='red' if index == self.selected else 'black')
+
+    def _release(self, index):
+        cell = self._visible.pop(index)
+        self.canvas.itemconfigure(cell.border, state='hidden')
+        self.canvas.itemconfigure(cell.image, state='hidden')
+        self._free.append(cell)
+
+    def _release_all(self):
+        for index in list(self._visible):
+            self._release(index)
+
+    def _on_click(self, event):
+        if self.on_click is None:
+            return
+        col = int(self.canvas.canvasx(event.x) // self.cell_size)
+        row = int(self.canvas.canvasy(event.y) // self.cell_size)
+        index = row * self.columns + col
+        if 0 <= col < self.columns and 0 <= index < len(self.items):
+            self.on_click(index)
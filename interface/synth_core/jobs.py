@@ -0,0 +1,132 @@
+"""Running tool scripts as background processes with streamed output."""
+import io
+import os
+import queue
+import signal
+import subprocess
+from threading import Thread
+
+# Job states
+PENDING = 'pending'
+RUNNING = 'running'
+FINISHED = 'finished'
+FAILED = 'failed'
+CANCELLED = 'cancelled'
+
+
+class Job:
+    # A single subprocess whose stdout/stderr lines are collected on reader threads
+
+    def __init__(self, job_id, name, command, cwd=None, on_success=None, env=None):
+        self.job_id = job_id
+        self.name = name
+        self.command = command
+        self.cwd = cwd
+        self.env = env or {}
+        self.on_success = on_success
+        self.status = PENDING
+        self.returncode = None
+        self.process = None
+        self.output = queue.Queue()
+
+    def start(self):
+        # Unbuffered UTF-8 output so prints show up in the log as they happen; undecodable bytes must not
+        # kill a reader thread, or the child blocks on a full pipe
+        env = dict(os.environ, PYTHONUNBUFFERED='1', PYTHONIOENCODING='utf-8', **self.env)
+        self.process = subprocess.Popen(self.command, cwd=self.cwd, env=env, stdout=subprocess.PIPE,
+                                        stderr=subprocess.PIPE, **self._group_options())
+        self.status = RUNNING
+        readers = [Thread(target=self._read_stream, args=(self.process.stdout, 'stdout'), daemon=True),
+                   Thread(target=self._read_stream, args=(self.process.stderr, 'stderr'), daemon=True)]
+        for reader in readers:
+            reader.start()
+        Thread(target=self._wait, args=(readers,), daemon=True).start()
+
+    def _read_stream(self, stream, stream_name):
+        # newline='' splits at '\r' too but keeps line endings, so tqdm redraws arrive as lines ending in a lone '\r'
+        text = io.TextIOWrapper(stream, encoding='utf-8', errors='replace', newline='')
+        for line in text:
+            self.output.put((stream_name, line))
+        text.close()
+
+    def _wait(self, readers):
+        # Only report completion once all output has been queued
+        for reader in readers:
+            reader.join()
+        self.returncode = self.process.wait()
+        if self.status != CANCELLED:
+            self.status = FINISHED if self.returncode == 0 else FAILED
+
+    @staticmethod
+    def _group_options():
+        # Each job leads its own process group, so cancelling it also stops what it started (e.g. yolov5 workers)
+        if os.name == 'nt':
+            return {'creationflags': subprocess.CREATE_NEW_PROCESS_GROUP}
+        return {'start_new_session': True}
+
+    def cancel(self):
+        if self.status == RUNNING:
+            self.status = CANCELLED
+            try:
+                if os.name == 'nt':
+                    # taskkill /T follows child processes, which a process group alone does not on Windows
+                    subprocess.run(['taskkill', '/T', '/F', '/PID', str(self.process.pid)],
+                                   stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+                else:
+                    os.killpg(self.process.pid, signal.SIGTERM)
+            except OSError:
+                self.process.terminate()
+
+    def is_done(self):
+        return self.status in (FINISHED, FAILED, CANCELLED) and self.returncode is not None
+
+    def describe(self):
+        if self.returncode is None:
+            return f"#{self.job_id} {self.name}: {self.status}"
+        return f"#{self.job_id} {self.name}: {self.status} (exit code {self.returncode})"
+
+
+class JobRunner:
+    # Keeps track of launched jobs; poll() is meant to be called periodically from the UI thread
+
+    def __init__(self):
+        self.jobs = []
+        self._reported = set()
+
+    def start(self, name, command, cwd=None, on_success=None, env=None):
+        job = Job(len(self.jobs) + 1, name, command, cwd=cwd, on_success=on_success, env=env)
+        self.jobs.append(job)
+        try:
+            job.start()
+        except OSError as e:
+            job.status = FAILED
+            job.returncode = -1
+            job.output.put(('stderr', f"Could not start {name}: {e}\n"))
+        return job
+
+    def running_jobs(self):
+        return [job for job in self.jobs if job.status == RUNNING]
+
+    def cancel_all(self):
+        for job in self.running_jobs():
+            job.cancel()
+
+    def poll(self):
+        # Drain queued output lines and return them with the jobs that completed since the last poll
+        lines = []
+        completed = []
+        for job in self.jobs:
+            if job.job_id in self._reported:
+                continue
+            # Check completion before draining, so no output queued before completion is missed
+            done = job.is_done()
+            while True:
+                try:
+                    stream_name, line = job.output.get_nowait()
+                except queue.Empty:
+                    break
+                lines.append((job, stream_name, line))
+            if done:
+                self._reported.add(job.job_id)
+                completed.append(job)
+        return lines, completed
@@ -0,0 +1,164 @@
+"""Class editor label storage backed by an append-only journal.
+
+Every label change is one line appended to 'icon_classes.journal'. The
+snapshot files the other tools read ('icon_classes.json' and
+'finalized_class.txt') are rewritten only on compaction, which happens every
+COMPACT_EVERY changes, on export, when the store is closed and from
+flush_snapshots(), which the class editor calls once edits pause.
+"""
+import json
+import os
+from collections import Counter
+
+from .class_files import CLASS_FILE_NAME, load_json_data, load_finalized_class_file, save_finalized_class_file
+
+LABEL_JSON_NAME = 'icon_classes.json'
+JOURNAL_NAME = 'icon_classes.journal'
+PROGRESS_NAME = 'progress.json'
+COMPACT_EVERY = 1000  # Journal entries before the snapshot files are rewritten
+
+
+def icon_id(image_name):
+    # Numeric id of an icon file name such as icon_5.png, or None
+    try:
+        return int(image_name.split('_')[1].split('.')[0])
+    except (IndexError, ValueError):
+        return None
+
+
+def _write_atomic(path, write):
+    tmp_path = path + '.tmp'
+    with open(tmp_path, 'w') as f:
+        write(f)
+    os.replace(tmp_path, path)
+
+
+class LabelStore:
+
+    def __init__(self, folder):
+        self.folder = folder
+        self.label_json = os.path.join(folder, LABEL_JSON_NAME)
+        self.journal_path = os.path.join(folder, JOURNAL_NAME)
+        self.class_file = os.path.join(folder, CLASS_FILE_NAME)
+        self.progress_file = os.path.join(folder, PROGRESS_NAME)
+
+        # Start from the last snapshot, then replay changes made since
+        self.labels = load_json_data(self.label_json)
+        self.finalized = load_finalized_class_file(self.class_file)
+        self.journal_entries = self._replay()
+        self.label_counts = Counter(self.labels.values())
+        self._truncate_partial_line()
+        self._journal = open(self.journal_path, 'a')
+
+    def _replay(self):
+        entries = 0
+        if not os.path.exists(self.journal_path):
+            return entries
+        with open(self.journal_path, 'r') as f:
+            for line in f:
+                try:
+                    entry = json.loads(line)
+                except json.JSONDecodeError:
+                    print(f"Skipping incomplete journal entry in {self.journal_path}")
+                    continue
+                self._apply(entry)
+                entries += 1
+        return entries
+
+    def _truncate_partial_line(self):
+        # A crash mid-write can leave an unterminated last line; cut it so the next entry starts on its own line
+        if not os.path.exists(self.journal_path):
+            return
+        with open(self.journal_path, 'rb+') as f:
+            end = f.seek(0, os.SEEK_END)
+            position = end
+            while position > 0:
+                start = max(0, position - 4096)
+                f.seek(start)
+                newline = f.read(position - start).rfind(b'\n')
+                if newline >= 0:
+                    position = start + newline + 1
+                    break
+                position = start
+            if position != end:
+                f.truncate(position)
+                print(f"Dropped an incomplete entry at the end of {self.journal_path}")
+
+    def _apply(self, entry):
+        image = entry['image']
+        image_id = icon_id(image)
+        if entry['op'] == 'set':
+            self.labels[image] = entry['label']
+            if image_id is not None:
+                self.finalized[image_id] = entry['label']
+        elif entry['op'] == 'delete':
+            self.labels.pop(image, None)
+            if image_id is not None:
+                self.finalized.pop(image_id, None)
+
+    def _append(self, entry):
+        self._journal.write(json.dumps(entry) + '\n')
+        self._journal.flush()
+        self._apply(entry)
+        self.journal_entries += 1
+        if self.journal_entries >= COMPACT_EVERY:
+            self.compact()
+
+    def set_label(self, image, label):
+        # Returns False if the image already has this label
+        previous = self.labels.get(image)
+        if previous == label:
+            return False
+        if previous is not None:
+            self.label_counts[previous] -= 1
+            if not self.label_counts[previous]:
+                del self.label_counts[previous]
+        self.label_counts[label] += 1
+        self._append({'op': 'set', 'image': image, 'label': label})
+        return True
+
+    def delete(self, image):
+        previous = self.labels.get(image)
+        if previous is not None:
+            self.label_counts[previous] -= 1
+            if not self.label_counts[previous]:
+                del self.label_counts[previous]
+        self._append({'op': 'delete', 'image': image})
+
+    def classes(self):
+        # Distinct labels in use, sorted
+        return sorted(self.label_counts)
+
+    def compact(self):
+        # Write both snapshot files, then start a fresh journal
+        _write_atomic(self.label_json, lambda f: json.dump(self.labels, f, indent=4))
+        self.export_class_file()
+        self._journal.close()
+        self._journal = open(self.journal_path, 'w')
+        self.journal_entries = 0
+
+    def flush_snapshots(self):
+        # Bring the snapshot files up to date if the journal holds changes they lack
+        if self.journal_entries:
+            self.compact()
+
+    def export_class_file(self):
+        tmp_path = self.class_file + '.tmp'
+        save_finalized_class_file(tmp_path, self.finalized)
+        os.replace(tmp_path, self.class_file)
+
+    def load_progress(self):
+        try:
+            with open(self.progress_file, 'r') as f:
+                return json.load(f).get('current_index', 0)
+        except (OSError, ValueError):
+            return 0
+
+    def save_progress(self, current_index):
+        with open(self.progress_file, 'w') as f:
+            json.dump({'current_index': current_index}, f)
+
+    def close(self):
+        if self.journal_entries:
+            self.compact()
+        self._journal.close()
@@ -0,0 +1,28 @@
+"""Deferred imports for heavy dependencies."""
+import importlib
+import sys
+
+
+class LazyModule:
+    # Placeholder that imports the real module the first time one of its attributes is used
+
+    def __init__(self, name):
+        self._name = name
+        self._module = None
+
+    def __getattr__(self, attr):
+        if self._module is None:
+            self._module = importlib.import_module(self._name)
+        return getattr(self._module, attr)
+
+    def __repr__(self):
+        state = "loaded" if self._module is not None else "not loaded"
+        return f"<lazy module '{self._name}' ({state})>"
+
+
+def lazy_import(name):
+    # Return the module straight away if something already imported it
+    module = sys.modules.get(name)
+    if module is not None:
+        return module
+    return LazyModule(name)
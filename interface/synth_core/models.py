@@ -0,0 +1,347 @@
+"""Loading YOLOv5 detectors without network access, with an in-process cache.
+
+Besides PyTorch weights, exported models run through ONNX Runtime or OpenVINO,
+which are much faster on CPU-only hosts; all backends share the same
+pre- and post-processing so their outputs can be compared directly.
+
+Detectors take a BGR frame and return an (N, 6) float32 array of
+[x1, y1, x2, y2, confidence, class] rows in frame pixel coordinates. By
+default the frame is fitted to the model input; passing scale resizes it by
+exactly that factor instead, so a crop can be run at the scale of the full
+frame it came from. detect_batch runs several equally sized images, such as
+tiles of one frame, through a single forward pass, at their native scale
+unless a scale is given.
+"""
+import ast
+import glob
+import hashlib
+import json
+import os
+import time
+from threading import Lock
+
+from .lazy import lazy_import
+from .paths import YOLO_DIR
+from .profiling import span, timings
+
+cv2 = lazy_import('cv2')
+np = lazy_import('numpy')
+torch = lazy_import('torch')
+onnxruntime = lazy_import('onnxruntime')
+openvino = lazy_import('openvino.runtime')
+yaml = lazy_import('yaml')
+
+# Adjustable variables
+NMS_IOU = 0.45  # Boxes of the same class overlapping more than this are suppressed
+MAX_DETECTIONS = 300
+LETTERBOX_COLOR = (114, 114, 114)  # Padding colour YOLOv5 was trained with
+MODEL_SIZE = 640  # Input size of .pt models, which resize on their own
+HASH_CHUNK_SIZE = 1 << 20
+MATCH_IOU = 0.5  # Backend check: a candidate box matches a reference box of the same class above this IoU
+
+BACKENDS = ('auto', 'pytorch', 'onnxruntime', 'openvino')
+
+# Loaded detectors keyed by the SHA-256 of their weight file
+_detector_cache = {}
+_cache_lock = Lock()
+
+
+def file_hash(path):
+    digest = hashlib.sha256()
+    with open(path, 'rb') as f:
+        for chunk in iter(lambda: f.read(HASH_CHUNK_SIZE), b''):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+def nms(boxes, scores, classes, iou_threshold=NMS_IOU, max_detections=MAX_DETECTIONS):
+    # Class-aware non-maximum suppression; returns the kept indices, best score first
+    if len(boxes) == 0:
+        return np.empty(0, dtype=np.int64)
+    # Shift each class into its own region so boxes of different classes never overlap
+    offset = classes.astype(boxes.dtype)[:, None] * (boxes.max() + 1)
+    shifted = boxes + offset
+    x1, y1, x2, y2 = shifted.T
+    areas = (x2 - x1) * (y2 - y1)
+
+    order = np.argsort(-scores, kind='stable')
+    keep = []
+    while len(order) and len(keep) < max_detections:
+        best, rest = order[0], order[1:]
+        keep.append(best)
+        inter_w = np.clip(np.minimum(x2[best], x2[rest]) - np.maximum(x1[best], x1[rest]), 0, None)
+        inter_h = np.clip(np.minimum(y2[best], y2[rest]) - np.maximum(y1[best], y1[rest]), 0, None)
+        inter = inter_w * inter_h
+        iou = inter / np.maximum(areas[best] + areas[rest] - inter, 1e-9)
+        order = rest[iou <= iou_threshold]
+    return np.array(keep, dtype=np.int64)
+
+
+def fit_scale(frame_shape, size):
+    # Factor that fits a frame of frame_shape inside a model input of size (height, width)
+    return min(size[0] / frame_shape[0], size[1] / frame_shape[1])
+
+
+def letterbox(frame, size, ratio=None):
+    # Resize keeping the aspect ratio and pad to size (height, width); returns the image, scale and padding
+    height, width = frame.shape[:2]
+    if ratio is None:
+        ratio = fit_scale(frame.shape, size)
+    new_w, new_h = int(round(width * ratio)), int(round(height * ratio))
+    pad_x, pad_y = (size[1] - new_w) // 2, (size[0] - new_h) // 2
+    image = np.empty((size[0], size[1], 3), dtype=np.uint8)
+    image[...] = LETTERBOX_COLOR
+    image[pad_y:pad_y + new_h, pad_x:pad_x + new_w] = cv2.resize(frame, (new_w, new_h), interpolation=cv2.INTER_LINEAR)
+    return image, ratio, (pad_x, pad_y)
+
+
+def decode_predictions(pred, confidence_threshold, ratio=1.0, pad=(0, 0)):
+    # Turn raw YOLOv5 output rows [cx, cy, w, h, objectness, class scores...] into detections
+    scores = pred[:, 4:5] * pred[:, 5:]
+    classes = scores.argmax(axis=1)
+    confidences = scores[np.arange(len(scores)), classes]
+    mask = confidences >= confidence_threshold
+    pred, classes, confidences = pred[mask], classes[mask], confidences[mask]
+
+    boxes = np.empty((len(pred), 4), dtype=np.float32)
+    boxes[:, :2] = pred[:, :2] - pred[:, 2:4] / 2
+    boxes[:, 2:] = pred[:, :2] + pred[:, 2:4] / 2
+    boxes -= np.array(pad * 2, dtype=np.float32)
+    boxes /= ratio
+
+    keep = nms(boxes, confidences, classes)
+    return np.column_stack((boxes[keep], confidences[keep], classes[keep])).astype(np.float32)
+
+
+def images_to_batch(images):
+    # Stack equally sized BGR images into the float32 RGB NCHW batch YOLOv5 exports take
+    batch = np.stack(images)[..., ::-1].transpose(0, 3, 1, 2)
+    return np.ascontiguousarray(batch, dtype=np.float32) / 255
+
+
+def _names_to_mapping(names):
+    # Model class names come as a list, a dict with int or str keys, or the text of either
+    if isinstance(names, str):
+        names = ast.literal_eval(names)
+    if isinstance(names, dict):
+        return {int(k): v for k, v in names.items()}
+    return dict(enumerate(names))
+
+
+class HubDetector:
+    # YOLOv5 .pt weights built through the hub entry point of a local yolov5 checkout
+
+    def __init__(self, weights_path, yolo_dir=YOLO_DIR):
+        if not os.path.isfile(os.path.join(yolo_dir, 'hubconf.py')):
+            raise FileNotFoundError(f"No yolov5 checkout found at {yolo_dir}; clone it there or set YOLOV5_DIR")
+        self.model = torch.hub.load(yolo_dir, 'custom', path=weights_path, source='local')
+        self.names = _names_to_mapping(self.model.names)
+        self.size = (MODEL_SIZE, MODEL_SIZE)
+
+    def detect(self, frame, confidence_threshold, scale=None):
+        # AutoShape expects RGB arrays and does its own letterboxing and NMS
+        self.model.conf = confidence_threshold
+        size = MODEL_SIZE if scale is None else max(int(round(max(frame.shape[:2]) * scale)), 32)
+        results = self.model(np.ascontiguousarray(frame[..., ::-1]), size=size)
+        self._record_times(results)
+        return results.xyxy[0].cpu().numpy().astype(np.float32)
+
+    def detect_batch(self, images, confidence_threshold, scale=None):
+        # AutoShape batches a list of images into one forward pass
+        self.model.conf = confidence_threshold
+        size = max(int(round(max(images[0].shape[:2]) * (scale or 1.0))), 32)
+        results = self.model([np.ascontiguousarray(image[..., ::-1]) for image in images], size=size)
+        self._record_times(results, len(images))
+        return [xyxy.cpu().numpy().astype(np.float32) for xyxy in results.xyxy]
+
+    def _record_times(self, results, count=1):
+        # AutoShape times its own preprocess, forward and NMS steps, in milliseconds per image
+        for stage, ms in zip(('preprocess', 'forward', 'nms'), getattr(results, 't', ())):
+            timings.record(stage, ms * count / 1000)
+
+
+class ExportedDetector:
+    # Shared pre- and post-processing for exported models that return raw YOLOv5 output;
+    # subclasses set size, names and batching and implement _run(batch) -> (N, rows, 5 + classes)
+
+    batching = True  # Cleared if the export was made with a fixed batch size
+
+    def _run(self, batch):
+        raise NotImplementedError
+
+    def detect(self, frame, confidence_threshold, scale=None):
+        with span('preprocess'):
+            image, ratio, pad = letterbox(frame, self.size, scale)
+            batch = images_to_batch([image])
+        with span('forward'):
+            pred = self._run(batch)[0]
+        with span('nms'):
+            return decode_predictions(pred, confidence_threshold, ratio, pad)
+
+    def detect_batch(self, images, confidence_threshold, scale=None):
+        if scale is None:
+            scale = min(fit_scale(images[0].shape, self.size), 1.0)
+        with span('preprocess'):
+            boxed = [letterbox(image, self.size, scale) for image in images]
+        preds = None
+        with span('forward'):
+            if self.batching and len(images) > 1:
+                try:
+                    preds = self._run(images_to_batch([image for image, _, _ in boxed]))
+                except Exception:
+                    self.batching = False
+            if preds is None:
+                preds = [self._run(images_to_batch([image]))[0] for image, _, _ in boxed]
+        with span('nms'):
+            return [decode_predictions(pred, confidence_threshold, ratio, pad)
+                    for pred, (_, ratio, pad) in zip(preds, boxed)]
+
+
+def _static_size(shape):
+    # Height and width from an input shape, or the default when the export has dynamic axes
+    height, width = shape[-2:]
+    if isinstance(height, int) and isinstance(width, int) and height > 0 and width > 0:
+        return height, width
+    return MODEL_SIZE, MODEL_SIZE
+
+
+class TorchScriptDetector(ExportedDetector):
+    # Self-contained TorchScript export from yolov5's export.py; needs neither the checkout nor the network
+
+    def __init__(self, weights_path):
+        extra_files = {'config.txt': ''}
+        self.model = torch.jit.load(weights_path, map_location='cpu', _extra_files=extra_files)
+        self.model.eval()
+        config = json.loads(extra_files['config.txt'] or '{}')
+        self.size = tuple(config.get('shape', (1, 3, 640, 640))[-2:])
+        self.names = _names_to_mapping(config.get('names', []))
+
+    def _run(self, batch):
+        with torch.no_grad():
+            pred = self.model(torch.from_numpy(batch))
+        if isinstance(pred, (list, tuple)):
+            pred = pred[0]
+        return pred.numpy()
+
+
+class OnnxDetector(ExportedDetector):
+    # ONNX export run through ONNX Runtime on the CPU
+
+    def __init__(self, weights_path):
+        self.session = onnxruntime.InferenceSession(weights_path, providers=['CPUExecutionProvider'])
+        model_input = self.session.get_inputs()[0]
+        self.input_name = model_input.name
+        self.size = _static_size(model_input.shape)
+        self.batching = not isinstance(model_input.shape[0], int) or model_input.shape[0] > 1
+        metadata = self.session.get_modelmeta().custom_metadata_map
+        self.names = _names_to_mapping(metadata.get('names', '[]'))
+
+    def _run(self, batch):
+        return self.session.run(None, {self.input_name: batch})[0]
+
+
+class OpenVinoDetector(ExportedDetector):
+    # OpenVINO IR (an *_openvino_model folder or its .xml) or an ONNX file compiled by OpenVINO for the CPU
+
+    def __init__(self, weights_path):
+        self.model = openvino.Core().compile_model(weights_path, 'CPU')
+        shape = self.model.input(0).get_partial_shape()
+        dims = [dim.get_length() if dim.is_static else None for dim in shape]
+        self.size = _static_size(dims)
+        self.batching = dims[0] is None or dims[0] > 1
+        self.output = self.model.output(0)
+        self.names = {}
+        metadata_path = os.path.join(os.path.dirname(weights_path), 'metadata.yaml')
+        if os.path.exists(metadata_path):
+            with open(metadata_path) as f:
+                self.names = _names_to_mapping((yaml.safe_load(f) or {}).get('names', []))
+        elif weights_path.lower().endswith('.onnx'):
+            self.names = OnnxDetector(weights_path).names
+
+    def _run(self, batch):
+        return self.model([batch])[self.output]
+
+
+def _resolve_model_file(weights_path):
+    # OpenVINO exports are folders; use the .xml inside
+    if os.path.isdir(weights_path):
+        xml_files = sorted(glob.glob(os.path.join(weights_path, '*.xml')))
+        if not xml_files:
+            raise FileNotFoundError(f"No OpenVINO .xml model found in {weights_path}")
+        return xml_files[0]
+    return weights_path
+
+
+def _backend_for(weights_path, backend):
+    if backend != 'auto':
+        return backend
+    extension = os.path.splitext(weights_path)[1].lower()
+    return {'.onnx': 'onnxruntime', '.xml': 'openvino'}.get(extension, 'pytorch')
+
+
+def load_detector(weights_path, yolo_dir=YOLO_DIR, backend='auto'):
+    # Return (detector, seconds taken, whether it came from the cache); reloading the same weights is instant
+    start = time.perf_counter()
+    weights_path = _resolve_model_file(weights_path)
+    backend = _backend_for(weights_path, backend)
+    # An OpenVINO .xml only describes the graph; the weights live in the .bin next to it
+    weights_file = os.path.splitext(weights_path)[0] + '.bin' if weights_path.lower().endswith('.xml') else weights_path
+    key = (file_hash(weights_file), backend)
+    with _cache_lock:
+        detector = _detector_cache.get(key)
+        cached = detector is not None
+        if not cached:
+            if backend == 'openvino':
+                detector = OpenVinoDetector(weights_path)
+            elif backend == 'onnxruntime':
+                detector = OnnxDetector(weights_path)
+            elif weights_path.lower().endswith('.torchscript'):
+                detector = TorchScriptDetector(weights_path)
+            elif backend == 'pytorch':
+                detector = HubDetector(weights_path, yolo_dir)
+            else:
+                raise ValueError(f"Unknown backend '{backend}', expected one of {', '.join(BACKENDS)}")
+            _detector_cache[key] = detector
+    return detector, time.perf_counter() - start, cached
+
+
+def compare_detections(reference, candidate, iou_threshold=MATCH_IOU):
+    # Greedily match candidate boxes to reference boxes of the same class; returns (matched IoUs, missed, extra)
+    if len(reference) == 0 or len(candidate) == 0:
+        return np.empty(0, dtype=np.float32), len(reference), len(candidate)
+    x1 = np.maximum(reference[:, None, 0], candidate[None, :, 0])
+    y1 = np.maximum(reference[:, None, 1], candidate[None, :, 1])
+    x2 = np.minimum(reference[:, None, 2], candidate[None, :, 2])
+    y2 = np.minimum(reference[:, None, 3], candidate[None, :, 3])
+    inter = np.clip(x2 - x1, 0, None) * np.clip(y2 - y1, 0, None)
+    ref_area = (reference[:, 2] - reference[:, 0]) * (reference[:, 3] - reference[:, 1])
+    cand_area = (candidate[:, 2] - candidate[:, 0]) * (candidate[:, 3] - candidate[:, 1])
+    iou = inter / np.maximum(ref_area[:, None] + cand_area[None, :] - inter, 1e-9)
+    iou[reference[:, None, 5] != candidate[None, :, 5]] = 0
+
+    matched = []
+    for _ in range(min(len(reference), len(candidate))):
+        r, c = np.unravel_index(iou.argmax(), iou.shape)
+        if iou[r, c] < iou_threshold:
+            break
+        matched.append(iou[r, c])
+        iou[r, :] = 0
+        iou[:, c] = 0
+    matched = np.array(matched, dtype=np.float32)
+    return matched, len(reference) - len(matched), len(candidate) - len(matched)
+
+
+def check_backend(candidate, reference, frames, confidence_threshold=0.5):
+    # Compare a backend's detections with the PyTorch reference on the same frames
+    ious, missed, extra, total = [], 0, 0, 0
+    for frame in frames:
+        expected = reference.detect(frame, confidence_threshold)
+        matched, frame_missed, frame_extra = compare_detections(expected, candidate.detect(frame, confidence_threshold))
+        ious.append(matched)
+        missed += frame_missed
+        extra += frame_extra
+        total += len(expected)
+    ious = np.concatenate(ious) if ious else np.empty(0, dtype=np.float32)
+    return {'reference_boxes': total, 'matched': len(ious), 'missed': missed, 'extra': extra,
+            'mean_iou': float(ious.mean()) if len(ious) else 1.0,
+            'recall': len(ious) / total if total else 1.0}
@@ -0,0 +1,35 @@
+"""Repository layout and numbered output folders."""
+import os
+
+# Directory layout, resolved from this file so tools work from any working directory
+INTERFACE_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+ROOT_DIR = os.path.dirname(INTERFACE_DIR)
+ICON_BASE_DIR = os.path.join(ROOT_DIR, 'icon_captures')
+BACKGROUND_DIR = os.path.join(ROOT_DIR, 'backgrounds')
+# Local clone of ultralytics/yolov5 as described in the README; set YOLOV5_DIR to use another one
+YOLO_DIR = os.environ.get('YOLOV5_DIR', os.path.join(ROOT_DIR, 'yolov5'))
+
+
+def get_next_numbered_directory(base_dir, prefix):
+    # Create base_dir/<prefix>N where N is one more than the highest existing number
+    os.makedirs(base_dir, exist_ok=True)
+    existing_numbers = []
+    for d in os.listdir(base_dir):
+        suffix = d[len(prefix):]
+        if d.startswith(prefix) and suffix.isdigit() and os.path.isdir(os.path.join(base_dir, d)):
+            existing_numbers.append(int(suffix))
+    next_number = max(existing_numbers) + 1 if existing_numbers else 1
+
+    new_output_dir = os.path.join(base_dir, f'{prefix}{next_number}')
+    os.makedirs(new_output_dir, exist_ok=True)
+    return new_output_dir
+
+
+def get_next_output_directory(base_dir):
+    # Next icons_N folder in 'icon_captures'
+    return get_next_numbered_directory(base_dir, 'icons_')
+
+
+def get_next_synth_directory(icon_dir):
+    # Next synth_gen_images_N folder in the icon folder's 'synth_gens'
+    return get_next_numbered_directory(os.path.join(icon_dir, 'synth_gens'), 'synth_gen_images_')
@@ -0,0 +1,126 @@
+"""Capture and inference on worker threads, handing frames on through latest-wins slots."""
+import time
+from collections import deque
+from threading import Condition, Event, Thread
+
+# Adjustable variables
+MAX_CAPTURE_FPS = 30  # Upper bound on screenshots per second; frames nobody picks up are dropped anyway
+FPS_WINDOW = 30  # Displayed frames averaged for the FPS readout
+
+
+class LatestSlot:
+    # Single-item hand-off between threads; putting a new item replaces one that was never taken
+
+    def __init__(self):
+        self._condition = Condition()
+        self._item = None
+        self._full = False
+        self._closed = False
+        self.dropped = 0
+
+    def put(self, item):
+        with self._condition:
+            if self._full:
+                self.dropped += 1
+            self._item = item
+            self._full = True
+            self._condition.notify()
+
+    def get(self, timeout=None):
+        # Wait for an item; returns None on timeout or once the slot is closed
+        with self._condition:
+            if not self._condition.wait_for(lambda: self._full or self._closed, timeout):
+                return None
+            return self._take()
+
+    def get_nowait(self):
+        with self._condition:
+            return self._take()
+
+    def _take(self):
+        item, self._item, self._full = self._item, None, False
+        return item
+
+    def close(self):
+        with self._condition:
+            self._closed = True
+            self._condition.notify_all()
+
+
+class FramePipeline:
+    # capture() -> frame runs on one thread, process(frame) -> result on another;
+    # the Tk thread calls poll() and only ever sees the newest result
+
+    def __init__(self, capture, process, max_fps=MAX_CAPTURE_FPS):
+        self.capture = capture
+        self.process = process
+        self.min_interval = 1.0 / max_fps if max_fps else 0.0
+        self.frames = LatestSlot()
+        self.results = LatestSlot()
+        self._stop = Event()
+        self._threads = []
+        self._shown = deque(maxlen=FPS_WINDOW)
+        self.latency = 0.0
+
+    def start(self):
+        if self._threads:
+            return
+        self._threads = [Thread(target=self._capture_loop, daemon=True),
+                         Thread(target=self._process_loop, daemon=True)]
+        for thread in self._threads:
+            thread.start()
+
+    def stop(self):
+        self._stop.set()
+        self.frames.close()
+        self.results.close()
+        for thread in self._threads:
+            thread.join(timeout=2)
+        self._threads = []
+
+    def _capture_loop(self):
+        while not self._stop.is_set():
+            started = time.perf_counter()
+            try:
+                frame = self.capture()
+            except Exception as e:
+                print(f"Error capturing frame: {e}")
+                frame = None
+            if frame is not None:
+                self.frames.put((frame, started))
+            self._stop.wait(max(self.min_interval - (time.perf_counter() - started), 0))
+
+    def _process_loop(self):
+        while not self._stop.is_set():
+            item = self.frames.get(timeout=0.5)
+            if item is None:
+                continue
+            frame, captured = item
+            try:
+                result = self.process(frame)
+            except Exception as e:
+                print(f"Error processing frame: {e}")
+                continue
+            if result is not None:
+                self.results.put((result, captured))
+
+    def poll(self):
+        # Newest finished result, or None; call from the Tk thread
+        item = self.results.get_nowait()
+        if item is None:
+            return None
+        result, captured = item
+        now = time.perf_counter()
+        self.latency = now - captured
+        self._shown.append(now)
+        return result
+
+    @property
+    def fps(self):
+        if len(self._shown) < 2:
+            return 0.0
+        return (len(self._shown) - 1) / max(self._shown[-1] - self._shown[0], 1e-9)
+
+    @property
+    def dropped(self):
+        return self.frames.dropped + self.results.dropped
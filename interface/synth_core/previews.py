@@ -0,0 +1,100 @@
+"""Decoded preview images with an LRU cache and background prefetch for browsing runs."""
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+from threading import Lock
+
+from .lazy import lazy_import
+
+Image = lazy_import('PIL.Image')
+
+# Adjustable variables
+PREVIEW_SIZE = (500, 300)  # Previews are decoded to fit this box
+CACHE_SIZE = 64  # Decoded previews kept in memory
+PREFETCH = 8  # Images decoded ahead of and behind the current one
+WORKERS = 2  # Background decode threads
+
+
+def decode_preview(path, size):
+    # Decode at reduced resolution where the format allows it (JPEG draft mode),
+    # and let thumbnail() shrink with reduce() before resampling otherwise
+    image = Image.open(path)
+    image.draft('RGB', size)
+    image.thumbnail(size, reducing_gap=2.0)
+    image.load()
+    return image
+
+
+class PreviewLoader:
+
+    def __init__(self, paths, size=PREVIEW_SIZE, cache_size=CACHE_SIZE, prefetch=PREFETCH, workers=WORKERS):
+        self.paths = list(paths)
+        self.size = size
+        self.cache_size = max(cache_size, 2 * prefetch + 1)
+        self.prefetch = prefetch
+        self._cache = OrderedDict()
+        self._pending = {}
+        self._failed = set()
+        self._lock = Lock()
+        self._center = 0
+        self._executor = ThreadPoolExecutor(max_workers=workers)
+
+    def get_cached(self, index):
+        # Decoded preview if it is already in memory, otherwise None
+        with self._lock:
+            image = self._cache.get(index)
+            if image is not None:
+                self._cache.move_to_end(index)
+            return image
+
+    def get(self, index):
+        # Decoded preview, decoding on the calling thread if needed
+        image = self.get_cached(index)
+        if image is None:
+            image = self._decode(index, force=True)
+        return image
+
+    def request(self, index):
+        # Queue a background decode unless the preview is cached or already queued
+        if not 0 <= index < len(self.paths):
+            return
+        with self._lock:
+            if index in self._cache or index in self._pending or index in self._failed:
+                return
+            future = self._executor.submit(self._decode, index)
+            self._pending[index] = future
+        future.add_done_callback(lambda f, i=index: self._forget_pending(i))
+
+    def prefetch_around(self, index):
+        # Decode the current image first, then neighbours in order of distance
+        self._center = index
+        self.request(index)
+        for offset in range(1, self.prefetch + 1):
+            self.request(index + offset)
+            self.request(index - offset)
+
+    def failed(self, index):
+        return index in self._failed
+
+    def close(self):
+        self._executor.shutdown(wait=False, cancel_futures=True)
+
+    def _forget_pending(self, index):
+        with self._lock:
+            self._pending.pop(index, None)
+
+    def _decode(self, index, force=False):
+        # Skip requests the viewer has already scrolled away from
+        if not force and abs(index - self._center) > self.prefetch:
+            return None
+        try:
+            image = decode_preview(self.paths[index], self.size)
+        except Exception as e:
+            print(f"Error loading image {self.paths[index]}: {e}")
+            self._failed.add(index)
+            return None
+        with self._lock:
+            self._cache[index] = image
+            self._cache.move_to_end(index)
+            while len(self._cache) > self.cache_size:
+                self._cache.popitem(last=False)
+        return image
@@ -0,0 +1,84 @@
+"""Per-stage latency spans for the live inference loop.
+
+Code wraps each stage in `with span('stage'):`; the last ROLLING_WINDOW
+durations of every stage are kept so p50/p95/p99 reflect current behaviour,
+and can be shown on screen or exported as JSON or CSV.
+"""
+import csv
+import json
+import time
+from collections import deque
+from contextlib import contextmanager
+from threading import Lock
+
+from .lazy import lazy_import
+
+np = lazy_import('numpy')
+
+# Adjustable variables
+ROLLING_WINDOW = 500  # Samples kept per stage
+PERCENTILES = (50, 95, 99)
+
+
+class StageTimer:
+
+    def __init__(self, window=ROLLING_WINDOW):
+        self.window = window
+        self._samples = {}  # Stage name -> deque of durations in seconds, in first-seen order
+        self._lock = Lock()
+
+    def record(self, stage, seconds):
+        with self._lock:
+            samples = self._samples.get(stage)
+            if samples is None:
+                samples = self._samples[stage] = deque(maxlen=self.window)
+            samples.append(seconds)
+
+    @contextmanager
+    def span(self, stage):
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.record(stage, time.perf_counter() - start)
+
+    def reset(self):
+        with self._lock:
+            self._samples.clear()
+
+    def summary(self):
+        # {stage: {'count', 'mean_ms', 'p50_ms', 'p95_ms', 'p99_ms'}} over the rolling window
+        with self._lock:
+            snapshot = {stage: np.array(samples) * 1000 for stage, samples in self._samples.items() if samples}
+        summary = {}
+        for stage, samples in snapshot.items():
+            row = {'count': len(samples), 'mean_ms': float(samples.mean())}
+            for percentile, value in zip(PERCENTILES, np.percentile(samples, PERCENTILES)):
+                row[f'p{percentile}_ms'] = float(value)
+            summary[stage] = row
+        return summary
+
+    def format_summary(self):
+        lines = [f"{'stage':<14}{'p50':>8}{'p95':>8}{'p99':>8}  ms"]
+        for stage, row in self.summary().items():
+            lines.append(f"{stage:<14}{row['p50_ms']:>8.1f}{row['p95_ms']:>8.1f}{row['p99_ms']:>8.1f}")
+        return '\n'.join(lines)
+
+    def export(self, path):
+        # Write the summary as CSV when the path ends in .csv, JSON otherwise
+        summary = self.summary()
+        if path.lower().endswith('.csv'):
+            fields = ['stage', 'count', 'mean_ms'] + [f'p{p}_ms' for p in PERCENTILES]
+            with open(path, 'w', newline='') as f:
+                writer = csv.DictWriter(f, fieldnames=fields)
+                writer.writeheader()
+                for stage, row in summary.items():
+                    writer.writerow({'stage': stage, **row})
+        else:
+            with open(path, 'w') as f:
+                json.dump({'window': self.window, 'stages': summary}, f, indent=2)
+
+
+# Shared timer for the process, so detectors and tools record into the same table
+timings = StageTimer()
+span = timings.span
@@ -0,0 +1,118 @@
+"""Interactive session for cropping icons out of a screenshot by hand."""
+import os
+
+from .extraction import PNG_COMPRESSION, write_icon
+from .lazy import lazy_import
+from .paths import get_next_output_directory
+
+cv2 = lazy_import('cv2')
+
+# Adjustable variables
+WINDOW_NAME = "Screenshot"
+BOX_COLOR = (0, 255, 0)
+BOX_THICKNESS = 2
+KEY_WAIT_MS = 30  # The window only needs redrawing after mouse or key events, so poll gently
+MIN_CROP_SIZE = 2  # Ignore accidental clicks that select less than this (pixels)
+
+
+class RegionCaptureSession:
+
+    def __init__(self, frame, base_dir):
+        self.frame = frame  # Untouched screenshot that crops are cut from
+        self.display = frame.copy()  # The only full-frame copy; the overlay is drawn into it in place
+        self.base_dir = base_dir
+        self.crops = []
+        self.start = None
+        self.box = None
+        self.dirty = True
+
+    def _restore(self, box):
+        # Undo a drawn rectangle by copying back just its four edges from the clean frame
+        if box is None:
+            return
+        height, width = self.frame.shape[:2]
+        x1, y1, x2, y2 = box
+        pad = BOX_THICKNESS
+        left, right = max(x1 - pad, 0), min(x2 + pad + 1, width)
+        top, bottom = max(y1 - pad, 0), min(y2 + pad + 1, height)
+        for ys, xs in ((slice(top, min(y1 + pad + 1, bottom)), slice(left, right)),
+                       (slice(max(y2 - pad, top), bottom), slice(left, right)),
+                       (slice(top, bottom), slice(left, min(x1 + pad + 1, right))),
+                       (slice(top, bottom), slice(max(x2 - pad, left), right))):
+            self.display[ys, xs] = self.frame[ys, xs]
+
+    def _set_box(self, box):
+        self._restore(self.box)
+        self.box = box
+        if box is not None:
+            x1, y1, x2, y2 = box
+            cv2.rectangle(self.display, (x1, y1), (x2, y2), BOX_COLOR, BOX_THICKNESS)
+        self.dirty = True
+
+    def _normalized(self, x, y):
+        height, width = self.frame.shape[:2]
+        x, y = min(max(x, 0), width - 1), min(max(y, 0), height - 1)
+        ix, iy = self.start
+        return min(ix, x), min(iy, y), max(ix, x), max(iy, y)
+
+    def on_mouse(self, event, x, y, flags, param):
+        if event == cv2.EVENT_LBUTTONDOWN:
+            self.start = (x, y)
+        elif event == cv2.EVENT_MOUSEMOVE and self.start is not None:
+            self._set_box(self._normalized(x, y))
+        elif event == cv2.EVENT_LBUTTONUP and self.start is not None:
+            x1, y1, x2, y2 = self._normalized(x, y)
+            self.start = None
+            self._set_box(None)
+            if x2 - x1 >= MIN_CROP_SIZE and y2 - y1 >= MIN_CROP_SIZE:
+                # Keep the crop in memory; nothing touches the disk until the session ends
+                self.crops.append(self.frame[y1:y2, x1:x2].copy())
+                print(f"Captured region {len(self.crops)} ({x2 - x1}x{y2 - y1})")
+
+    def undo(self):
+        if self.crops:
+            self.crops.pop()
+            print(f"Removed last region, {len(self.crops)} left")
+
+    def run(self):
+        # Show the screenshot until 's' (save) or Esc (discard); 'c' clears the box, 'u' undoes the last crop
+        cv2.namedWindow(WINDOW_NAME)
+        cv2.setMouseCallback(WINDOW_NAME, self.on_mouse)
+        save = False
+        try:
+            while True:
+                if self.dirty:
+                    cv2.imshow(WINDOW_NAME, self.display)
+                    self.dirty = False
+                key = cv2.waitKey(KEY_WAIT_MS) & 0xFF
+                if key == ord("c"):
+                    self.start = None
+                    self._set_box(None)
+                elif key == ord("u"):
+                    self.undo()
+                elif key == ord("s"):
+                    save = True
+                    break
+                elif key == 27:
+                    break
+                if cv2.getWindowProperty(WINDOW_NAME, cv2.WND_PROP_VISIBLE) < 1:
+                    # Closing the window keeps the crops, like pressing 's'
+                    save = True
+                    break
+        finally:
+            cv2.destroyWindow(WINDOW_NAME)
+        return self.commit() if save else None
+
+    def commit(self, compression=PNG_COMPRESSION):
+        # Write every crop into one new icons_N folder, numbered in capture order
+        if not self.crops:
+            print("No regions captured.")
+            return None
+        output_dir = get_next_output_directory(self.base_dir)
+        with open(os.path.join(output_dir, 'finalized_class.txt'), 'w') as class_file:
+            for icon_count, crop in enumerate(self.crops):
+                write_icon(crop, os.path.join(output_dir, f"icon_{icon_count}.png"), compression)
+                class_file.write(f"{icon_count}    un-labeled\n")
+        print(f"Saved {len(self.crops)} cropped icons to {output_dir}")
+        self.crops = []
+        return output_dir
@@ -0,0 +1,177 @@
+"""Local HTTP detection service sharing one loaded model between clients.
+
+Requests are queued and a single worker takes whatever arrived within a
+short window (up to a maximum batch size) and runs it as one batch, so
+concurrent clients share forward passes instead of waiting on each other.
+
+    POST /detect?conf=0.5   body: PNG or JPEG bytes -> {"detections": [...], ...}
+    GET  /metrics           throughput, batch sizes, queue depth and latency percentiles
+    GET  /health
+"""
+import json
+import queue
+import time
+from concurrent.futures import Future
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from threading import Lock, Thread
+from urllib.parse import parse_qs, urlparse
+
+from .lazy import lazy_import
+from .models import fit_scale
+from .profiling import StageTimer
+
+cv2 = lazy_import('cv2')
+np = lazy_import('numpy')
+
+# Adjustable variables
+MAX_BATCH = 8  # Most images run through the model at once
+BATCH_WINDOW_MS = 10  # How long the worker waits for more requests after the first one arrives
+DEFAULT_CONFIDENCE = 0.5
+MAX_REQUEST_BYTES = 64 << 20
+
+
+class DynamicBatcher:
+
+    def __init__(self, detector, max_batch=MAX_BATCH, window_ms=BATCH_WINDOW_MS):
+        self.detector = detector
+        self.max_batch = max_batch
+        self.window = window_ms / 1000
+        self._queue = queue.Queue()
+        self._lock = Lock()
+        self.started = time.time()
+        self.requests = 0
+        self.batches = 0
+        self.batched_images = 0
+        self.timings = StageTimer()
+        self._thread = Thread(target=self._worker, daemon=True)
+        self._thread.start()
+
+    def submit(self, image, confidence_threshold):
+        future = Future()
+        with self._lock:
+            self.requests += 1
+        self._queue.put((image, confidence_threshold, future, time.perf_counter()))
+        return future
+
+    def _collect(self):
+        # Block for the first request, then gather more until the window closes or the batch is full
+        items = [self._queue.get()]
+        deadline = time.perf_counter() + self.window
+        while len(items) < self.max_batch:
+            remaining = deadline - time.perf_counter()
+            if remaining <= 0:
+                break
+            try:
+                items.append(self._queue.get(timeout=remaining))
+            except queue.Empty:
+                break
+        return items
+
+    def _worker(self):
+        while True:
+            items = self._collect()
+            # detect_batch needs equal sizes and one threshold, so split the batch accordingly
+            groups = {}
+            for item in items:
+                groups.setdefault((item[0].shape, item[1]), []).append(item)
+            for (shape, confidence_threshold), group in groups.items():
+                start = time.perf_counter()
+                try:
+                    results = self.detector.detect_batch([image for image, _, _, _ in group], confidence_threshold,
+                                                         scale=fit_scale(shape, self.detector.size))
+                except Exception as e:
+                    for _, _, future, _ in group:
+                        future.set_exception(e)
+                    continue
+                done = time.perf_counter()
+                self.timings.record('batch', done - start)
+                for (_, _, future, queued), detections in zip(group, results):
+                    self.timings.record('request', done - queued)
+                    future.set_result(detections)
+                with self._lock:
+                    self.batches += 1
+                    self.batched_images += len(group)
+
+    def metrics(self):
+        with self._lock:
+            uptime = time.time() - self.started
+            return {
+                'uptime_seconds': uptime,
+                'requests': self.requests,
+                'batches': self.batches,
+                'images': self.batched_images,
+                'mean_batch_size': self.batched_images / self.batches if self.batches else 0.0,
+                'images_per_second': self.batched_images / uptime if uptime else 0.0,
+                'queue_depth': self._queue.qsize(),
+                'latency': self.timings.summary(),
+            }
+
+
+def detections_to_json(detections, class_names):
+    return [{'class_id': int(cls), 'class_name': class_names.get(int(cls), "Unknown"), 'confidence': float(conf),
+             'box': [float(x1), float(y1), float(x2), float(y2)]}
+            for x1, y1, x2, y2, conf, cls in detections]
+
+
+def make_handler(batcher, class_names):
+
+    class DetectionHandler(BaseHTTPRequestHandler):
+
+        def _send_json(self, status, payload):
+            body = json.dumps(payload).encode()
+            self.send_response(status)
+            self.send_header('Content-Type', 'application/json')
+            self.send_header('Content-Length', str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+        def do_GET(self):
+            path = urlparse(self.path).path
+            if path == '/metrics':
+                self._send_json(200, batcher.metrics())
+            elif path == '/health':
+                self._send_json(200, {'status': 'ok', 'classes': len(class_names)})
+            else:
+                self._send_json(404, {'error': f"Unknown path {path}"})
+
+        def do_POST(self):
+            url = urlparse(self.path)
+            if url.path != '/detect':
+                self._send_json(404, {'error': f"Unknown path {url.path}"})
+                return
+            length = int(self.headers.get('Content-Length', 0))
+            if not 0 < length <= MAX_REQUEST_BYTES:
+                self._send_json(400, {'error': "Send the image as the request body"})
+                return
+            try:
+                confidence_threshold = float(parse_qs(url.query).get('conf', [DEFAULT_CONFIDENCE])[0])
+            except ValueError:
+                self._send_json(400, {'error': "conf must be a number"})
+                return
+
+            start = time.perf_counter()
+            image = cv2.imdecode(np.frombuffer(self.rfile.read(length), dtype=np.uint8), cv2.IMREAD_COLOR)
+            if image is None:
+                self._send_json(400, {'error': "Could not decode the image"})
+                return
+            try:
+                detections = batcher.submit(image, confidence_threshold).result()
+            except Exception as e:
+                self._send_json(500, {'error': str(e)})
+                return
+            self._send_json(200, {'detections': detections_to_json(detections, class_names),
+                                  'image_size': [image.shape[1], image.shape[0]],
+                                  'milliseconds': (time.perf_counter() - start) * 1000})
+
+        def log_message(self, format, *args):
+            pass  # Per-request logging would dominate the console; see /metrics instead
+
+    return DetectionHandler
+
+
+def make_server(detector, class_names, host='127.0.0.1', port=8765, max_batch=MAX_BATCH,
+                window_ms=BATCH_WINDOW_MS):
+    batcher = DynamicBatcher(detector, max_batch, window_ms)
+    server = ThreadingHTTPServer((host, port), make_handler(batcher, class_names))
+    server.daemon_threads = True
+    return server, batcher
@@ -0,0 +1,90 @@
+"""Train/val splits that leave generated files where they are.
+
+Each image is assigned by a hash of its file name, so the assignment never
+changes and images added to a growing dataset land in a stable split without
+re-splitting the rest. A split is written either as train.txt/val.txt lists
+of image paths, which YOLOv5 accepts directly, or as hardlink trees under
+images/ and labels/.
+"""
+import hashlib
+import os
+import shutil
+
+from .class_files import NON_LABEL_FILES
+
+# Adjustable variables
+VAL_FRACTION = 0.2
+SPLIT_NAMES = ('train', 'val')
+
+
+def _position(name, salt=''):
+    # Stable position in [0, 1) from the first 8 bytes of the name's SHA-1
+    digest = hashlib.sha1(f"{salt}{name}".encode()).digest()
+    return int.from_bytes(digest[:8], 'big') / 2 ** 64
+
+
+def split_for(name, val_fraction=VAL_FRACTION, salt=''):
+    # 'val' or 'train' by hash position; salt gives an independent split of the same files
+    return 'val' if _position(name, salt) < val_fraction else 'train'
+
+
+def labeled_images(dataset_dir):
+    # Image names in the dataset folder that have a label file next to them
+    names = set(os.listdir(dataset_dir))
+    return sorted(f for f in names if f.endswith('.png') and f[:-len('.png')] + '.txt' in names
+                  and f[:-len('.png')] + '.txt' not in NON_LABEL_FILES)
+
+
+def assign_splits(dataset_dir, val_fraction=VAL_FRACTION, salt=''):
+    splits = {name: [] for name in SPLIT_NAMES}
+    for image in labeled_images(dataset_dir):
+        splits[split_for(image, val_fraction, salt)].append(image)
+    # Small datasets can hash entirely into train, and YOLOv5 needs a val image; take the one closest to the cut
+    if not splits['val'] and len(splits['train']) > 1 and val_fraction > 0:
+        image = min(splits['train'], key=lambda name: _position(name, salt))
+        splits['train'].remove(image)
+        splits['val'].append(image)
+    return splits
+
+
+def write_split_lists(dataset_dir, val_fraction=VAL_FRACTION, salt=''):
+    # Write train.txt and val.txt with absolute image paths; YOLOv5 finds each label next to its image
+    dataset_dir = os.path.abspath(dataset_dir)
+    paths = []
+    for split, images in assign_splits(dataset_dir, val_fraction, salt).items():
+        list_path = os.path.join(dataset_dir, f'{split}.txt')
+        tmp_path = list_path + '.tmp'
+        with open(tmp_path, 'w') as f:
+            f.writelines(os.path.join(dataset_dir, image).replace('\\', '/') + '\n' for image in images)
+        os.replace(tmp_path, list_path)
+        print(f"{split}.txt: {len(images)} images")
+        paths.append(list_path)
+    return tuple(paths)
+
+
+def _link(source, target):
+    # Hardlink, or copy where the filesystem cannot link
+    if os.path.exists(target):
+        return
+    try:
+        os.link(source, target)
+    except OSError:
+        shutil.copy2(source, target)
+
+
+def link_splits(dataset_dir, val_fraction=VAL_FRACTION, salt=''):
+    # images/<split> and labels/<split> trees of hardlinks; only links that are missing are created
+    dataset_dir = os.path.abspath(dataset_dir)
+    image_dirs = []
+    for split, images in assign_splits(dataset_dir, val_fraction, salt).items():
+        image_dir = os.path.join(dataset_dir, 'images', split)
+        label_dir = os.path.join(dataset_dir, 'labels', split)
+        os.makedirs(image_dir, exist_ok=True)
+        os.makedirs(label_dir, exist_ok=True)
+        for image in images:
+            label = image[:-len('.png')] + '.txt'
+            _link(os.path.join(dataset_dir, image), os.path.join(image_dir, image))
+            _link(os.path.join(dataset_dir, label), os.path.join(label_dir, label))
+        print(f"images/{split}: {len(images)} images")
+        image_dirs.append(image_dir)
+    return tuple(image_dirs)
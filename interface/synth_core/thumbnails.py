@@ -0,0 +1,212 @@
+"""Per-folder thumbnail cache stored as one sprite atlas plus a JSON index.
+
+Each icon folder gets a '.thumbs' directory holding 'index.json' and the atlas
+PNG it names. Entries are keyed by file name and validated against the file's
+mtime and size, so opening a folder decodes a single atlas instead of every icon.
+Files that cannot be decoded get an entry without an atlas cell, so they are not
+retried until they change.
+"""
+import json
+import os
+import time
+from threading import Lock, Thread
+
+from .lazy import lazy_import
+
+Image = lazy_import('PIL.Image')
+
+# Adjustable variables
+THUMB_SIZE = 50  # Thumbnail cell size in pixels
+ATLAS_COLUMNS = 32  # Thumbnails per atlas row
+CACHE_DIR_NAME = '.thumbs'
+INDEX_FILE_NAME = 'index.json'
+
+_caches = {}
+_caches_lock = Lock()
+
+
+def get_thumbnail_cache(folder, size=THUMB_SIZE):
+    # Share one cache object per folder within a process
+    key = (os.path.abspath(folder), size)
+    with _caches_lock:
+        if key not in _caches:
+            _caches[key] = ThumbnailCache(folder, size)
+        return _caches[key]
+
+
+def _file_key(path):
+    stat = os.stat(path)
+    return [stat.st_mtime_ns, stat.st_size]
+
+
+class ThumbnailCache:
+
+    def __init__(self, folder, size=THUMB_SIZE):
+        self.folder = folder
+        self.size = size
+        self.cache_dir = os.path.join(folder, CACHE_DIR_NAME)
+        self.index_path = os.path.join(self.cache_dir, INDEX_FILE_NAME)
+        # (entries, atlas) is swapped as a whole so readers never see a half-built state
+        self._state = ({}, None)
+        self._loaded = False
+        self._build_lock = Lock()
+        self._build_thread = None
+
+    def load(self):
+        # Read the index and decode the atlas it points to
+        entries, atlas = {}, None
+        try:
+            with open(self.index_path, 'r') as f:
+                index = json.load(f)
+            if index.get('size') == self.size:
+                atlas = Image.open(os.path.join(self.cache_dir, index['atlas']))
+                atlas.load()
+                entries = index['entries']
+        except (OSError, ValueError, KeyError):
+            entries, atlas = {}, None
+        self._state = (entries, atlas)
+        self._loaded = True
+
+    def _ensure_loaded(self):
+        if not self._loaded:
+            self.load()
+
+    def _crop(self, atlas, entry):
+        row, col = divmod(entry['slot'], ATLAS_COLUMNS)
+        left, top = col * self.size, row * self.size
+        return atlas.crop((left, top, left + entry['width'], top + entry['height']))
+
+    def get(self, filename):
+        # Cached thumbnail for a file, or None if it is missing or the file changed since it was cached
+        self._ensure_loaded()
+        entries, atlas = self._state
+        entry = entries.get(filename)
+        if entry is None or atlas is None or entry.get('failed'):
+            return None
+        try:
+            if _file_key(os.path.join(self.folder, filename)) != entry['key']:
+                return None
+        except OSError:
+            return None
+        return self._crop(atlas, entry)
+
+    def thumbnail(self, filename):
+        # Cached thumbnail, falling back to decoding the full image
+        image = self.get(filename)
+        if image is not None:
+            return image
+        try:
+            image = Image.open(os.path.join(self.folder, filename))
+            image.thumbnail((self.size, self.size))
+            return image
+        except Exception as e:
+            print(f"Error loading image {filename}: {e}")
+            return None
+
+    def is_complete(self, filenames):
+        self._ensure_loaded()
+        entries, atlas = self._state
+        if atlas is None and filenames:
+            return False
+        for filename in filenames:
+            entry = entries.get(filename)
+            try:
+                if entry is None or _file_key(os.path.join(self.folder, filename)) != entry['key']:
+                    return False
+            except OSError:
+                return False
+        return True
+
+    def remove(self, filename):
+        # Forget a deleted file; its atlas cell is reclaimed on the next build
+        entries, atlas = self._state
+        if filename in entries:
+            entries = dict(entries)
+            del entries[filename]
+            self._state = (entries, atlas)
+
+    def build(self, filenames):
+        # Rebuild the atlas for exactly these files, reusing cells that are still valid
+        with self._build_lock:
+            self._ensure_loaded()
+            entries, atlas = self._state
+            thumbs = []
+            failed = {}
+            changed = set(entries) != set(filenames)
+            for filename in filenames:
+                path = os.path.join(self.folder, filename)
+                try:
+                    key = _file_key(path)
+                except OSError:
+                    changed = True
+                    continue
+                entry = entries.get(filename)
+                if entry is not None and atlas is not None and entry['key'] == key:
+                    if entry.get('failed'):
+                        failed[filename] = entry
+                    else:
+                        thumbs.append((filename, key, self._crop(atlas, entry)))
+                    continue
+                changed = True
+                try:
+                    image = Image.open(path)
+                    image.thumbnail((self.size, self.size))
+                    thumbs.append((filename, key, image.convert('RGBA')))
+                except Exception as e:
+                    print(f"Error loading image {path}: {e}")
+                    failed[filename] = {'key': key, 'failed': True}
+            if not changed and atlas is not None:
+                return
+
+            rows = max(1, -(-len(thumbs) // ATLAS_COLUMNS))
+            new_atlas = Image.new('RGBA', (ATLAS_COLUMNS * self.size, rows * self.size), (0, 0, 0, 0))
+            new_entries = dict(failed)
+            for slot, (filename, key, image) in enumerate(thumbs):
+                row, col = divmod(slot, ATLAS_COLUMNS)
+                new_atlas.paste(image, (col * self.size, row * self.size))
+                new_entries[filename] = {'key': key, 'slot': slot, 'width': image.width, 'height': image.height}
+
+            self._state = (new_entries, new_atlas)
+            self._save(new_entries, new_atlas)
+
+    def _save(self, entries, atlas):
+        # Write a uniquely named atlas first, then atomically point the index at it
+        try:
+            os.makedirs(self.cache_dir, exist_ok=True)
+            atlas_name = f"atlas_{time.time_ns()}.png"
+            atlas.save(os.path.join(self.cache_dir, atlas_name), compress_level=1)
+            tmp_path = self.index_path + '.tmp'
+            with open(tmp_path, 'w') as f:
+                json.dump({'size': self.size, 'atlas': atlas_name, 'entries': entries}, f)
+            os.replace(tmp_path, self.index_path)
+
+            # Remove atlases that no index points to anymore
+            for name in os.listdir(self.cache_dir):
+                if name.startswith('atlas_') and name != atlas_name:
+                    try:
+                        os.remove(os.path.join(self.cache_dir, name))
+                    except OSError:
+                        pass
+        except OSError as e:
+            print(f"Error saving thumbnail cache in {self.cache_dir}: {e}")
+
+    def build_in_background(self, filenames):
+        thread = Thread(target=self.build, args=(list(filenames),), daemon=True)
+        thread.start()
+        self._build_thread = thread
+        return thread
+
+    def when_ready(self, widget, filenames, callback, interval=100):
+        # Call callback on the Tk thread once thumbnails for filenames are cached
+        if self.is_complete(filenames):
+            callback()
+            return
+        thread = self.build_in_background(filenames)
+
+        def check():
+            if thread.is_alive():
+                widget.after(interval, check)
+            else:
+                callback()
+
+        widget.after(interval, check)
@@ -0,0 +1,122 @@
+"""Tiled inference for small icons.
+
+A full screenshot squeezed into a 640 px model input shrinks 16-32 px tray
+icons to a few pixels. Instead the frame is cut into overlapping tiles at
+native resolution, the tiles go through the model in batches, and the
+per-tile boxes are merged with one vectorized NMS across all tiles.
+"""
+import time
+
+from .lazy import lazy_import
+from .models import LETTERBOX_COLOR, NMS_IOU
+
+np = lazy_import('numpy')
+
+# Adjustable variables
+TILE_SIZE = 640  # Side of each tile in frame pixels; matching the model input keeps icons at full size
+TILE_OVERLAP = 0.2  # Fraction of a tile shared with its neighbour; icons smaller than this overlap appear whole in some tile
+TILE_BATCH = 8  # Tiles per forward pass
+EDGE_MARGIN = 2  # Boxes this close to an inner tile edge are cut off and left to the neighbouring tile
+
+
+def tile_origins(height, width, tile_size=TILE_SIZE, overlap=TILE_OVERLAP):
+    # Top-left corners of overlapping tiles covering the frame; the last row and column are flush with the edge
+    step = max(int(tile_size * (1 - overlap)), 1)
+
+    def starts(length):
+        if length <= tile_size:
+            return np.zeros(1, dtype=np.int64)
+        positions = np.arange(0, length - tile_size, step)
+        return np.append(positions, length - tile_size)
+
+    ys, xs = np.meshgrid(starts(height), starts(width), indexing='ij')
+    return np.stack((xs.ravel(), ys.ravel()), axis=1)
+
+
+def fast_nms(boxes, scores, classes, iou_threshold=NMS_IOU):
+    # Matrix NMS: a box is dropped when any higher scoring box of its class overlaps it too much.
+    # Unlike greedy NMS this needs no loop, at the cost of also dropping boxes whose suppressor was itself dropped.
+    if len(boxes) == 0:
+        return np.empty(0, dtype=np.int64)
+    order = np.argsort(-scores, kind='stable')
+    boxes, classes = boxes[order], classes[order]
+    x1, y1, x2, y2 = boxes.T
+    inter_w = np.clip(np.minimum(x2[:, None], x2[None, :]) - np.maximum(x1[:, None], x1[None, :]), 0, None)
+    inter_h = np.clip(np.minimum(y2[:, None], y2[None, :]) - np.maximum(y1[:, None], y1[None, :]), 0, None)
+    inter = inter_w * inter_h
+    areas = (x2 - x1) * (y2 - y1)
+    iou = inter / np.maximum(areas[:, None] + areas[None, :] - inter, 1e-9)
+    # Only compare each box with better scoring boxes of the same class
+    iou = np.triu(iou * (classes[:, None] == classes[None, :]), k=1)
+    return order[iou.max(axis=0) <= iou_threshold]
+
+
+def _cut_tile(frame, x, y, tile_size):
+    # Crop one tile, padding it to full size when the frame is smaller than a tile
+    tile = frame[y:y + tile_size, x:x + tile_size]
+    if tile.shape[0] == tile_size and tile.shape[1] == tile_size:
+        return tile
+    padded = np.empty((tile_size, tile_size, 3), dtype=frame.dtype)
+    padded[...] = LETTERBOX_COLOR
+    padded[:tile.shape[0], :tile.shape[1]] = tile
+    return padded
+
+
+def tiled_detect(detector, frame, confidence_threshold, tile_size=TILE_SIZE, overlap=TILE_OVERLAP,
+                 batch_size=TILE_BATCH):
+    height, width = frame.shape[:2]
+    origins = tile_origins(height, width, tile_size, overlap)
+    found = []
+    for start in range(0, len(origins), batch_size):
+        batch = origins[start:start + batch_size]
+        tiles = [_cut_tile(frame, x, y, tile_size) for x, y in batch]
+        for (x, y), detections in zip(batch, detector.detect_batch(tiles, confidence_threshold)):
+            if not len(detections):
+                continue
+            # Drop boxes cut by a tile edge that lies inside the frame; the overlap shows them whole elsewhere
+            x1, y1, x2, y2 = detections[:, :4].T
+            cut = (((x1 <= EDGE_MARGIN) & (x > 0)) |
+                   ((y1 <= EDGE_MARGIN) & (y > 0)) |
+                   ((x2 >= tile_size - EDGE_MARGIN) & (x + tile_size < width)) |
+                   ((y2 >= tile_size - EDGE_MARGIN) & (y + tile_size < height)))
+            detections = detections[~cut]
+            detections[:, [0, 2]] += x
+            detections[:, [1, 3]] += y
+            found.append(detections)
+
+    if not found:
+        return np.empty((0, 6), dtype=np.float32)
+    merged = np.concatenate(found)
+    return merged[fast_nms(merged[:, :4], merged[:, 4], merged[:, 5])]
+
+
+class TiledDetector:
+    # Wraps a detector so detect() runs tiled; frames are always used at native resolution, so scale is ignored
+
+    def __init__(self, detector, tile_size=TILE_SIZE, overlap=TILE_OVERLAP, batch_size=TILE_BATCH):
+        self.detector = detector
+        self.names = detector.names
+        self.size = detector.size
+        self.tile_size = tile_size
+        self.overlap = overlap
+        self.batch_size = batch_size
+
+    def detect(self, frame, confidence_threshold, scale=None):
+        return tiled_detect(self.detector, frame, confidence_threshold, self.tile_size, self.overlap,
+                            self.batch_size)
+
+
+def benchmark_tiling(detector, frame, configs, confidence_threshold=0.5, repeats=3):
+    # Time each (tile_size, overlap, batch_size) on the same frame; returns one result dict per config
+    results = []
+    for tile_size, overlap, batch_size in configs:
+        tiles = len(tile_origins(frame.shape[0], frame.shape[1], tile_size, overlap))
+        tiled_detect(detector, frame, confidence_threshold, tile_size, overlap, batch_size)  # Warm up
+        start = time.perf_counter()
+        for _ in range(repeats):
+            detections = tiled_detect(detector, frame, confidence_threshold, tile_size, overlap, batch_size)
+        seconds = (time.perf_counter() - start) / repeats
+        results.append({'tile_size': tile_size, 'overlap': overlap, 'batch_size': batch_size, 'tiles': tiles,
+                        'frame_ms': seconds * 1000, 'tiles_per_second': tiles / seconds,
+                        'detections': len(detections)})
+    return results
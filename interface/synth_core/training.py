@@ -0,0 +1,187 @@
+"""Local queue of YOLOv5 training runs with per-run device and thread allocation.
+
+Each GPU runs one training at a time; CPU runs share the machine's cores up to
+CPU_THREAD_BUDGET threads. Every run gets its own --project/--name folder, so
+best.pt is read from exactly that run instead of the newest folder on disk.
+Progress and validation metrics are parsed from the trainer's output.
+"""
+import os
+import re
+import shutil
+import sys
+import time
+
+from .class_registry import copy_registry
+from .jobs import CANCELLED, FAILED, FINISHED, PENDING, RUNNING, JobRunner
+from .lazy import lazy_import
+from .paths import YOLO_DIR
+
+torch = lazy_import('torch')
+
+# Adjustable variables
+MODEL = 'yolov5s'
+CPU_THREAD_BUDGET = os.cpu_count() or 1  # Threads all CPU runs together may use
+DATALOADER_WORKERS = 4
+
+# yolov5 progress rows start with "epoch/last_epoch", validation rows with "all images instances P R mAP50 mAP50-95"
+EPOCH_PATTERN = re.compile(r'^\s*(\d+)/(\d+)\s')
+METRICS_PATTERN = re.compile(r'^\s*all\s+\d+\s+\d+\s+([\d.]+)\s+([\d.]+)\s+([\d.]+)\s+([\d.]+)')
+
+
+def detect_gpus():
+    # CUDA device ids usable for training; empty on CPU-only machines or without torch
+    try:
+        return list(range(torch.cuda.device_count())) if torch.cuda.is_available() else []
+    except Exception:
+        return []
+
+
+class TrainingRun:
+
+    def __init__(self, run_id, dataset_dir, data_yaml, img_size, batch_size, epochs, device='auto', threads=None):
+        self.run_id = run_id
+        self.dataset_dir = dataset_dir
+        self.data_yaml = data_yaml
+        self.img_size = img_size
+        self.batch_size = batch_size
+        self.epochs = epochs
+        self.requested_device = device
+        self.requested_threads = threads
+        self.device = None
+        self.threads = None
+        self.name = f"{os.path.basename(os.path.normpath(dataset_dir))}_{run_id}_{time.strftime('%Y%m%d_%H%M%S')}"
+        self.project = os.path.join(YOLO_DIR, 'runs', 'train')
+        self.job = None
+        self.status = PENDING
+        self.epoch = None
+        self.metrics = None  # (precision, recall, mAP50, mAP50-95) from the latest validation
+        self.best_weights = None
+
+    @property
+    def run_dir(self):
+        return os.path.join(self.project, self.name)
+
+    def command(self):
+        return [
+            sys.executable, os.path.join(YOLO_DIR, 'train.py'),
+            '--img', str(self.img_size),
+            '--batch', str(self.batch_size),
+            '--epochs', str(self.epochs),
+            '--data', self.data_yaml,
+            '--cfg', os.path.join(YOLO_DIR, 'models', f'{MODEL}.yaml'),
+            '--weights', os.path.join(YOLO_DIR, 'weights', f'{MODEL}.pt'),
+            '--project', self.project,
+            '--name', self.name,
+            '--exist-ok',
+            '--device', self.device,
+            '--workers', str(min(DATALOADER_WORKERS, self.threads)),
+        ]
+
+    def parse_line(self, line):
+        # tqdm redraws with carriage returns, so only the last segment of a line is current
+        text = line.rstrip('\r\n').split('\r')[-1]
+        match = EPOCH_PATTERN.match(text)
+        if match:
+            self.epoch = (int(match.group(1)) + 1, int(match.group(2)) + 1)
+            return
+        match = METRICS_PATTERN.match(text)
+        if match:
+            self.metrics = tuple(float(value) for value in match.groups())
+
+    def describe(self):
+        parts = [f"#{self.run_id} {self.name}", self.status]
+        if self.device is not None:
+            parts.append(f"cuda:{self.device}" if self.device != 'cpu' else f"cpu x{self.threads}")
+        if self.epoch:
+            parts.append(f"epoch {self.epoch[0]}/{self.epoch[1]}")
+        if self.metrics:
+            parts.append("P {:.3f} R {:.3f} mAP50 {:.3f} mAP50-95 {:.3f}".format(*self.metrics))
+        return ' | '.join(parts)
+
+
+class TrainingQueue:
+    # Call poll() periodically from the UI thread; it starts queued runs when their device frees up
+
+    def __init__(self, gpus=None, cpu_threads=CPU_THREAD_BUDGET):
+        self.gpus = detect_gpus() if gpus is None else gpus
+        self.cpu_threads = cpu_threads
+        self.runs = []
+        self.runner = JobRunner()
+        self._jobs = {}
+
+    def submit(self, dataset_dir, data_yaml, img_size, batch_size, epochs, device='auto', threads=None):
+        run = TrainingRun(len(self.runs) + 1, dataset_dir, data_yaml, img_size, batch_size, epochs, device, threads)
+        self.runs.append(run)
+        return run
+
+    def _busy(self):
+        active = [run for run in self.runs if run.status == RUNNING]
+        return {run.device for run in active if run.device != 'cpu'}, sum(run.threads for run in active if run.device == 'cpu')
+
+    def _allocate(self, run):
+        # (device, threads) for the run if its device is free now, else None
+        busy_gpus, cpu_threads_used = self._busy()
+        requested = str(run.requested_device)
+        if requested == 'auto':
+            free = [gpu for gpu in self.gpus if str(gpu) not in busy_gpus]
+            requested = str(free[0]) if free else ('cpu' if not self.gpus else None)
+            if requested is None:
+                return None  # Wait for a GPU rather than fall back to a far slower CPU run
+        if requested != 'cpu':
+            return (requested, run.requested_threads or DATALOADER_WORKERS) if requested not in busy_gpus else None
+        threads = min(run.requested_threads or self.cpu_threads, self.cpu_threads)
+        if cpu_threads_used + threads > self.cpu_threads:
+            return None
+        return 'cpu', threads
+
+    def _start_pending(self):
+        for run in self.runs:
+            if run.status != PENDING:
+                continue
+            allocation = self._allocate(run)
+            if allocation is None:
+                continue
+            run.device, run.threads = allocation
+            thread_env = {name: str(run.threads) for name in ('OMP_NUM_THREADS', 'MKL_NUM_THREADS')}
+            run.job = self.runner.start(run.name, run.command(), cwd=YOLO_DIR, env=thread_env)
+            self._jobs[run.job.job_id] = run
+            run.status = run.job.status
+
+    def cancel(self, run):
+        if run.status == PENDING:
+            run.status = CANCELLED
+        elif run.job is not None:
+            run.job.cancel()
+
+    def cancel_all(self):
+        for run in self.runs:
+            self.cancel(run)
+
+    def poll(self):
+        # Start what fits, parse new output and finish completed runs; returns (lines, completed runs)
+        self._start_pending()
+        lines, completed_jobs = self.runner.poll()
+        for job, stream_name, line in lines:
+            self._jobs[job.job_id].parse_line(line)
+        completed = []
+        for job in completed_jobs:
+            run = self._jobs[job.job_id]
+            run.status = job.status
+            if run.status == FINISHED:
+                self._collect_weights(run)
+            completed.append(run)
+        if completed:
+            self._start_pending()  # Devices freed up
+        return lines, completed
+
+    def _collect_weights(self, run):
+        best_pt_path = os.path.join(run.run_dir, 'weights', 'best.pt')
+        if not os.path.exists(best_pt_path):
+            print(f"best.pt not found in {run.run_dir}. Check if the training completed successfully.")
+            run.status = FAILED
+            return
+        target_dir = os.path.join(run.dataset_dir, 'best_weights')
+        os.makedirs(target_dir, exist_ok=True)
+        run.best_weights = shutil.copy(best_pt_path, target_dir)
+        copy_registry(run.dataset_dir, target_dir)  # model-test and detect_server read class names from here
+        print(f"best.pt copied to: {target_dir}")
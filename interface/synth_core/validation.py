@@ -0,0 +1,158 @@
+"""Fast validation of YOLO label files before training.
+
+Label files are read on a thread pool, which overlaps disk reads, and each
+is parsed into a NumPy array and checked in one vectorized pass. Parsing holds
+the GIL, so UIs run validate_dataset on a worker thread. Class ids must be
+non-negative integers below nc, and boxes must lie inside the image and have
+a positive area. Per-file results do not depend on nc and are cached by mtime
+and size in '.label_validation.json', so re-validating an unchanged dataset
+only costs a directory walk. Images without labels and labels without images
+are reported as orphans.
+"""
+import json
+import os
+from concurrent.futures import ThreadPoolExecutor
+
+from .class_files import NON_LABEL_FILES
+from .lazy import lazy_import
+
+np = lazy_import('numpy')
+
+# Adjustable variables
+CACHE_FILE_NAME = '.label_validation.json'
+VALIDATION_WORKERS = 8
+BOUNDS_TOLERANCE = 1e-6  # Rounding slack for boxes touching the image edge
+MAX_EXAMPLES = 10  # Files listed per problem in the printed report
+IMAGE_EXTENSIONS = ('.png', '.jpg', '.jpeg')
+
+# Per-file result fields, stored as a list in the cache
+FIELDS = ('rows', 'min_class', 'max_class', 'bad_class', 'out_of_bounds', 'zero_area', 'malformed')
+
+
+def check_label_file(path):
+    # Counts of each problem in one label file; classes are checked against nc later
+    with open(path, 'r') as f:
+        text = f.read()
+    try:
+        values = np.array(text.split(), dtype=np.float64)
+    except ValueError:
+        return {'rows': 0, 'min_class': 0, 'max_class': -1, 'bad_class': 0, 'out_of_bounds': 0, 'zero_area': 0,
+                'malformed': 1}
+    malformed = int(values.size % 5 != 0)
+    labels = values[:values.size // 5 * 5].reshape(-1, 5)
+    if not len(labels):
+        return {'rows': 0, 'min_class': 0, 'max_class': -1, 'bad_class': 0, 'out_of_bounds': 0, 'zero_area': 0,
+                'malformed': malformed}
+
+    classes, cx, cy, w, h = labels.T
+    low, high = -BOUNDS_TOLERANCE, 1 + BOUNDS_TOLERANCE
+    out_of_bounds = ((cx - w / 2 < low) | (cx + w / 2 > high) | (cy - h / 2 < low) | (cy + h / 2 > high) |
+                     (labels[:, 1:] < low).any(axis=1) | (labels[:, 1:] > high).any(axis=1))
+    return {
+        'rows': len(labels),
+        'min_class': int(classes.min()),
+        'max_class': int(classes.max()),
+        'bad_class': int(((classes < 0) | (classes != np.floor(classes))).sum()),
+        'out_of_bounds': int(out_of_bounds.sum()),
+        'zero_area': int(((w <= 0) | (h <= 0)).sum()),
+        'malformed': malformed,
+    }
+
+
+def label_path_for(image_path):
+    # YOLOv5's rule: the last /images/ folder becomes /labels/, next to the image otherwise
+    marker = f'{os.sep}images{os.sep}'
+    head, found, tail = image_path.rpartition(marker)
+    if found:
+        image_path = f'{head}{os.sep}labels{os.sep}{tail}'
+    return os.path.splitext(image_path)[0] + '.txt'
+
+
+def scan_dataset(dataset_dir):
+    # {path: (mtime_ns, size)} for label files, and the list of image paths, skipping hidden folders
+    labels, images = {}, []
+    for directory, dirs, files in os.walk(dataset_dir):
+        dirs[:] = [d for d in dirs if not d.startswith('.')]
+        for f in files:
+            path = os.path.join(directory, f)
+            if f.endswith('.txt') and f not in NON_LABEL_FILES:
+                stat = os.stat(path)
+                labels[path] = (stat.st_mtime_ns, stat.st_size)
+            elif f.lower().endswith(IMAGE_EXTENSIONS):
+                images.append(path)
+    return labels, images
+
+
+def _load_cache(cache_path):
+    try:
+        with open(cache_path, 'r') as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return {}
+
+
+def validate_dataset(dataset_dir, nc, workers=VALIDATION_WORKERS):
+    dataset_dir = os.path.abspath(dataset_dir)
+    labels, images = scan_dataset(dataset_dir)
+    cache_path = os.path.join(dataset_dir, CACHE_FILE_NAME)
+    cache = _load_cache(cache_path)
+
+    # Reuse cached results for unchanged files and parse the rest in parallel
+    results, stale = {}, []
+    for path, key in labels.items():
+        relative = os.path.relpath(path, dataset_dir)
+        entry = cache.get(relative)
+        if entry is not None and entry[:2] == list(key):
+            results[path] = dict(zip(FIELDS, entry[2:]))
+        else:
+            stale.append(path)
+    with ThreadPoolExecutor(max_workers=workers) as executor:
+        for path, result in zip(stale, executor.map(check_label_file, stale, chunksize=256)):
+            results[path] = result
+
+    if stale or len(cache) != len(labels):
+        new_cache = {os.path.relpath(path, dataset_dir): list(labels[path]) + [results[path][k] for k in FIELDS]
+                     for path in labels}
+        try:
+            tmp_path = cache_path + '.tmp'
+            with open(tmp_path, 'w') as f:
+                json.dump(new_cache, f)
+            os.replace(tmp_path, cache_path)
+        except OSError as e:
+            print(f"Could not save {cache_path}: {e}")
+
+    # Whole-dataset checks on the per-file summaries
+    paths = list(results)
+    table = np.array([[results[p][k] for k in FIELDS] for p in paths], dtype=np.int64).reshape(-1, len(FIELDS))
+    column = {k: table[:, i] for i, k in enumerate(FIELDS)}
+    has_rows = column['rows'] > 0
+    problems = {
+        'class_out_of_range': has_rows & ((column['max_class'] >= nc) | (column['min_class'] < 0)),
+        'non_integer_class': column['bad_class'] > 0,
+        'out_of_bounds': column['out_of_bounds'] > 0,
+        'zero_area': column['zero_area'] > 0,
+        'malformed': column['malformed'] > 0,
+    }
+    report = {name: [paths[i] for i in np.flatnonzero(mask)] for name, mask in problems.items()}
+
+    expected_labels = {label_path_for(image): image for image in images}
+    report['images_without_labels'] = sorted(image for label, image in expected_labels.items() if label not in labels)
+    report['labels_without_images'] = sorted(label for label in labels if label not in expected_labels)
+    report['files'] = len(labels)
+    report['rows'] = int(column['rows'].sum())
+    report['reparsed'] = len(stale)
+    return report
+
+
+def format_report(report, nc):
+    problems = [k for k in report if isinstance(report[k], list) and report[k]]
+    lines = [f"Checked {report['files']} label files ({report['rows']} boxes, {report['reparsed']} re-read) against nc={nc}"]
+    for name in problems:
+        files = report[name]
+        lines.append(f"{name.replace('_', ' ')}: {len(files)} files")
+        lines.extend(f"  {f}" for f in files[:MAX_EXAMPLES])
+        if len(files) > MAX_EXAMPLES:
+            lines.append(f"  ... and {len(files) - MAX_EXAMPLES} more")
+    if not problems:
+        lines.append("All annotation files are valid.")
+    return '\n'.join(lines)
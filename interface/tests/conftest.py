@@ -0,0 +1,5 @@
+import os
+import sys
+
+# Tests import synth_core the way the tools do, with interface/ on the path
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
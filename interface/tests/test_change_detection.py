@@ -0,0 +1,20 @@
+"""Tile-level frame differencing used to skip unchanged screen regions."""
+import numpy as np
+
+from synth_core.change_detection import changed_tiles
+
+
+def test_identical_frames_have_no_changed_tiles():
+    frame = np.random.default_rng(0).integers(0, 255, (100, 130, 3), dtype=np.uint8)
+    tiles = changed_tiles(frame, frame.copy(), tile_size=32)
+    assert tiles.shape == (4, 5)  # Partial tiles at the right and bottom edges count
+    assert not tiles.any()
+
+
+def test_single_pixel_change_marks_its_tile():
+    frame = np.zeros((100, 130, 3), dtype=np.uint8)
+    changed = frame.copy()
+    changed[99, 129, 2] = 1  # Last pixel, in the partial corner tile
+    changed[40, 10, 0] = 255
+    tiles = changed_tiles(changed, frame, tile_size=32)
+    assert sorted(zip(*np.nonzero(tiles))) == [(1, 0), (3, 4)]
@@ -0,0 +1,55 @@
+"""Compiled class registry shared by generation, training and inference."""
+import os
+
+import pytest
+
+from synth_core import class_registry
+from synth_core.class_files import CLASS_FILE_NAME
+from synth_core.class_registry import REGISTRY_FILE_NAME, ClassRegistry, compile_registry
+
+CLASS_FILE = "0    chrome\n1    un-labeled\n2    slack\n5    chrome\n"
+
+
+def test_duplicate_labels_share_one_class_id():
+    registry = compile_registry({5: 'chrome', 0: 'chrome', 2: 'slack', 1: 'un-labeled'})
+    assert registry.names == ('chrome', 'un-labeled', 'slack')
+    assert dict(registry.icon_classes) == {0: 0, 1: 1, 2: 2, 5: 0}
+    assert registry.class_for_icon(5) == 0 and registry.class_for_icon(9) is None
+    assert registry.name(2) == 'slack' and registry.name(7) == "Unknown"
+
+
+def test_version_depends_only_on_the_table():
+    a = compile_registry({0: 'chrome', 1: 'slack'}, source_hash='x')
+    b = ClassRegistry.from_json(a.to_json())
+    assert a.version == b.version and a == b
+    assert compile_registry({0: 'slack', 1: 'chrome'}).version != a.version
+    assert compile_registry({0: 'chrome', 2: 'slack'}).version != a.version
+
+
+def test_registry_is_read_only():
+    registry = compile_registry({0: 'chrome'})
+    with pytest.raises(TypeError):
+        registry.mapping[1] = 'slack'
+    with pytest.raises(AttributeError):
+        registry.version = 'other'
+
+
+def test_load_compiles_once_and_never_rewrites_the_class_file(tmp_path):
+    (tmp_path / CLASS_FILE_NAME).write_text(CLASS_FILE)
+    registry = class_registry.load_registry(str(tmp_path))
+    assert class_registry.load_registry(str(tmp_path)) is registry
+    assert (tmp_path / CLASS_FILE_NAME).read_text() == CLASS_FILE
+    assert (tmp_path / REGISTRY_FILE_NAME).exists()
+
+
+def test_copies_and_parent_lookup_keep_the_version(tmp_path):
+    icons, weights = tmp_path / 'icons', tmp_path / 'best_weights'
+    icons.mkdir()
+    (weights / 'best_openvino_model').mkdir(parents=True)
+    (icons / CLASS_FILE_NAME).write_text(CLASS_FILE)
+    registry = class_registry.copy_registry(str(icons), str(weights))
+    os.remove(weights / CLASS_FILE_NAME)  # Only the compiled table is left
+
+    found = class_registry.find_registry(str(weights / 'best_openvino_model'), levels=2)
+    assert found == registry
+    assert not class_registry.load_registry(str(tmp_path / 'missing'))
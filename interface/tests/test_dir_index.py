@@ -0,0 +1,37 @@
+"""DirectoryIndex scanning and recovery from dropped filesystem events."""
+from synth_core.dir_index import IN_Q_OVERFLOW, SYNTH_DIR_NAME, DirectoryIndex
+
+
+def make_tree(base):
+    (base / 'a' / SYNTH_DIR_NAME / 'run_1').mkdir(parents=True)
+    (base / 'b').mkdir()
+    (base / 'a' / 'icon_1.png').touch()
+    (base / 'a' / SYNTH_DIR_NAME / 'run_1' / 'desktop_0.png').touch()
+
+
+def test_initial_scan(tmp_path):
+    make_tree(tmp_path)
+    index = DirectoryIndex(str(tmp_path), backend='poll')
+    index._rescan(())
+    assert index.folders() == ['a', 'b']
+    assert index.icons('a') == ['icon_1.png']
+    assert index.runs('a') == ['run_1']
+    assert index.images('a', 'run_1') == ['desktop_0.png']
+
+
+def test_overflow_relists_known_directories(tmp_path):
+    make_tree(tmp_path)
+    index = DirectoryIndex(str(tmp_path), backend='poll')
+    index._rescan(())
+
+    # Changes whose events were lost: files in folders the index already knows, and a removed folder
+    (tmp_path / 'a' / 'icon_2.png').touch()
+    (tmp_path / 'a' / SYNTH_DIR_NAME / 'run_1' / 'desktop_0.png').unlink()
+    (tmp_path / 'a' / SYNTH_DIR_NAME / 'run_1' / 'desktop_1.png').touch()
+    (tmp_path / 'b').rmdir()
+
+    index._handle_event(-1, IN_Q_OVERFLOW, '')
+    assert index.folders() == ['a']
+    assert index.icons('a') == ['icon_1.png', 'icon_2.png']
+    assert index.images('a', 'run_1') == ['desktop_1.png']
+    assert ('b',) not in index._mtimes
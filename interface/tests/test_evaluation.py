@@ -0,0 +1,64 @@
+from types import SimpleNamespace
+
+import numpy as np
+import pytest
+
+from synth_core import evaluation
+
+
+class NoDetector:
+    size = 640
+
+    def detect_batch(self, images, confidence_threshold, scale=None):
+        raise AssertionError("the detector must not run without images")
+
+
+def test_empty_val_folder_raises(tmp_path):
+    (tmp_path / 'images' / 'val').mkdir(parents=True)
+    with pytest.raises(ValueError, match="No images found"):
+        evaluation.evaluate(NoDetector(), str(tmp_path))
+
+
+def test_unreadable_images_raise(tmp_path, monkeypatch):
+    # A val.txt whose images are all stale or corrupt leaves nothing to score
+    for i in range(3):
+        (tmp_path / f'desktop_{i}.png').write_bytes(b'not a png')
+        (tmp_path / f'desktop_{i}.txt').write_text('0 0.5 0.5 0.1 0.1\n')
+    (tmp_path / 'val.txt').write_text(''.join(f'desktop_{i}.png\n' for i in range(3)))
+    monkeypatch.setattr(evaluation, 'cv2', SimpleNamespace(imread=lambda path: None))
+    with pytest.raises(ValueError, match="could be read"):
+        evaluation.evaluate(NoDetector(), str(tmp_path), workers=1)
+
+
+def test_match_detections_respects_class_and_iou():
+    classes = np.array([0, 1])
+    boxes = np.array([[0, 0, 10, 10], [20, 20, 30, 30]], dtype=np.float64)
+    detections = np.array([[0, 0, 10, 10, 0.9, 0],  # Exact hit
+                           [20, 20, 30, 30, 0.8, 0],  # Right place, wrong class
+                           [0, 0, 10, 12, 0.7, 0]])  # Duplicate of the first label
+    correct = evaluation.match_detections(detections, classes, boxes)
+    assert correct.shape == (3, len(evaluation.IOU_THRESHOLDS))
+    assert correct[0].all()
+    assert not correct[1].any()
+    assert not correct[2].any()
+
+
+def test_perfect_detections_score_yolov5s_top_ap():
+    correct = np.ones((4, len(evaluation.IOU_THRESHOLDS)), dtype=bool)
+    confidences = np.array([0.9, 0.8, 0.7, 0.6])
+    predicted = np.array([0, 0, 1, 1])
+    result = evaluation.ap_per_class(correct, confidences, predicted, np.array([0, 0, 1, 1]))
+    for class_result in result.values():
+        # yolov5's 101-point trapezoid over the (1, 0) sentinel tops out at 0.995, and these must match val.py
+        assert class_result['ap50'] == pytest.approx(0.995)
+        assert class_result['ap'] == pytest.approx(0.995)
+        assert class_result['precision'] == 1.0 and class_result['recall'] == 1.0
+
+
+def test_missed_labels_lower_recall():
+    correct = np.array([[True] * len(evaluation.IOU_THRESHOLDS)])
+    result = evaluation.ap_per_class(correct, np.array([0.9]), np.array([0]), np.array([0, 0]))
+    assert result[0]['instances'] == 2
+    assert result[0]['recall'] == 0.5
+    # Precision stays 1 up to recall 0.5, then the envelope falls linearly to the (1, 0) sentinel
+    assert result[0]['ap50'] == pytest.approx(0.75, abs=0.01)
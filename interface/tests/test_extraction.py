@@ -0,0 +1,55 @@
+"""merge_boxes and the sweep that finds overlapping box pairs."""
+import numpy as np
+
+from synth_core.extraction import MERGE_OVERLAP, merge_boxes, overlapping_pairs
+
+
+def xywh(*boxes):
+    return np.array(boxes, dtype=np.int64).reshape(-1, 4)
+
+
+def brute_force_pairs(x1, y1, x2, y2, overlap=MERGE_OVERLAP):
+    pairs = set()
+    area = (x2 - x1) * (y2 - y1)
+    for i in range(len(x1)):
+        for j in range(i + 1, len(x1)):
+            inter = max(0, min(x2[i], x2[j]) - max(x1[i], x1[j])) * max(0, min(y2[i], y2[j]) - max(y1[i], y1[j]))
+            if inter > 0 and inter >= overlap * min(area[i], area[j]):
+                pairs.add((i, j))
+    return pairs
+
+
+def test_nested_and_overlapping_boxes_merge():
+    merged = merge_boxes(xywh((10, 10, 50, 50), (20, 20, 10, 10), (40, 40, 30, 30)))
+    assert merged.tolist() == [[10, 10, 60, 60]]
+
+
+def test_chains_merge_transitively():
+    # a overlaps b and b overlaps c, but a and c do not touch
+    merged = merge_boxes(xywh((0, 0, 40, 40), (20, 0, 40, 40), (40, 0, 40, 40)))
+    assert merged.tolist() == [[0, 0, 80, 40]]
+
+
+def test_small_overlap_and_disjoint_boxes_stay_apart():
+    boxes = xywh((0, 0, 100, 100), (95, 0, 100, 100), (300, 300, 20, 20))
+    merged = merge_boxes(boxes)
+    assert len(merged) == 3
+    # Top-to-bottom, then left-to-right
+    assert merged[:, :2].tolist() == [[0, 0], [95, 0], [300, 300]]
+
+
+def test_empty_and_single_box():
+    assert merge_boxes(xywh()).shape == (0, 4)
+    assert merge_boxes(xywh((5, 6, 7, 8))).tolist() == [[5, 6, 7, 8]]
+
+
+def test_sweep_finds_the_same_pairs_as_all_against_all():
+    rng = np.random.default_rng(0)
+    for _ in range(20):
+        xy = rng.integers(0, 400, (60, 2))
+        wh = rng.integers(5, 80, (60, 2))
+        x1, y1 = xy[:, 0], xy[:, 1]
+        x2, y2 = x1 + wh[:, 0], y1 + wh[:, 1]
+        i, j = overlapping_pairs(x1, y1, x2, y2)
+        found = {(min(a, b), max(a, b)) for a, b in zip(i.tolist(), j.tolist())}
+        assert found == brute_force_pairs(x1, y1, x2, y2)
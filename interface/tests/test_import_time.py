@@ -0,0 +1,43 @@
+"""Import-time budget for synth_core: tool windows must open before heavy libraries load."""
+import os
+import subprocess
+import sys
+
+import pytest
+
+INTERFACE_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+MODULES = sorted(f[:-len('.py')] for f in os.listdir(os.path.join(INTERFACE_DIR, 'synth_core'))
+                 if f.endswith('.py') and f != '__init__.py')
+
+# Adjustable variables
+IMPORT_BUDGET_MS = 200  # Cumulative import time allowed per module, including synth_core itself
+HEAVY_MODULES = ('cv2', 'numpy', 'torch', 'PIL', 'sklearn', 'pyautogui', 'mss', 'onnxruntime', 'openvino')
+
+CHECK = """
+import sys
+import synth_core.{module}
+loaded = [name for name in {heavy!r} if name in sys.modules]
+print(','.join(loaded))
+"""
+
+
+def import_module(module):
+    # Import the module in a fresh interpreter; returns (heavy modules loaded, cumulative import time in ms)
+    result = subprocess.run([sys.executable, '-X', 'importtime', '-c', CHECK.format(module=module, heavy=HEAVY_MODULES)],
+                            cwd=INTERFACE_DIR, capture_output=True, text=True, timeout=60)
+    assert result.returncode == 0, result.stderr
+    # -X importtime lines look like "import time:   self [us] | cumulative | imported package"
+    cumulative_us = 0
+    for line in result.stderr.splitlines():
+        parts = [part.strip() for part in line.split(':', 1)[-1].split('|')]
+        if line.startswith('import time:') and len(parts) == 3 and parts[2].lstrip() == f'synth_core.{module}':
+            cumulative_us = int(parts[1])
+    loaded = [name for name in result.stdout.strip().split(',') if name]
+    return loaded, cumulative_us / 1000
+
+
+@pytest.mark.parametrize('module', MODULES)
+def test_import_is_lazy_and_fast(module):
+    loaded, import_ms = import_module(module)
+    assert not loaded, f"importing synth_core.{module} loaded {loaded}"
+    assert 0 < import_ms < IMPORT_BUDGET_MS, f"synth_core.{module} took {import_ms:.1f}ms to import"
@@ -0,0 +1,39 @@
+"""LabelStore journal replay, crash recovery and snapshots."""
+from synth_core.class_files import load_finalized_class_file
+from synth_core.label_store import JOURNAL_NAME, LabelStore
+
+
+def test_journal_is_replayed_on_open(tmp_path):
+    store = LabelStore(str(tmp_path))
+    store.set_label('icon_1.png', 'chrome')
+    store.set_label('icon_2.png', 'slack')
+    store.delete('icon_1.png')
+    store._journal.close()
+
+    reopened = LabelStore(str(tmp_path))
+    assert reopened.labels == {'icon_2.png': 'slack'}
+    assert reopened.finalized == {2: 'slack'}
+    assert reopened.journal_entries == 3
+
+
+def test_partial_last_line_does_not_swallow_the_next_change(tmp_path):
+    store = LabelStore(str(tmp_path))
+    store.set_label('icon_1.png', 'chrome')
+    store._journal.close()
+    with open(tmp_path / JOURNAL_NAME, 'a') as f:
+        f.write('{"op": "set", "ima')  # Crash mid-write
+
+    store = LabelStore(str(tmp_path))
+    store.set_label('icon_2.png', 'slack')
+    store._journal.close()
+
+    assert LabelStore(str(tmp_path)).labels == {'icon_1.png': 'chrome', 'icon_2.png': 'slack'}
+
+
+def test_flush_snapshots_writes_the_class_file(tmp_path):
+    store = LabelStore(str(tmp_path))
+    store.set_label('icon_3.png', 'chrome')
+    store.flush_snapshots()
+    assert load_finalized_class_file(store.class_file) == {3: 'chrome'}
+    assert store.journal_entries == 0
+    store.close()
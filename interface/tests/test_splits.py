@@ -0,0 +1,51 @@
+"""Hash-based train/val splits and the files they leave in a dataset folder."""
+import os
+
+from synth_core import dataset_stats, splits
+from synth_core.evaluation import dataset_pairs
+
+
+def make_dataset(folder, count, start=0):
+    for i in range(start, start + count):
+        (folder / f'synthetic_desktop_{i}.png').write_bytes(b'png')
+        (folder / f'synthetic_desktop_{i}.txt').write_text('0 0.5 0.5 0.1 0.1\n')
+
+
+def test_assignment_is_stable_as_the_dataset_grows(tmp_path):
+    make_dataset(tmp_path, 50)
+    before = splits.assign_splits(str(tmp_path))
+    make_dataset(tmp_path, 50, start=50)
+    after = splits.assign_splits(str(tmp_path))
+    for split in splits.SPLIT_NAMES:
+        assert set(before[split]) <= set(after[split])
+    assert 0 < len(after['val']) < len(after['train'])
+
+
+def test_small_datasets_always_get_a_val_image(tmp_path):
+    make_dataset(tmp_path, 2)
+    for salt in range(20):
+        assigned = splits.assign_splits(str(tmp_path), salt=str(salt))
+        assert len(assigned['val']) >= 1 and len(assigned['train']) >= 1
+
+
+def test_single_image_dataset_has_no_val_image(tmp_path):
+    # train.py refuses to queue this case instead of letting YOLOv5 fail later
+    make_dataset(tmp_path, 1)
+    assert splits.assign_splits(str(tmp_path)) == {'train': ['synthetic_desktop_0.png'], 'val': []}
+
+
+def test_split_lists_are_not_read_as_labels(tmp_path):
+    make_dataset(tmp_path, 6)
+    train_list, val_list = splits.write_split_lists(str(tmp_path))
+    with open(val_list) as f:
+        assert len(f.read().split()) >= 1
+    assert len(dataset_stats.label_files(str(tmp_path))) == 6
+    assert dataset_stats.scan_run(str(tmp_path), (1920, 1080)).images == 6
+    assert len(splits.labeled_images(str(tmp_path))) == 6
+
+
+def test_evaluation_reads_the_val_list(tmp_path):
+    make_dataset(tmp_path, 10)
+    splits.write_split_lists(str(tmp_path))
+    val = {os.path.basename(image) for image, _ in dataset_pairs(str(tmp_path))}
+    assert val == set(splits.assign_splits(str(tmp_path))['val'])
@@ -0,0 +1,30 @@
+"""Thumbnail atlas cache, including icons that cannot be decoded."""
+import pytest
+
+pytest.importorskip('PIL')
+from PIL import Image
+
+from synth_core.thumbnails import ThumbnailCache
+
+
+def test_undecodable_icon_counts_as_cached(tmp_path):
+    Image.new('RGB', (80, 80), 'red').save(tmp_path / 'icon_0.png')
+    (tmp_path / 'icon_1.png').write_bytes(b'not a png')
+    names = ['icon_0.png', 'icon_1.png']
+
+    ThumbnailCache(str(tmp_path)).build(names)
+    reopened = ThumbnailCache(str(tmp_path))
+    assert reopened.is_complete(names)
+    assert reopened.get('icon_1.png') is None
+    assert reopened.get('icon_0.png').size == (50, 50)
+
+
+def test_changed_icon_is_retried(tmp_path):
+    (tmp_path / 'icon_0.png').write_bytes(b'not a png')
+    cache = ThumbnailCache(str(tmp_path))
+    cache.build(['icon_0.png'])
+
+    Image.new('RGB', (20, 30), 'blue').save(tmp_path / 'icon_0.png')
+    assert not cache.is_complete(['icon_0.png'])
+    cache.build(['icon_0.png'])
+    assert cache.get('icon_0.png').size == (20, 30)
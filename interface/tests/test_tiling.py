@@ -0,0 +1,47 @@
+"""Matrix NMS and tiled detection across tile edges."""
+import numpy as np
+
+from synth_core.tiling import fast_nms, tile_origins, tiled_detect
+
+
+class IconFinder:
+    # Stand-in detector: reports the bounding box of the white pixels in each tile, cut off at the tile edge
+    names = {0: 'icon'}
+    size = 640
+
+    def detect_batch(self, tiles, confidence_threshold):
+        results = []
+        for tile in tiles:
+            ys, xs = np.nonzero(tile[:, :, 0] == 255)
+            if len(xs):
+                results.append(np.array([[xs.min(), ys.min(), xs.max() + 1, ys.max() + 1, 0.9, 0]], dtype=np.float32))
+            else:
+                results.append(np.empty((0, 6), dtype=np.float32))
+        return results
+
+
+def test_fast_nms_suppresses_same_class_overlaps_only():
+    boxes = np.array([[0, 0, 10, 10], [1, 1, 11, 11], [0, 0, 10, 10], [50, 50, 60, 60]], dtype=np.float32)
+    scores = np.array([0.9, 0.8, 0.7, 0.6])
+    classes = np.array([0, 0, 1, 0])
+    assert sorted(fast_nms(boxes, scores, classes).tolist()) == [0, 2, 3]
+    assert len(fast_nms(boxes[:0], scores[:0], classes[:0])) == 0
+
+
+def test_tile_origins_cover_the_frame():
+    origins = tile_origins(1000, 1000, tile_size=640, overlap=0.2)
+    assert sorted(set(origins[:, 0].tolist())) == [0, 360]
+    assert len(origins) == 4
+    assert tile_origins(300, 400, tile_size=640).tolist() == [[0, 0]]
+
+
+def test_icons_on_tile_edges_and_in_overlaps_are_found_once():
+    frame = np.zeros((1000, 1000, 3), dtype=np.uint8)
+    frame[100:150, 600:660] = 255  # Crosses the inner edge of the first tile column
+    detections = tiled_detect(IconFinder(), frame, 0.5, tile_size=640, overlap=0.2)
+    assert detections[:, :4].tolist() == [[600, 100, 660, 150]]
+
+    frame[:] = 0
+    frame[100:150, 400:450] = 255  # Whole in both tile columns
+    detections = tiled_detect(IconFinder(), frame, 0.5, tile_size=640, overlap=0.2)
+    assert detections[:, :4].tolist() == [[400, 100, 450, 150]]
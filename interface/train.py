@@ -1,11 +1,18 @@
 import os
 import shutil
-from sklearn.model_selection import train_test_split
+import signal
 import tkinter as tk
+from threading import Thread
 from tkinter import ttk, filedialog, messagebox
 from tkinter import StringVar
-import subprocess
 import warnings
+from synth_core import class_registry, splits, training, validation
+from synth_core.jobs import FINISHED
+from synth_core.lazy import lazy_import
+from synth_core.paths import YOLO_DIR
+
+# scikit-learn takes a while to import, so only load it when a dataset is split
+model_selection = lazy_import('sklearn.model_selection')
 
 # Suppress libpng warnings about incorrect sRGB profiles
 warnings.filterwarnings("ignore", message=".*iCCP: known incorrect sRGB profile.*")
@@ -15,21 +22,10 @@ root = tk.Tk()
 root.title("YOLOv5 Training Setup")
 
 def check_annotation_files(annotation_dir, nc):
-    errors_found = False
-    for root, dirs, files in os.walk(annotation_dir):
-        for file in files:
-            if file.endswith('.txt'):
-                with open(os.path.join(root, file), 'r') as f:
-                    lines = f.readlines()
-                    for line in lines:
-                        class_id = int(line.split()[0])
-                        if class_id >= nc:
-                            print(f"Error: Class ID {class_id} in file {file} exceeds nc={nc - 1}")
-                            errors_found = True
-    if not errors_found:
-        print("All annotation files are within the expected class ID range.")
-    else:
-        print("Errors found in annotation files.")
+    # Cached check of every label file plus orphaned images and labels; returns True when all is well
+    report = validation.validate_dataset(annotation_dir, nc)
+    print(validation.format_report(report, nc))
+    return not any(isinstance(files, list) and files for files in report.values())
 
 def browse_directory():
     dir_path = filedialog.askdirectory(initialdir=os.getcwd(), title="Select Dataset Directory")
@@ -51,7 +47,14 @@ def check_existing_split(dataset_dir):
             return train_img_dir, val_img_dir
     return None, None
 
-def split_dataset(dataset_dir):
+def split_dataset(dataset_dir, mode):
+    # List files and hardlinks leave the generated files in place; the hash-based assignment is stable as the set grows
+    # Runs off the Tk thread, so problems are printed and reported by the caller
+    if mode != 'move' and splits.labeled_images(dataset_dir):
+        if mode == 'lists':
+            return splits.write_split_lists(dataset_dir)
+        return splits.link_splits(dataset_dir)
+
     image_dir = os.path.join(dataset_dir, 'images')
     label_dir = os.path.join(dataset_dir, 'labels')
 
@@ -63,7 +66,7 @@ def split_dataset(dataset_dir):
     all_labels = [os.path.join(dataset_dir, f) for f in os.listdir(dataset_dir) if f.endswith('.txt')]
 
     if not all_images or not all_labels:
-        messagebox.showerror("Error", "No images or labels found in the selected directory.")
+        print("No images or labels found in the selected directory.")
         return None, None
 
     train_img_dir = os.path.join(image_dir, 'train')
@@ -76,7 +79,7 @@ def split_dataset(dataset_dir):
     os.makedirs(train_lbl_dir, exist_ok=True)
     os.makedirs(val_lbl_dir, exist_ok=True)
 
-    train_images, val_images = train_test_split(all_images, test_size=0.2, random_state=42)
+    train_images, val_images = model_selection.train_test_split(all_images, test_size=0.2, random_state=42)
     train_labels = [img.replace('.png', '.txt') for img in train_images]
     val_labels = [img.replace('.png', '.txt') for img in val_images]
 
@@ -90,42 +93,35 @@ def split_dataset(dataset_dir):
 
     return train_img_dir, val_img_dir
 
+def split_image_count(split_path):
+    # Images in a split: lines of a train.txt/val.txt list, or image files in an images/<split> folder
+    if os.path.isfile(split_path):
+        with open(split_path, 'r') as f:
+            return sum(1 for line in f if line.strip())
+    return sum(1 for f in os.listdir(split_path) if f.lower().endswith(('.png', '.jpg', '.jpeg')))
+
 def load_class_names(dataset_dir):
-    # Correct the path to finalized_class.txt based on your structure
-    class_file_path = os.path.join(dataset_dir, 'finalized_class.txt')
-
-    class_names = []
-
-    if os.path.exists(class_file_path):
-        with open(class_file_path, 'r') as f:
-            for line in f:
-                parts = line.strip().split(maxsplit=1)
-                if len(parts) == 2:
-                    class_id, class_name = parts
-                    class_names.append(class_name)
-    else:
-        print(f"Error: The file 'finalized_class.txt' does not exist at path: {class_file_path}")
-
-    # Verify classes are not empty and add unique identifiers
-    if not class_names:
+    # Compiled registry copied in by the generator, so names line up with the label ids
+    registry = class_registry.load_registry(dataset_dir)
+
+    if not registry:
         messagebox.showerror("Error", "No valid class names found in the finalized class file.")
-        return ['icon']  # Default class name if no class file is found
+        return class_registry.ClassRegistry(['icon'], {})  # Default class name if no class file is found
 
-    print(f"Loaded classes from finalized_class.txt: {class_names}")
-    return class_names
+    print(f"Loaded {len(registry)} classes (version {registry.version}): {list(registry.names)}")
+    return registry
 
-def create_data_yaml(train_path, val_path, class_names):
+def create_data_yaml(train_path, val_path, registry):
     train_path = train_path.replace('\\', '/')
     val_path = val_path.replace('\\', '/')
 
-    unique_class_names = list(set(class_names))  # Ensure class names are unique
-
+    # Names stay in class id order; the registry already made them unique
     data_yaml_content = f"""
 train: {train_path}
 val: {val_path}
 
-nc: {len(unique_class_names)}  # Number of classes
-names: {unique_class_names}  # Class names
+nc: {len(registry)}  # Number of classes
+names: {list(registry.names)}  # Class names, class registry version {registry.version}
 """
     data_yaml_path = os.path.join(os.path.dirname(train_path), 'data.yaml').replace('\\', '/')
     with open(data_yaml_path, 'w') as f:
@@ -140,55 +136,105 @@ def start_training():
         messagebox.showerror("Error", "Please select a valid dataset directory.")
         return
 
-    class_names = load_class_names(dataset_dir)
+    try:
+        threads = int(threads_var.get()) if threads_var.get().strip() else None
+    except ValueError:
+        messagebox.showerror("Error", "Threads must be a whole number or left empty.")
+        return
 
-    train_path, val_path = split_dataset(dataset_dir)
+    registry = load_class_names(dataset_dir)
+    # Read the form now; splitting and validating a large run happen on a worker thread
+    settings = dict(img_size=img_size.get(), batch_size=batch_size.get(), epochs=epochs.get(),
+                    device=device_var.get(), threads=threads)
+    mode = split_mode.get()
+    result = {}
+
+    def prepare():
+        try:
+            result['paths'] = split_dataset(dataset_dir, mode)
+            if all(result['paths']):
+                result['val_images'] = split_image_count(result['paths'][1])
+                result['valid'] = check_annotation_files(dataset_dir, len(registry))
+        except Exception as e:
+            result['error'] = e
+
+    queue_button.state(['disabled'])
+    status_var.set("Splitting and checking the dataset...")
+    thread = Thread(target=prepare, daemon=True)
+    thread.start()
+    root.after(100, finish_start_training, thread, result, dataset_dir, registry, settings)
+
+def finish_start_training(thread, result, dataset_dir, registry, settings):
+    if thread.is_alive():
+        root.after(100, finish_start_training, thread, result, dataset_dir, registry, settings)
+        return
+    queue_button.state(['!disabled'])
+    status_var.set("")
+    if 'error' in result:
+        messagebox.showerror("Error", f"Could not prepare the dataset: {result['error']}")
+        return
+    train_path, val_path = result['paths']
     if not train_path or not val_path:
+        messagebox.showerror("Error", "No images or labels found in the selected directory.")
         return
+    if not result['val_images']:
+        # YOLOv5 only fails on an empty val set well into the run, so stop here
+        status_var.set("The val split is empty; at least two labeled images are needed.")
+        return
+
+    if not result['valid']:
+        if not messagebox.askyesno("Annotation Problems",
+                                   "Some annotation files have problems (details in the console). Train anyway?"):
+            return
+
+    data_yaml = create_data_yaml(train_path, val_path, registry)
+
+    # Queued runs start as soon as their device is free; poll_training picks up progress and results
+    run = training_queue.submit(dataset_dir, data_yaml, settings['img_size'], settings['batch_size'], settings['epochs'],
+                                device=settings['device'], threads=settings['threads'])
+    print(f"Queued training run #{run.run_id} ({run.name}) on device '{settings['device']}'")
+    refresh_runs()
+
+def refresh_runs():
+    runs_list.delete(0, tk.END)
+    for run in training_queue.runs:
+        runs_list.insert(tk.END, run.describe())
+
+def poll_training():
+    lines, completed = training_queue.poll()
+    for job, stream_name, line in lines:
+        if line.strip():
+            print(f"[{job.name}] {line}", end='' if line.endswith(('\n', '\r')) else '\n')
+    if lines or completed:
+        refresh_runs()
+    for run in completed:
+        if run.status == FINISHED:
+            messagebox.showinfo("Training Complete", f"Run #{run.run_id} finished. Weights copied to: {run.best_weights}")
+        else:
+            messagebox.showerror("Error", f"Run #{run.run_id} {run.status}. Check the console for details.")
+    root.after(500, poll_training)
+
+def cancel_selected_run():
+    for index in runs_list.curselection():
+        training_queue.cancel(training_queue.runs[index])
+    refresh_runs()
+
+def on_close():
+    training_queue.cancel_all()
+    root.destroy()
 
-    data_yaml = create_data_yaml(train_path, val_path, class_names)
-
-    command = [
-        'python', os.path.join(YOLO_DIR, 'train.py'),
-        '--img', img_size.get(),
-        '--batch', batch_size.get(),
-        '--epochs', epochs.get(),
-        '--data', data_yaml,
-        '--cfg', os.path.join(YOLO_DIR, 'models', f'{MODEL}.yaml'),
-        '--weights', os.path.join(YOLO_DIR, 'weights', f'{MODEL}.pt'),
-        '--name', 'icon_detection_test',
-        '--device', '0',
-    ]
-
-    print(f"Running training command: {' '.join(command)}")
-    result = subprocess.run(command, cwd=YOLO_DIR)
-
-    runs_dir = os.path.join(YOLO_DIR, 'runs', 'train')
-    latest_run = max([os.path.join(runs_dir, d) for d in os.listdir(runs_dir)], key=os.path.getmtime)
-
-    best_pt_path = os.path.join(latest_run, 'weights', 'best.pt')
-    if os.path.exists(best_pt_path):
-        target_dir = os.path.join(dataset_dir, 'best_weights')
-        os.makedirs(target_dir, exist_ok=True)
-        shutil.copy(best_pt_path, target_dir)
-        print(f"best.pt copied to: {target_dir}")
-    else:
-        print("best.pt not found. Check if the training completed successfully.")
-
-    if result.returncode == 0:
-        messagebox.showinfo("Training Complete", "Training has completed successfully.")
-    else:
-        messagebox.showerror("Error", "Training failed. Check the console for details.")
-
-ROOT_DIR = os.getcwd()
-YOLO_DIR = r'C:\Users\paytonmiller\PycharmProjects\Pyton\Detection\yolov5'
-MODEL = 'yolov5s'
 print(YOLO_DIR)
+training_queue = training.TrainingQueue()
+print(f"GPUs available for training: {training_queue.gpus or 'none, training on CPU'}")
 
 dataset_dir_var = StringVar()
 img_size = StringVar(value="640")
 batch_size = StringVar(value="4")
 epochs = StringVar(value="2")
+split_mode = StringVar(value="lists")
+device_var = StringVar(value="auto")
+threads_var = StringVar()
+status_var = StringVar()
 
 ttk.Label(root, text="Dataset Directory:").grid(row=0, column=0, padx=10, pady=5)
 ttk.Entry(root, textvariable=dataset_dir_var, width=50).grid(row=0, column=1, padx=10, pady=5)
@@ -203,6 +249,26 @@ ttk.Entry(root, textvariable=batch_size).grid(row=2, column=1, padx=10, pady=5)
 ttk.Label(root, text="Epochs:").grid(row=3, column=0, padx=10, pady=5)
 ttk.Entry(root, textvariable=epochs).grid(row=3, column=1, padx=10, pady=5)
 
-ttk.Button(root, text="Start Training", command=start_training).grid(row=4, column=1, padx=10, pady=20)
+ttk.Label(root, text="Split Mode:").grid(row=4, column=0, padx=10, pady=5)
+ttk.Combobox(root, textvariable=split_mode, values=['lists', 'hardlinks', 'move'], state='readonly').grid(row=4, column=1, padx=10, pady=5)
+
+ttk.Label(root, text="Device:").grid(row=5, column=0, padx=10, pady=5)
+device_values = ['auto', 'cpu'] + [str(gpu) for gpu in training_queue.gpus]
+ttk.Combobox(root, textvariable=device_var, values=device_values, state='readonly').grid(row=5, column=1, padx=10, pady=5)
+
+ttk.Label(root, text="CPU Threads:").grid(row=6, column=0, padx=10, pady=5)
+ttk.Entry(root, textvariable=threads_var).grid(row=6, column=1, padx=10, pady=5)
+
+queue_button = ttk.Button(root, text="Queue Training", command=start_training)
+queue_button.grid(row=7, column=1, padx=10, pady=20)
+ttk.Label(root, textvariable=status_var).grid(row=7, column=2, padx=10, pady=20)
+
+runs_list = tk.Listbox(root, width=100, height=6)
+runs_list.grid(row=8, column=0, columnspan=3, padx=10, pady=5)
+ttk.Button(root, text="Cancel Selected", command=cancel_selected_run).grid(row=9, column=1, padx=10, pady=5)
 
+root.protocol("WM_DELETE_WINDOW", on_close)
+# Queued runs lead their own process groups, so cancel them when the interface stops this window
+signal.signal(signal.SIGTERM, lambda signum, frame: root.after(0, on_close))
+root.after(500, poll_training)
 root.mainloop()